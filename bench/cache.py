@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    cache
+    ~~~~~
+
+    A micro benchmark for the in-memory caches of
+    :mod:`werkzeug.contrib.cache` with the different serializers.  It
+    stores and loads a small string and a larger nested structure, like a
+    parsed configuration, and reports the number of operations per second.
+
+    :copyright: (c) 2013 by the Werkzeug Team, see AUTHORS for more details.
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import print_function
+import os
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir))
+
+from werkzeug.contrib.cache import SimpleCache, LRUCache
+
+
+ROUNDS = 10000
+
+SMALL_VALUE = u'<div class="sidebar">Hello World!</div>'
+LARGE_VALUE = dict(('section%d' % x, {
+    'name':     u'Section %d' % x,
+    'enabled':  x % 2 == 0,
+    'items':    [{'id': y, 'title': u'Item %d' % y} for y in range(10)]
+}) for x in range(20))
+
+
+def bench(name, func, rounds=5):
+    best = None
+    for x in range(rounds):
+        t = timer()
+        for y in range(ROUNDS):
+            func()
+        delta = timer() - t
+        if best is None or delta < best:
+            best = delta
+    print('%-32s %12.0f ops/s' % (name, ROUNDS / best))
+
+
+def main():
+    for cls in SimpleCache, LRUCache:
+        for serializer in 'pickle', 'copy', None:
+            cache = cls(serializer=serializer)
+            for value_name, value in ('small', SMALL_VALUE), \
+                                     ('large', LARGE_VALUE):
+                name = '%s %s %s' % (cls.__name__, serializer, value_name)
+                cache.set('key', value)
+                bench(name + ' get', lambda: cache.get('key'))
+                bench(name + ' set', lambda: cache.set('key', value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    headers
+    ~~~~~~~
+
+    A micro benchmark for typical :class:`werkzeug.datastructures.Headers`
+    workloads: building response headers, lookups in a larger set of
+    headers, full response cycles including conditional responses and
+    repeated access to the headers of a request.  It reports the number of
+    operations per second.
+
+    :copyright: (c) 2013 by the Werkzeug Team, see AUTHORS for more details.
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import print_function
+import os
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir))
+
+from werkzeug.datastructures import Headers, EnvironHeaders
+from werkzeug.test import create_environ
+from werkzeug.wrappers import Response
+
+
+ROUNDS = 20000
+
+LARGE_HEADERS = Headers([('X-Header-%d' % x, str(x)) for x in range(20)] +
+                        [('Content-Type', 'text/html'),
+                         ('Content-Length', '42')])
+ENVIRON = create_environ()
+CONDITIONAL_ENVIRON = create_environ(headers={
+    'If-None-Match': '"abc"'
+})
+REQUEST_ENVIRON = create_environ(headers=[
+    ('User-Agent', 'Mozilla/5.0'),
+    ('Accept', 'text/html,application/xhtml+xml'),
+    ('Accept-Language', 'en-US,en;q=0.5'),
+    ('Accept-Encoding', 'gzip, deflate'),
+    ('Cookie', 'session=abc'),
+    ('Connection', 'keep-alive'),
+    ('Cache-Control', 'max-age=0')
+])
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def build_headers():
+    headers = Headers()
+    headers['Content-Type'] = 'text/html; charset=utf-8'
+    headers.add('Set-Cookie', 'a=b')
+    headers.add('Set-Cookie', 'c=d')
+    headers['Cache-Control'] = 'no-cache'
+    headers['Content-Length'] = '42'
+    'location' in headers
+    headers.get('content-location')
+    headers.get('content-length')
+    headers.to_list()
+
+
+def lookup_large():
+    LARGE_HEADERS.get('content-type')
+    LARGE_HEADERS.get('content-length')
+    LARGE_HEADERS.get('x-missing')
+    'etag' in LARGE_HEADERS
+    LARGE_HEADERS.getlist('x-header-10')
+
+
+def response_cycle():
+    response = Response('Hello World!', headers={'X-Foo': 'bar'})
+    response.set_cookie('session', 'value')
+    response(ENVIRON, start_response)
+
+
+def conditional_response():
+    response = Response('Hello World!')
+    response.set_etag('abc')
+    response.make_conditional(CONDITIONAL_ENVIRON)
+    response(CONDITIONAL_ENVIRON, start_response)
+
+
+def environ_headers():
+    headers = EnvironHeaders(REQUEST_ENVIRON)
+    for x in range(3):
+        len(headers)
+        list(headers)
+        headers['User-Agent']
+        headers.get('X-Missing')
+
+
+def bench(name, func, rounds=5):
+    best = None
+    for x in range(rounds):
+        t = timer()
+        for y in range(ROUNDS):
+            func()
+        delta = timer() - t
+        if best is None or delta < best:
+            best = delta
+    print('%-24s %12.0f ops/s' % (name, ROUNDS / best))
+
+
+def main():
+    bench('build headers', build_headers)
+    bench('lookup large', lookup_large)
+    bench('response cycle', response_cycle)
+    bench('conditional response', conditional_response)
+    bench('environ headers', environ_headers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    lineiter
+    ~~~~~~~~
+
+    A micro benchmark for :func:`werkzeug.wsgi.make_line_iter` and
+    :func:`werkzeug.wsgi.make_chunk_iter`.  It reports the throughput in
+    lines (or chunks) per second and megabytes per second for inputs with
+    many small lines and for inputs with lines much longer than the
+    buffer size.
+
+    :copyright: (c) 2013 by the Werkzeug Team, see AUTHORS for more details.
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import print_function
+import os
+import sys
+from io import BytesIO
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir))
+
+from werkzeug.wsgi import make_line_iter, make_chunk_iter
+
+
+SMALL_LINES = ''.join('line %d with some text\r\n' % x
+                      for x in range(100000)).encode('ascii')
+HUGE_LINES = (b'x' * (1024 * 1024) + b'\n') * 8
+SMALL_CHUNKS = SMALL_LINES.replace(b'\r\n', b'&')
+HUGE_CHUNKS = HUGE_LINES.replace(b'\n', b'&')
+
+
+def run_lines(data):
+    return make_line_iter(BytesIO(data), limit=len(data))
+
+
+def run_chunks(data):
+    return make_chunk_iter(BytesIO(data), '&', limit=len(data))
+
+
+def bench(name, func, data, rounds=5):
+    best = None
+    for x in range(rounds):
+        t = timer()
+        count = 0
+        for item in func(data):
+            count += 1
+        delta = timer() - t
+        if best is None or delta < best:
+            best = delta
+    print('%-24s %12.0f items/s %10.1f MB/s' % (
+        name, count / best, len(data) / best / (1024 * 1024)))
+
+
+def main():
+    bench('make_line_iter small', run_lines, SMALL_LINES)
+    bench('make_line_iter huge', run_lines, HUGE_LINES)
+    bench('make_chunk_iter small', run_chunks, SMALL_CHUNKS)
+    bench('make_chunk_iter huge', run_chunks, HUGE_CHUNKS)
+
+
+if __name__ == '__main__':
+    main()
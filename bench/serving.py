@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    serving
+    ~~~~~~~
+
+    A benchmark for the response writing of the development server in
+    :mod:`werkzeug.serving`.  It runs a server in a background thread,
+    sends requests with a minimal client and counts the system calls the
+    server uses to send a response.  It reports the number of send calls
+    per response and the number of requests per second for a response with
+    a single body chunk and for responses made of many small chunks.  It
+    also measures the throughput of large file downloads through the
+    ``wsgi.file_wrapper`` of the server and compares persistent connections
+    with a new connection per request.
+
+    :copyright: (c) 2013 by the Werkzeug Team, see AUTHORS for more details.
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import print_function
+import os
+import sys
+import socket
+import threading
+from tempfile import NamedTemporaryFile
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir))
+
+import six
+from six.moves import http_client
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from werkzeug.wsgi import wrap_file
+
+
+REQUESTS = 500
+CHUNKS = [b'chunk %d\n' % x if six.PY3 else 'chunk %d\n' % x
+          for x in range(100)]
+FILE_SIZE = 32 * 1024 * 1024
+DOWNLOADS = 20
+HEADERS = [('Content-Type', 'text/plain'),
+           ('Content-Length', str(sum(map(len, CHUNKS)))),
+           ('X-Foo', 'bar'), ('X-Bar', 'baz')]
+
+
+class CountingSocket(object):
+    """Wraps a socket and counts the calls that send data."""
+    calls = 0
+
+    def __init__(self, sock):
+        self._sock = sock
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+    def send(self, data, *args):
+        CountingSocket.calls += 1
+        return self._sock.send(data, *args)
+
+    def sendall(self, data, *args):
+        CountingSocket.calls += 1
+        return self._sock.sendall(data, *args)
+
+    if hasattr(socket.socket, 'sendmsg'):
+        def sendmsg(self, buffers, *args):
+            CountingSocket.calls += 1
+            return self._sock.sendmsg(buffers, *args)
+
+
+class CountingHandler(WSGIRequestHandler):
+
+    def setup(self):
+        self.request = CountingSocket(self.request)
+        WSGIRequestHandler.setup(self)
+        if not six.PY3:
+            self.wfile = socket._fileobject(self.request, 'wb', 0)
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def single_app(environ, start_response):
+    start_response('200 OK', HEADERS)
+    return [b''.join(CHUNKS)]
+
+
+def list_app(environ, start_response):
+    start_response('200 OK', HEADERS)
+    return CHUNKS
+
+
+def generator_app(environ, start_response):
+    start_response('200 OK', HEADERS)
+    return iter(CHUNKS)
+
+
+def streaming_app(environ, start_response):
+    start_response('200 OK', HEADERS[:1])
+    return iter(CHUNKS)
+
+
+def make_file_app(filename):
+    def file_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'application/octet-stream'),
+                                  ('Content-Length', str(FILE_SIZE))])
+        return wrap_file(environ, open(filename, 'rb'))
+    return file_app
+
+
+def request(address):
+    sock = socket.create_connection(address)
+    sock.sendall(b'GET / HTTP/1.0\r\nHost: localhost\r\n\r\n')
+    while sock.recv(65536):
+        pass
+    sock.close()
+
+
+def start_server(app, keep_alive=False):
+    server = BaseWSGIServer('127.0.0.1', 0, app, CountingHandler,
+                            keep_alive=keep_alive)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.setDaemon(True)
+    thread.start()
+    return server
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+def bench(name, app):
+    server = start_server(app)
+    address = server.socket.getsockname()
+    request(address)
+    CountingSocket.calls = 0
+    t = timer()
+    for x in range(REQUESTS):
+        request(address)
+    delta = timer() - t
+    print('%-16s %8.1f sends/response %10.0f requests/s' % (
+        name, CountingSocket.calls / float(REQUESTS), REQUESTS / delta))
+    stop_server(server)
+
+
+def bench_download():
+    with NamedTemporaryFile() as f:
+        f.write(b'x' * FILE_SIZE)
+        f.flush()
+        server = start_server(make_file_app(f.name))
+        address = server.socket.getsockname()
+        t = timer()
+        cpu = os.times()
+        for x in range(DOWNLOADS):
+            request(address)
+        cpu = sum(os.times()[:2]) - sum(cpu[:2])
+        delta = timer() - t
+        stop_server(server)
+    total = FILE_SIZE * DOWNLOADS / (1024.0 * 1024.0)
+    print('%-16s %8.0f MB/s %10.1f CPU seconds per GB' % (
+        'file download', total / delta, cpu / total * 1024))
+
+
+def bench_keep_alive(name, app, keep_alive):
+    server = start_server(app, keep_alive)
+    host, port = server.socket.getsockname()[:2]
+    conn = None
+    t = timer()
+    for x in range(REQUESTS):
+        if conn is None:
+            conn = http_client.HTTPConnection(host, port)
+        conn.request('GET', '/')
+        response = conn.getresponse()
+        response.read()
+        if response.will_close:
+            conn.close()
+            conn = None
+    delta = timer() - t
+    if conn is not None:
+        conn.close()
+    print('%-16s %8s %10.0f requests/s' % (
+        name, keep_alive and 'keep' or 'close', REQUESTS / delta))
+    stop_server(server)
+
+
+def main():
+    bench('single chunk', single_app)
+    bench('list', list_app)
+    bench('generator', generator_app)
+    bench_download()
+    for keep_alive in False, True:
+        bench_keep_alive('single chunk', single_app, keep_alive)
+        bench_keep_alive('streaming', streaming_app, keep_alive)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    urlbuilding
+    ~~~~~~~~~~~
+
+    A micro benchmark for building URLs end to end: URL building with
+    :meth:`werkzeug.routing.MapAdapter.build` including the quoting of
+    arguments and query strings, :class:`werkzeug.urls.Href` and
+    :func:`werkzeug.urls.iri_to_uri`.  It reports the number of URLs per
+    second.
+
+    :copyright: (c) 2013 by the Werkzeug Team, see AUTHORS for more details.
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import print_function
+import os
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir))
+
+from werkzeug.routing import Map, Rule
+from werkzeug.urls import Href, url_quote, url_quote_plus, iri_to_uri
+
+
+ROUNDS = 20000
+
+URL_MAP = Map([
+    Rule('/', endpoint='index'),
+    Rule('/users/<int:id>', endpoint='user'),
+    Rule('/pages/<path:name>', endpoint='page'),
+    Rule('/search', endpoint='search'),
+])
+ADAPTER = URL_MAP.bind('example.com', '/')
+HREF = Href('/api')
+
+
+def build_plain():
+    ADAPTER.build('user', {'id': 42})
+    ADAPTER.build('page', {'name': 'about/team'})
+
+
+def build_quoted():
+    ADAPTER.build('page', {'name': u'über uns/team'})
+    ADAPTER.build('search', {'q': u'grüße aus köln', 'page': 2})
+
+
+def href():
+    HREF('users', 42, sort='name')
+
+
+def quote():
+    url_quote('about/team')
+    url_quote(u'über uns/team')
+    url_quote_plus(u'grüße aus köln')
+
+
+def iri():
+    iri_to_uri(u'http://example.com/über uns?q=köln')
+
+
+def bench(name, func, rounds=5):
+    best = None
+    for x in range(rounds):
+        t = timer()
+        for y in range(ROUNDS):
+            func()
+        delta = timer() - t
+        if best is None or delta < best:
+            best = delta
+    print('%-16s %12.0f calls/s' % (name, ROUNDS / best))
+
+
+def main():
+    bench('build plain', build_plain)
+    bench('build quoted', build_quoted)
+    bench('href', href)
+    bench('quote', quote)
+    bench('iri_to_uri', iri)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    urlencoding
+    ~~~~~~~~~~~
+
+    A micro benchmark for decoding and encoding large URL encoded form
+    bodies with :func:`werkzeug.urls.url_decode`,
+    :func:`werkzeug.urls.url_decode_stream`,
+    :class:`werkzeug.urls.LazyURLDecodedMultiDict` and
+    :func:`werkzeug.urls.url_encode`.  It reports the throughput in fields
+    per second.
+
+    :copyright: (c) 2013 by the Werkzeug Team, see AUTHORS for more details.
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import print_function
+import os
+import sys
+from io import BytesIO
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir))
+
+from werkzeug.urls import url_decode, url_decode_stream, url_encode, \
+     LazyURLDecodedMultiDict
+
+
+FIELDS = 50000
+PLAIN = '&'.join('field%d=value%d' % (x, x) for x in range(FIELDS))
+QUOTED = '&'.join('field%d=some+value%%2C+%d' % (x, x)
+                  for x in range(FIELDS))
+MIXED = '&'.join(x % 10 and 'field%d=value%d' % (x, x) or
+                 'field%d=some+value%%2C+%d' % (x, x)
+                 for x in range(FIELDS))
+PLAIN_DICT = url_decode(PLAIN)
+QUOTED_DICT = url_decode(QUOTED)
+
+
+def decode(data):
+    return lambda: url_decode(data)
+
+
+def decode_stream(data):
+    data = data.encode('ascii')
+    return lambda: url_decode_stream(BytesIO(data), limit=len(data))
+
+
+def lazy_lookup(data):
+    def run():
+        d = LazyURLDecodedMultiDict(data)
+        d.get('field42')
+        d.get('missing')
+    return run
+
+
+def encode(data):
+    return lambda: url_encode(data)
+
+
+def bench(name, func, rounds=5):
+    best = None
+    for x in range(rounds):
+        t = timer()
+        func()
+        delta = timer() - t
+        if best is None or delta < best:
+            best = delta
+    print('%-28s %12.0f fields/s' % (name, FIELDS / best))
+
+
+def main():
+    bench('url_decode plain', decode(PLAIN))
+    bench('url_decode quoted', decode(QUOTED))
+    bench('url_decode 10% quoted', decode(MIXED))
+    bench('lazy two keys plain', lazy_lookup(PLAIN))
+    bench('lazy two keys quoted', lazy_lookup(QUOTED))
+    bench('url_decode_stream plain', decode_stream(PLAIN))
+    bench('url_decode_stream quoted', decode_stream(QUOTED))
+    bench('url_encode plain', encode(PLAIN_DICT))
+    bench('url_encode quoted', encode(QUOTED_DICT))
+
+
+if __name__ == '__main__':
+    main()
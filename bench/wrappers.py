@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    wrappers
+    ~~~~~~~~
+
+    A micro benchmark that compares :class:`werkzeug.wrappers.Request` and
+    :class:`werkzeug.wrappers.Response` with the lightweight
+    :class:`werkzeug.wrappers.FastRequest` and
+    :class:`werkzeug.wrappers.FastResponse`.  It measures the creation of
+    the objects, a full request/response cycle of a small JSON style
+    application and reports the number of operations per second as well as
+    the size of a single object.
+
+    :copyright: (c) 2013 by the Werkzeug Team, see AUTHORS for more details.
+    :license: BSD, see LICENSE for more details.
+"""
+from __future__ import print_function
+import os
+import sys
+from timeit import default_timer as timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.path.pardir))
+
+from werkzeug.test import create_environ
+from werkzeug.wrappers import Request, Response, FastRequest, FastResponse
+
+
+ROUNDS = 20000
+
+ENVIRON = create_environ('/api/items?id=42&sort=name', headers={
+    'Accept': 'application/json',
+    'User-Agent': 'Mozilla/5.0'
+})
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def allocate(request_class, response_class):
+    def run():
+        request_class(dict(ENVIRON))
+        response_class('{}', mimetype='application/json')
+    return run
+
+
+def cycle(request_class, response_class):
+    def run():
+        request = request_class(dict(ENVIRON))
+        request.args.get('id')
+        request.headers.get('Accept')
+        response = response_class('{"id": %s}' % request.args['id'],
+                                  mimetype='application/json')
+        for item in response(request.environ, start_response):
+            pass
+    return run
+
+
+def instance_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def bench(name, func, rounds=5):
+    best = None
+    for x in range(rounds):
+        t = timer()
+        for y in range(ROUNDS):
+            func()
+        delta = timer() - t
+        if best is None or delta < best:
+            best = delta
+    print('%-24s %12.0f ops/s' % (name, ROUNDS / best))
+
+
+def main():
+    bench('allocate', allocate(Request, Response))
+    bench('allocate fast', allocate(FastRequest, FastResponse))
+    bench('cycle', cycle(Request, Response))
+    bench('cycle fast', cycle(FastRequest, FastResponse))
+    for cls in Request, FastRequest:
+        print('%-24s %12d bytes' % (cls.__name__,
+                                    instance_size(cls(dict(ENVIRON)))))
+    for cls in Response, FastResponse:
+        print('%-24s %12d bytes' % (cls.__name__, instance_size(cls('{}'))))
+
+
+if __name__ == '__main__':
+    main()
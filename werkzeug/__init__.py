@@ -51,7 +51,8 @@ all_by_module = {
     'werkzeug.urls':        ['url_decode', 'url_encode', 'url_quote',
                              'url_quote_plus', 'url_unquote',
                              'url_unquote_plus', 'url_fix', 'Href',
-                             'iri_to_uri', 'uri_to_iri'],
+                             'iri_to_uri', 'uri_to_iri',
+                             'LazyURLDecodedMultiDict'],
     'werkzeug.formparser':  ['parse_form_data'],
     'werkzeug.utils':       ['escape', 'environ_property',
                              'append_slash_redirect', 'redirect',
@@ -96,7 +97,8 @@ all_by_module = {
                              'CommonResponseDescriptorsMixin',
                              'UserAgentMixin', 'AuthorizationMixin',
                              'WWWAuthenticateMixin',
-                             'CommonRequestDescriptorsMixin'],
+                             'CommonRequestDescriptorsMixin',
+                             'FastRequest', 'FastResponse'],
     'werkzeug.security':    ['generate_password_hash', 'check_password_hash'],
     # the undocumented easteregg ;-)
     'werkzeug._internal':   ['_easteregg']
@@ -59,7 +59,12 @@
 import os
 import re
 import six
+import mmap
+import struct
 import tempfile
+import threading
+from heapq import heappush, heappop, heapify
+from itertools import count
 from werkzeug._internal import force_bytes
 
 try:
@@ -75,6 +80,11 @@ try:
 except ImportError:
     import pickle
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 #izip = zip_.izip
 
 def _items(mappingorseq):
@@ -96,6 +106,65 @@ def _items(mappingorseq):
         return mappingorseq
 
 
+class _PickleSerializer(object):
+    """Stores a pickled copy of the values."""
+
+    def dumps(self, value):
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    loads = staticmethod(pickle.loads)
+
+
+class _Pickled(bytes):
+    """Marks pickled values of the :class:`_CopySerializer`."""
+    __slots__ = ()
+
+
+class _CopySerializer(object):
+    """Stores values of immutable builtin types as they are and a pickled
+    copy of everything else.  Pickling is faster than `copy.deepcopy` for
+    the nested structures that are usually cached.
+    """
+    immutable_types = frozenset([type(None), bool, float, complex,
+                                 six.binary_type, six.text_type] +
+                                list(six.integer_types))
+
+    def dumps(self, value):
+        if type(value) in self.immutable_types:
+            return value
+        return _Pickled(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    def loads(self, value):
+        if type(value) is _Pickled:
+            return pickle.loads(value)
+        return value
+
+
+class _ReferenceSerializer(object):
+    """Stores the values themselves."""
+
+    def dumps(self, value):
+        return value
+
+    loads = dumps
+
+
+_serializers = {
+    'pickle':   _PickleSerializer(),
+    'copy':     _CopySerializer(),
+    None:       _ReferenceSerializer()
+}
+
+
+def _get_serializer(serializer):
+    if serializer is None or isinstance(serializer, six.string_types):
+        try:
+            return _serializers[serializer]
+        except KeyError:
+            raise ValueError('unknown serializer %r' % (serializer,))
+    return serializer
+
+
 class BaseCache(object):
     """Baseclass for the cache systems.  All the cache systems implement this
     API or a superset of it.
@@ -135,7 +204,7 @@ class BaseCache(object):
         :param keys: The function accepts multiple keys as positional
                      arguments.
         """
-        return map(self.get, keys)
+        return [self.get(key) for key in keys]
 
     def get_dict(self, *keys):
         """Works like :meth:`get_many` but returns a dict::
@@ -218,6 +287,93 @@ class BaseCache(object):
         """
         self.set(key, (self.get(key) or 0) - delta)
 
+    def get_stats(self):
+        """Returns a dict with statistics about the cache, like the number
+        of ``hits``, ``misses`` and ``evictions``.  Caches that do not keep
+        statistics return an empty dict.
+
+        .. versionadded:: 0.9
+        """
+        return {}
+
+    def pipeline(self):
+        """Returns a :class:`CachePipeline` that collects operations and
+        executes them together when the `with` block is left::
+
+            with cache.pipeline() as pipe:
+                pipe.set('foo', 42)
+                pipe.inc('counter')
+                pipe.get('bar')
+            _, counter, bar = pipe.results
+
+        Network caches send the operations in as few round trips as
+        possible, other caches execute them one after another.
+
+        .. versionadded:: 0.9
+        """
+        return CachePipeline(self)
+
+
+def _pipeline_operation(name):
+    def operation(self, *args, **kwargs):
+        self._operations.append((name, args, kwargs))
+    operation.__name__ = name
+    operation.__doc__ = 'Adds :meth:`BaseCache.%s` to the pipeline.' % name
+    return operation
+
+
+class CachePipeline(object):
+    """Collects cache operations and executes them together.  It's
+    returned by :meth:`BaseCache.pipeline` and has the same methods as the
+    cache, except for :meth:`~BaseCache.clear`.  The methods don't return
+    anything, the return values of the operations are stored in
+    :attr:`results` in the order the operations were added.
+
+    If it's used in a `with` block the operations are executed at the end
+    of the block, unless there was an exception.
+
+    .. versionadded:: 0.9
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._operations = []
+        #: the results of the last :meth:`execute` call.
+        self.results = None
+
+    get = _pipeline_operation('get')
+    get_many = _pipeline_operation('get_many')
+    get_dict = _pipeline_operation('get_dict')
+    set = _pipeline_operation('set')
+    add = _pipeline_operation('add')
+    set_many = _pipeline_operation('set_many')
+    delete = _pipeline_operation('delete')
+    delete_many = _pipeline_operation('delete_many')
+    inc = _pipeline_operation('inc')
+    dec = _pipeline_operation('dec')
+
+    def __len__(self):
+        return len(self._operations)
+
+    def execute(self):
+        """Executes the collected operations and returns a list with their
+        results.
+        """
+        operations, self._operations = self._operations, []
+        self.results = self._execute(operations)
+        return self.results
+
+    def _execute(self, operations):
+        return [getattr(self.cache, name)(*args, **kwargs)
+                for name, args, kwargs in operations]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.execute()
+
 
 class NullCache(BaseCache):
     """A cache that doesn't cache.  This can be useful for unit testing.
@@ -233,22 +389,45 @@ class SimpleCache(BaseCache):
     to use as many atomic operations as possible and no locks for simplicity
     but it could happen under heavy load that keys are added multiple times.
 
+    Values are pickled when they are stored so that changes to them don't
+    affect the cache.  As this can be costly for large values, the
+    `serializer` can be changed:
+
+    ``'pickle'``
+        the default, stores a pickled copy of the value.
+    ``'copy'``
+        stores numbers, strings, `None` and booleans as they are and
+        pickles only other values.
+    `None`
+        stores the values themselves.  Values returned by :meth:`get` are
+        the same objects that were stored and must not be changed.
+
+    Alternatively any object with `dumps` and `loads` methods can be
+    passed.
+
+    .. versionchanged:: 0.9
+       The `serializer` parameter was added.
+
     :param threshold: the maximum number of items the cache stores before
                       it starts deleting some.
     :param default_timeout: the default timeout that is used if no timeout is
                             specified on :meth:`~BaseCache.set`.
+    :param serializer: how values are stored, see above.
     """
 
-    def __init__(self, threshold=500, default_timeout=300):
+    def __init__(self, threshold=500, default_timeout=300,
+                 serializer='pickle'):
         BaseCache.__init__(self, default_timeout)
         self._cache = {}
         self.clear = self._cache.clear
         self._threshold = threshold
+        self._serializer = _get_serializer(serializer)
 
     def _prune(self):
         if len(self._cache) > self._threshold:
             now = time()
-            for idx, (key, (expires, _)) in enumerate(self._cache.items()):
+            items = list(self._cache.items())
+            for idx, (key, (expires, _)) in enumerate(items):
                 if expires <= now or idx % 3 == 0:
                     self._cache.pop(key, None)
 
@@ -256,28 +435,478 @@ class SimpleCache(BaseCache):
         now = time()
         expires, value = self._cache.get(key, (0, None))
         if expires > time():
-            return pickle.loads(value)
+            return self._serializer.loads(value)
 
     def set(self, key, value, timeout=None):
         if timeout is None:
             timeout = self.default_timeout
         self._prune()
-        self._cache[key] = (time() + timeout, pickle.dumps(value,
-            pickle.HIGHEST_PROTOCOL))
+        self._cache[key] = (time() + timeout, self._serializer.dumps(value))
 
     def add(self, key, value, timeout=None):
         if timeout is None:
             timeout = self.default_timeout
         if len(self._cache) > self._threshold:
             self._prune()
-        item = (time() + timeout, pickle.dumps(value,
-            pickle.HIGHEST_PROTOCOL))
+        item = (time() + timeout, self._serializer.dumps(value))
         self._cache.setdefault(key, item)
 
     def delete(self, key):
         self._cache.pop(key, None)
 
 
+class _NullLock(object):
+    """A lock that does nothing, used by caches that are not thread safe."""
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pass
+
+
+class LRUCache(BaseCache):
+    """A memory cache for single process environments that discards the
+    least recently used items once it holds more than `threshold` items.
+    Unlike :class:`SimpleCache` it keeps the items that are accessed often
+    and all operations take constant time.
+
+    Expired items are removed lazily: when they are looked up and, in
+    order of expiration, before any item that is still valid is evicted.
+
+    The cache counts ``hits``, ``misses``, ``evictions`` (valid items that
+    were discarded because the cache was full) and ``expirations``, see
+    :meth:`~BaseCache.get_stats`.
+
+    .. versionadded:: 0.9
+
+    :param threshold: the maximum number of items the cache stores.
+    :param default_timeout: the default timeout that is used if no timeout is
+                            specified on :meth:`~BaseCache.set`.
+    :param threadsafe: if set to `True` all operations are protected by a
+                       lock so that the cache can be shared between threads.
+    :param serializer: how values are stored, the same as for
+                       :class:`SimpleCache`.
+    """
+
+    def __init__(self, threshold=500, default_timeout=300, threadsafe=False,
+                 serializer='pickle'):
+        BaseCache.__init__(self, default_timeout)
+        self._threshold = threshold
+        self._serializer = _get_serializer(serializer)
+        self._lock = threadsafe and threading.RLock() or _NullLock()
+        self._reset()
+
+    def _reset(self):
+        # links of the doubly linked list are [prev, next, key, expires,
+        # value], the root link sits between the most and the least
+        # recently used item.
+        self._cache = {}
+        self._root = root = []
+        root[:] = [root, root, None, None, None]
+        # a heap of (expires, sequence, key), it might contain outdated
+        # entries for items that were set again or deleted.
+        self._expiry = []
+        self._sequence = count()
+        self._hits = self._misses = 0
+        self._evictions = self._expirations = 0
+
+    def _append(self, link):
+        root = self._root
+        last = root[0]
+        link[0] = last
+        link[1] = root
+        last[1] = root[0] = link
+
+    def _remove(self, link):
+        prev, next = link[0], link[1]
+        prev[1] = next
+        next[0] = prev
+        del self._cache[link[2]]
+
+    def _prune(self):
+        cache = self._cache
+        if len(self._expiry) > 2 * len(cache) + 16:
+            self._expiry = [(link[3], next(self._sequence), key)
+                            for key, link in _items(cache)]
+            heapify(self._expiry)
+        if len(cache) <= self._threshold:
+            return
+        now = time()
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now and len(cache) > self._threshold:
+            expires, _, key = heappop(expiry)
+            link = cache.get(key)
+            if link is not None and link[3] == expires:
+                self._remove(link)
+                self._expirations += 1
+        while len(cache) > self._threshold:
+            self._remove(self._root[1])
+            self._evictions += 1
+
+    def _get_link(self, key):
+        link = self._cache.get(key)
+        if link is not None and link[3] <= time():
+            self._remove(link)
+            self._expirations += 1
+            link = None
+        return link
+
+    def get(self, key):
+        with self._lock:
+            link = self._get_link(key)
+            if link is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            link[0][1] = link[1]
+            link[1][0] = link[0]
+            self._append(link)
+            value = link[4]
+        return self._serializer.loads(value)
+
+    def set(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = self.default_timeout
+        value = self._serializer.dumps(value)
+        expires = time() + timeout
+        with self._lock:
+            link = self._cache.get(key)
+            if link is not None:
+                link[0][1] = link[1]
+                link[1][0] = link[0]
+                link[3] = expires
+                link[4] = value
+            else:
+                link = self._cache[key] = [None, None, key, expires, value]
+            self._append(link)
+            heappush(self._expiry, (expires, next(self._sequence), key))
+            self._prune()
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._get_link(key) is None:
+                self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            link = self._cache.get(key)
+            if link is not None:
+                self._remove(link)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def inc(self, key, delta=1):
+        with self._lock:
+            value = (self.get(key) or 0) + delta
+            self.set(key, value)
+        return value
+
+    def dec(self, key, delta=1):
+        return self.inc(key, -delta)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'size':         len(self._cache),
+                'hits':         self._hits,
+                'misses':       self._misses,
+                'evictions':    self._evictions,
+                'expirations':  self._expirations
+            }
+
+
+class SharedMemoryCache(BaseCache):
+    """A memory cache that is shared by all processes that use the same
+    file, or that were forked after the cache was created, for example
+    the workers of a forking or pre-forking server.  It needs no separate
+    server process but requires ``fcntl``, so it's not available on
+    Windows.
+
+    The items live in a memory mapped hash table of fixed-size slots.
+    A key is mapped to a bucket of :attr:`bucket_ways` slots, and the
+    bucket is locked for every operation with a thread lock and an
+    ``fcntl`` lock on its part of the file.  If all slots of a bucket are
+    in use, the expired or else the least recently used item of the bucket
+    is replaced.  Keys have to be strings, and items where the key and the
+    serialized value don't fit into a slot are not cached.
+
+    The statistics of :meth:`~BaseCache.get_stats` are shared by all
+    processes.  The file and the memory map stay open until :meth:`close`
+    is called.
+
+    .. versionadded:: 0.9
+
+    :param path: the file that backs the cache.  If it exists and was
+                 created by this class before, the cache uses the layout
+                 and the items stored in it.  Other files that are not
+                 empty are rejected with a :exc:`ValueError`.  If it's
+                 `None` (the default) an anonymous temporary file is
+                 used, which is only shared with forked processes.
+    :param capacity: the maximum number of items the cache stores.
+    :param slot_size: the number of bytes per item, including the key and
+                      about 30 bytes of metadata.
+    :param default_timeout: the default timeout that is used if no timeout is
+                            specified on :meth:`~BaseCache.set`.
+    """
+
+    #: the number of slots in a bucket.
+    bucket_ways = 8
+
+    _magic = b'WZSHMC01'
+    # magic, number of buckets, ways, slot size
+    _file_header = struct.Struct('=8sIII')
+    _file_header_size = 64
+    # hits, misses, evictions
+    _bucket_header = struct.Struct('=QQQ')
+    # flags, key hash, expires, last access, key length, value length
+    _slot_header = struct.Struct('=BQddHI')
+    _int = struct.Struct('=q')
+
+    _EMPTY, _PICKLED, _INTEGER = range(3)
+
+    def __init__(self, path=None, capacity=4096, slot_size=1024,
+                 default_timeout=300):
+        BaseCache.__init__(self, default_timeout)
+        if fcntl is None:
+            raise RuntimeError('SharedMemoryCache requires fcntl')
+        if slot_size <= self._slot_header.size:
+            raise ValueError('slot_size is too small')
+        if path is None:
+            self._file = tempfile.TemporaryFile()
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 384)
+            self._file = os.fdopen(fd, 'r+b')
+        self._fd = self._file.fileno()
+        num_buckets = max(1, -(-capacity // self.bucket_ways))
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self._file_header_size, 0)
+        try:
+            header = os.read(self._fd, self._file_header.size)
+            if len(header) == self._file_header.size and \
+               header[:len(self._magic)] == self._magic:
+                _, num_buckets, ways, slot_size = \
+                    self._file_header.unpack(header)
+            elif not header:
+                ways = self.bucket_ways
+                self._init_file(num_buckets, ways, slot_size)
+            else:
+                header = None
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self._file_header_size, 0)
+        if header is None:
+            self._file.close()
+            raise ValueError('%r is not a file of a SharedMemoryCache' % path)
+        self._num_buckets = num_buckets
+        self._ways = ways
+        self._slot_size = slot_size
+        self._bucket_size = self._bucket_header.size + ways * slot_size
+        self._map = mmap.mmap(self._fd, self._file_header_size +
+                              num_buckets * self._bucket_size)
+        self._thread_locks = [threading.Lock()
+                              for x in range(min(num_buckets, 64))]
+
+    def close(self):
+        """Closes the memory map and the file of the cache.  The cache
+        can't be used afterwards.
+        """
+        self._map.close()
+        self._file.close()
+
+    def _init_file(self, num_buckets, ways, slot_size):
+        bucket_size = self._bucket_header.size + ways * slot_size
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self._file_header_size +
+                     num_buckets * bucket_size)
+        os.lseek(self._fd, 0, 0)
+        os.write(self._fd, self._file_header.pack(self._magic, num_buckets,
+                                                  ways, slot_size))
+
+    def _locate(self, key):
+        key = force_bytes(key)
+        key_hash = struct.unpack('=Q', md5(key).digest()[:8])[0]
+        return key, key_hash, key_hash % self._num_buckets
+
+    def _bucket_offset(self, bucket):
+        return self._file_header_size + bucket * self._bucket_size
+
+    def _lock(self, bucket):
+        self._thread_locks[bucket % len(self._thread_locks)].acquire()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self._bucket_size,
+                    self._bucket_offset(bucket))
+
+    def _unlock(self, bucket):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, self._bucket_size,
+                    self._bucket_offset(bucket))
+        self._thread_locks[bucket % len(self._thread_locks)].release()
+
+    def _count(self, bucket, index):
+        offset = self._bucket_offset(bucket) + index * 8
+        value = struct.unpack_from('=Q', self._map, offset)[0]
+        struct.pack_into('=Q', self._map, offset, value + 1)
+
+    def _find(self, bucket, key, key_hash, now):
+        """Returns ``(offset, header)`` of the slot of the key, or the
+        slot that should be used for the key with `None` as header.  The
+        second return value tells if an item is evicted for the key.
+        """
+        offset = self._bucket_offset(bucket) + self._bucket_header.size
+        free = lru = None
+        for x in range(self._ways):
+            header = self._slot_header.unpack_from(self._map, offset)
+            flags, slot_hash, expires, last_access = header[:4]
+            if flags == self._EMPTY or expires <= now:
+                if free is None:
+                    free = offset
+            elif slot_hash == key_hash:
+                start = offset + self._slot_header.size
+                if self._map[start:start + header[4]] == key:
+                    return (offset, header), False
+            if flags != self._EMPTY and \
+               (lru is None or last_access < lru[1]):
+                lru = (offset, last_access)
+            offset += self._slot_size
+        if free is not None:
+            return (free, None), False
+        return (lru[0], None), True
+
+    def _read_value(self, offset, header):
+        flags, _, _, _, key_length, value_length = header
+        start = offset + self._slot_header.size + key_length
+        return flags, self._map[start:start + value_length]
+
+    def _load(self, flags, data):
+        if flags == self._INTEGER:
+            return self._int.unpack(data)[0]
+        return pickle.loads(data)
+
+    def _dump(self, value):
+        if type(value) in six.integer_types and \
+           -2 ** 63 <= value < 2 ** 63:
+            return self._INTEGER, self._int.pack(value)
+        return self._PICKLED, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _write(self, offset, flags, key, key_hash, expires, now, data):
+        self._slot_header.pack_into(self._map, offset, flags, key_hash,
+                                    expires, now, len(key), len(data))
+        start = offset + self._slot_header.size
+        self._map[start:start + len(key) + len(data)] = key + data
+
+    def get(self, key):
+        key, key_hash, bucket = self._locate(key)
+        now = time()
+        self._lock(bucket)
+        try:
+            (offset, header), _ = self._find(bucket, key, key_hash, now)
+            if header is None:
+                self._count(bucket, 1)
+                return None
+            self._count(bucket, 0)
+            struct.pack_into('=d', self._map, offset + 17, now)
+            flags, data = self._read_value(offset, header)
+        finally:
+            self._unlock(bucket)
+        return self._load(flags, data)
+
+    def _store(self, key, value, timeout, overwrite):
+        if timeout is None:
+            timeout = self.default_timeout
+        key, key_hash, bucket = self._locate(key)
+        flags, data = self._dump(value)
+        now = time()
+        fits = self._slot_header.size + len(key) + len(data) <= \
+            self._slot_size
+        self._lock(bucket)
+        try:
+            (offset, header), evict = self._find(bucket, key, key_hash, now)
+            if header is not None:
+                if not overwrite:
+                    return
+                if not fits:
+                    self._map[offset] = b'\x00'[0]
+                    return
+            elif not fits:
+                return
+            if evict:
+                self._count(bucket, 2)
+            self._write(offset, flags, key, key_hash, now + timeout, now,
+                        data)
+        finally:
+            self._unlock(bucket)
+
+    def set(self, key, value, timeout=None):
+        self._store(key, value, timeout, True)
+
+    def add(self, key, value, timeout=None):
+        self._store(key, value, timeout, False)
+
+    def delete(self, key):
+        key, key_hash, bucket = self._locate(key)
+        self._lock(bucket)
+        try:
+            (offset, header), _ = self._find(bucket, key, key_hash, time())
+            if header is not None:
+                self._map[offset] = b'\x00'[0]
+        finally:
+            self._unlock(bucket)
+
+    def clear(self):
+        for lock in self._thread_locks:
+            lock.acquire()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            empty = b'\x00' * self._bucket_size
+            for bucket in range(self._num_buckets):
+                offset = self._bucket_offset(bucket)
+                self._map[offset:offset + self._bucket_size] = empty
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+            for lock in self._thread_locks:
+                lock.release()
+
+    def inc(self, key, delta=1):
+        key, key_hash, bucket = self._locate(key)
+        now = time()
+        self._lock(bucket)
+        try:
+            (offset, header), evict = self._find(bucket, key, key_hash, now)
+            if header is not None:
+                value = self._load(*self._read_value(offset, header))
+                value = (value or 0) + delta
+                expires = header[2]
+            else:
+                value = delta
+                expires = now + self.default_timeout
+                if evict:
+                    self._count(bucket, 2)
+            flags, data = self._dump(value)
+            if self._slot_header.size + len(key) + len(data) <= \
+               self._slot_size:
+                self._write(offset, flags, key, key_hash, expires, now, data)
+            elif header is not None:
+                self._map[offset] = b'\x00'[0]
+        finally:
+            self._unlock(bucket)
+        return value
+
+    def dec(self, key, delta=1):
+        return self.inc(key, -delta)
+
+    def get_stats(self):
+        totals = [0, 0, 0]
+        for bucket in range(self._num_buckets):
+            counters = self._bucket_header.unpack_from(
+                self._map, self._bucket_offset(bucket))
+            for idx, value in enumerate(counters):
+                totals[idx] += value
+        return {
+            'hits':         totals[0],
+            'misses':       totals[1],
+            'evictions':    totals[2]
+        }
+
+
 _test_memcached_key = re.compile(r'[^\x00-\x21\xff]{1,250}$').match
 
 class MemcachedCache(BaseCache):
@@ -321,11 +950,15 @@ class MemcachedCache(BaseCache):
 
         self.key_prefix = key_prefix
 
-    def get(self, key):
-        if isinstance(key, unicode):
+    def _normalize_key(self, key):
+        if not six.PY3 and isinstance(key, six.text_type):
             key = key.encode('utf-8')
         if self.key_prefix:
             key = self.key_prefix + key
+        return key
+
+    def get(self, key):
+        key = self._normalize_key(key)
         # memcached doesn't support keys longer than that.  Because often
         # checks for so long keys can occour because it's tested from user
         # submitted data etc we fail silently for getting.
@@ -334,45 +967,25 @@ class MemcachedCache(BaseCache):
 
     def get_dict(self, *keys):
         key_mapping = {}
-        have_encoded_keys = False
         for key in keys:
-            if isinstance(key, unicode):
-                encoded_key = key.encode('utf-8')
-                have_encoded_keys = True
-            else:
-                encoded_key = key
-            if self.key_prefix:
-                encoded_key = self.key_prefix + encoded_key
-            if _test_memcached_key(key):
+            encoded_key = self._normalize_key(key)
+            if _test_memcached_key(encoded_key):
                 key_mapping[encoded_key] = key
-        d = rv = self._client.get_multi(key_mapping.keys())
-        if have_encoded_keys or self.key_prefix:
-            rv = {}
-            for key, value in d.iteritems():
-                rv[key_mapping[key]] = value
-        if len(rv) < len(keys):
-            for key in keys:
-                if key not in rv:
-                    rv[key] = None
+        d = self._client.get_multi(list(key_mapping))
+        rv = dict.fromkeys(keys)
+        for key, value in _items(d):
+            rv[key_mapping[key]] = value
         return rv
 
     def add(self, key, value, timeout=None):
         if timeout is None:
             timeout = self.default_timeout
-        if isinstance(key, unicode):
-            key = key.encode('utf-8')
-        if self.key_prefix:
-            key = self.key_prefix + key
-        self._client.add(key, value, timeout)
+        self._client.add(self._normalize_key(key), value, timeout)
 
     def set(self, key, value, timeout=None):
         if timeout is None:
             timeout = self.default_timeout
-        if isinstance(key, unicode):
-            key = key.encode('utf-8')
-        if self.key_prefix:
-            key = self.key_prefix + key
-        self._client.set(key, value, timeout)
+        self._client.set(self._normalize_key(key), value, timeout)
 
     def get_many(self, *keys):
         d = self.get_dict(*keys)
@@ -383,28 +996,18 @@ class MemcachedCache(BaseCache):
             timeout = self.default_timeout
         new_mapping = {}
         for key, value in _items(mapping):
-            if isinstance(key, unicode):
-                key = key.encode('utf-8')
-            if self.key_prefix:
-                key = self.key_prefix + key
-            new_mapping[key] = value
+            new_mapping[self._normalize_key(key)] = value
         self._client.set_multi(new_mapping, timeout)
 
     def delete(self, key):
-        if isinstance(key, unicode):
-            key = key.encode('utf-8')
-        if self.key_prefix:
-            key = self.key_prefix + key
+        key = self._normalize_key(key)
         if _test_memcached_key(key):
             self._client.delete(key)
 
     def delete_many(self, *keys):
         new_keys = []
         for key in keys:
-            if isinstance(key, unicode):
-                key = key.encode('utf-8')
-            if self.key_prefix:
-                key = self.key_prefix + key
+            key = self._normalize_key(key)
             if _test_memcached_key(key):
                 new_keys.append(key)
         self._client.delete_multi(new_keys)
@@ -413,18 +1016,13 @@ class MemcachedCache(BaseCache):
         self._client.flush_all()
 
     def inc(self, key, delta=1):
-        if isinstance(key, unicode):
-            key = key.encode('utf-8')
-        if self.key_prefix:
-            key = self.key_prefix + key
-        self._client.incr(key, delta)
+        return self._client.incr(self._normalize_key(key), delta)
 
     def dec(self, key, delta=1):
-        if isinstance(key, unicode):
-            key = key.encode('utf-8')
-        if self.key_prefix:
-            key = self.key_prefix + key
-        self._client.decr(key, delta)
+        return self._client.decr(self._normalize_key(key), delta)
+
+    def pipeline(self):
+        return MemcachedPipeline(self)
 
     def import_preferred_memcache_lib(self, servers):
         """Returns an initialized memcache client.  Used by the constructor."""
@@ -487,7 +1085,7 @@ class RedisCache(BaseCache):
     def __init__(self, host='localhost', port=6379, password=None,
                  db=0, default_timeout=300, key_prefix=None):
         BaseCache.__init__(self, default_timeout)
-        if isinstance(host, basestring):
+        if isinstance(host, six.string_types):
             try:
                 import redis
             except ImportError:
@@ -501,10 +1099,9 @@ class RedisCache(BaseCache):
         """Dumps an object into a string for redis.  By default it serializes
         integers as regular string and pickle dumps everything else.
         """
-        t = type(value)
-        if t is int or t is long:
+        if type(value) in six.integer_types:
             return str(value)
-        return '!' + pickle.dumps(value)
+        return b'!' + pickle.dumps(value)
 
     def load_object(self, value):
         """The reversal of :meth:`dump_object`.  This might be callde with
@@ -512,7 +1109,7 @@ class RedisCache(BaseCache):
         """
         if value is None:
             return None
-        if value.startswith('!'):
+        if value.startswith(b'!'):
             return pickle.loads(value[1:])
         try:
             return int(value)
@@ -575,6 +1172,141 @@ class RedisCache(BaseCache):
     def dec(self, key, delta=1):
         return self._client.decr(self.key_prefix + key, delta)
 
+    def pipeline(self):
+        return RedisPipeline(self)
+
+
+def _set_args(key, value, timeout=None):
+    return key, value, timeout
+
+
+class MemcachedPipeline(CachePipeline):
+    """The pipeline of :class:`MemcachedCache`.  Consecutive calls of
+    :meth:`~BaseCache.get`, of :meth:`~BaseCache.delete` and of
+    :meth:`~BaseCache.set` with the same timeout are combined into one
+    request with the ``*_multi`` methods of the client.
+
+    .. versionadded:: 0.9
+    """
+
+    def _execute(self, operations):
+        results = []
+        idx = 0
+        while idx < len(operations):
+            name, args, kwargs = operations[idx]
+            end = idx + 1
+            if name == 'set':
+                timeout = _set_args(*args, **kwargs)[2]
+                while end < len(operations) and \
+                      operations[end][0] == 'set' and \
+                      _set_args(*operations[end][1],
+                                **operations[end][2])[2] == timeout:
+                    end += 1
+            elif name in ('get', 'delete'):
+                while end < len(operations) and operations[end][0] == name:
+                    end += 1
+            if end - idx == 1:
+                results.append(getattr(self.cache, name)(*args, **kwargs))
+            elif name == 'get':
+                keys = [operations[x][1][0] for x in range(idx, end)]
+                d = self.cache.get_dict(*keys)
+                results.extend(d[key] for key in keys)
+            elif name == 'delete':
+                self.cache.delete_many(*[operations[x][1][0]
+                                         for x in range(idx, end)])
+                results.extend([None] * (end - idx))
+            else:
+                mapping = {}
+                for x in range(idx, end):
+                    key, value, _ = _set_args(*operations[x][1],
+                                              **operations[x][2])
+                    mapping[key] = value
+                self.cache.set_many(mapping, timeout)
+                results.extend([None] * (end - idx))
+            idx = end
+        return results
+
+
+class RedisPipeline(CachePipeline):
+    """The pipeline of :class:`RedisCache`.  The operations are sent in
+    one round trip as a Redis transaction (``MULTI``/``EXEC``).  Only
+    :meth:`~BaseCache.add` needs the result of a command to decide about
+    the next one, it's executed on its own between the transactions.
+
+    .. versionadded:: 0.9
+    """
+
+    def _execute(self, operations):
+        results = []
+        pipe = None
+        callbacks = []
+        for name, args, kwargs in operations:
+            queue = getattr(self, '_queue_' + name, None)
+            if queue is None:
+                if pipe is not None:
+                    results.extend(self._flush(pipe, callbacks))
+                    pipe = None
+                results.append(getattr(self.cache, name)(*args, **kwargs))
+                continue
+            if pipe is None:
+                pipe = self.cache._client.pipeline()
+                callbacks = []
+            callbacks.append(queue(pipe, *args, **kwargs))
+        if pipe is not None:
+            results.extend(self._flush(pipe, callbacks))
+        return results
+
+    def _flush(self, pipe, callbacks):
+        raw_results = pipe.execute()
+        results = []
+        offset = 0
+        for count, callback in callbacks:
+            results.append(callback(raw_results[offset:offset + count]))
+            offset += count
+        return results
+
+    def _queue_get(self, pipe, key):
+        pipe.get(self.cache.key_prefix + key)
+        return 1, lambda rv: self.cache.load_object(rv[0])
+
+    def _queue_get_many(self, pipe, *keys):
+        pipe.mget([self.cache.key_prefix + key for key in keys])
+        return 1, lambda rv: [self.cache.load_object(x) for x in rv[0]]
+
+    def _queue_get_dict(self, pipe, *keys):
+        count, callback = self._queue_get_many(pipe, *keys)
+        return count, lambda rv: dict(izip(keys, callback(rv)))
+
+    def _queue_set(self, pipe, key, value, timeout=None):
+        return self._queue_set_many(pipe, {key: value}, timeout)
+
+    def _queue_set_many(self, pipe, mapping, timeout=None):
+        if timeout is None:
+            timeout = self.cache.default_timeout
+        count = 0
+        for key, value in _items(mapping):
+            pipe.setex(self.cache.key_prefix + key,
+                       self.cache.dump_object(value), timeout)
+            count += 1
+        return count, lambda rv: None
+
+    def _queue_delete(self, pipe, key):
+        return self._queue_delete_many(pipe, key)
+
+    def _queue_delete_many(self, pipe, *keys):
+        if not keys:
+            return 0, lambda rv: None
+        pipe.delete(*[self.cache.key_prefix + key for key in keys])
+        return 1, lambda rv: None
+
+    def _queue_inc(self, pipe, key, delta=1):
+        pipe.incr(self.cache.key_prefix + key, delta)
+        return 1, lambda rv: rv[0]
+
+    def _queue_dec(self, pipe, key, delta=1):
+        pipe.decr(self.cache.key_prefix + key, delta)
+        return 1, lambda rv: rv[0]
+
 
 class FileSystemCache(BaseCache):
     """A cache that stores the items on the file system.  This cache depends
@@ -582,6 +1314,19 @@ class FileSystemCache(BaseCache):
     nobody but this cache stores files there or otherwise the cache will
     randomly delete files therein.
 
+    The files are spread over up to 256 subdirectories, named after the
+    first two characters of the hashed key.  Each file starts with a
+    small binary header with the expiration time, which is also stored as
+    the modification time of the file, so pruning only has to look at the
+    directory entries.  Pruning happens after every tenth of `threshold`
+    writes, so the cache can temporarily hold a few more items than
+    `threshold`.  It removes the expired items and, if that's not
+    enough, the items that would expire first.
+
+    .. versionchanged:: 0.9
+       Files are stored in subdirectories with a binary header.  Files
+       written by older versions are treated as expired.
+
     :param cache_dir: the directory where cache files are stored.
     :param threshold: the maximum number of items the cache stores before
                       it starts deleting some.
@@ -593,43 +1338,60 @@ class FileSystemCache(BaseCache):
     #: used for temporary files by the FileSystemCache
     _fs_transaction_suffix = '.__wz_cache'
 
+    # magic and expiration time at the start of every cache file
+    _fs_header = struct.Struct('=4sd')
+    _fs_magic = b'wzc1'
+
     def __init__(self, cache_dir, threshold=500, default_timeout=300, mode=384):
         # mode=0600 in octal
         BaseCache.__init__(self, default_timeout)
         self._path = cache_dir
         self._threshold = threshold
         self._mode = mode
+        self._prune_interval = max(1, threshold // 10)
+        self._writes = 0
         if not os.path.exists(self._path):
             os.makedirs(self._path)
 
     def _list_dir(self):
         """return a list of (fully qualified) cache filenames
         """
-        return [os.path.join(self._path, fn) for fn in os.listdir(self._path)
-                if not fn.endswith(self._fs_transaction_suffix)]
+        rv = []
+        for fn in os.listdir(self._path):
+            path = os.path.join(self._path, fn)
+            if len(fn) == 2 and os.path.isdir(path):
+                rv.extend(os.path.join(path, x) for x in os.listdir(path)
+                          if not x.endswith(self._fs_transaction_suffix))
+            elif not fn.endswith(self._fs_transaction_suffix):
+                # files of older versions without subdirectories
+                rv.append(path)
+        return rv
 
     def _prune(self):
-        entries = self._list_dir()
+        now = time()
+        entries = []
+        for fname in self._list_dir():
+            try:
+                expires = os.stat(fname).st_mtime
+                if expires <= now:
+                    os.remove(fname)
+                else:
+                    entries.append((expires, fname))
+            except (IOError, OSError):
+                pass
         if len(entries) > self._threshold:
-            now = time()
-            for idx, fname in enumerate(entries):
-                remove = False
-                f = None
+            entries.sort()
+            for expires, fname in entries[:len(entries) - self._threshold]:
                 try:
-                    try:
-                        f = open(fname, 'rb')
-                        expires = pickle.load(f)
-                        remove = expires <= now or idx % 3 == 0
-                    finally:
-                        if f is not None:
-                            f.close()
-                except Exception:
+                    os.remove(fname)
+                except (IOError, OSError):
                     pass
-                if remove:
-                    try:
-                        os.remove(fname)
-                    except (IOError, OSError):
-                        pass
+
+    def _count_writes(self, count):
+        self._writes += count
+        if self._writes >= self._prune_interval:
+            self._writes = 0
+            self._prune()
 
     def clear(self):
         for fname in self._list_dir():
@@ -640,14 +1402,15 @@ class FileSystemCache(BaseCache):
 
     def _get_filename(self, key):
         hash = md5(force_bytes(key)).hexdigest()
-        return os.path.join(self._path, hash)
+        return os.path.join(self._path, hash[:2], hash)
 
-    def get(self, key):
-        filename = self._get_filename(key)
+    def _read(self, filename, now):
         try:
             f = open(filename, 'rb')
             try:
-                if pickle.load(f) >= time():
+                magic, expires = self._fs_header.unpack(
+                    f.read(self._fs_header.size))
+                if magic == self._fs_magic and expires >= now:
                     return pickle.load(f)
             finally:
                 f.close()
@@ -655,30 +1418,59 @@ class FileSystemCache(BaseCache):
         except Exception:
             return None
 
-    def add(self, key, value, timeout=None):
-        filename = self._get_filename(key)
-        if not os.path.exists(filename):
-            self.set(key, value, timeout)
-
-    def set(self, key, value, timeout=None):
-        if timeout is None:
-            timeout = self.default_timeout
-        filename = self._get_filename(key)
-        self._prune()
+    def _write(self, filename, value, expires):
         try:
-            fd, tmp = tempfile.mkstemp(suffix=self._fs_transaction_suffix,
-                                       dir=self._path)
+            try:
+                fd, tmp = tempfile.mkstemp(suffix=self._fs_transaction_suffix,
+                                           dir=os.path.dirname(filename))
+            except OSError:
+                try:
+                    os.makedirs(os.path.dirname(filename))
+                except OSError:
+                    # created by another process in the meantime
+                    pass
+                fd, tmp = tempfile.mkstemp(suffix=self._fs_transaction_suffix,
+                                           dir=os.path.dirname(filename))
             f = os.fdopen(fd, 'wb')
             try:
-                pickle.dump(int(time() + timeout), f, 1)
+                f.write(self._fs_header.pack(self._fs_magic, expires))
                 pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
             finally:
                 f.close()
+            os.utime(tmp, (expires, expires))
             rename(tmp, filename)
             os.chmod(filename, self._mode)
         except (IOError, OSError):
             pass
 
+    def get(self, key):
+        return self._read(self._get_filename(key), time())
+
+    def get_many(self, *keys):
+        now = time()
+        return [self._read(self._get_filename(key), now) for key in keys]
+
+    def add(self, key, value, timeout=None):
+        filename = self._get_filename(key)
+        if not os.path.exists(filename):
+            self.set(key, value, timeout)
+
+    def set(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = self.default_timeout
+        self._write(self._get_filename(key), value, time() + timeout)
+        self._count_writes(1)
+
+    def set_many(self, mapping, timeout=None):
+        if timeout is None:
+            timeout = self.default_timeout
+        expires = time() + timeout
+        count = 0
+        for key, value in _items(mapping):
+            self._write(self._get_filename(key), value, expires)
+            count += 1
+        self._count_writes(count)
+
     def delete(self, key):
         try:
             os.remove(self._get_filename(key))
@@ -832,12 +832,28 @@ class Headers(object):
     object that uses as internal storage the list or list-like object you
     can use the :meth:`linked` class method.
 
+    Lookups by key use an index of the lowercase header names which is
+    created on the first lookup and updated as headers are added.  Headers
+    that are linked to a list use no index because the list might be
+    changed from the outside.
+
+    .. versionchanged:: 0.9
+       Lookups by key are no longer linear in the number of headers.
+
     :param defaults: The list of default values for the :class:`Headers`.
     """
 
+    #: a dict of lowercase header names to the positions of the headers
+    #: in the list or `None` if it has to be created.
+    _index = None
+
+    #: `True` if lookups may use the index.
+    _indexed = False
+
     def __init__(self, defaults=None, _list=None):
         if _list is None:
             _list = []
+            self._indexed = True
         self._list = _list
         if defaults is not None:
             if isinstance(defaults, (list, Headers)):
@@ -861,6 +877,23 @@ class Headers(object):
         """
         return cls(_list=headerlist)
 
+    def _get_index(self):
+        """Returns the index of the header names or `None` if the headers
+        are not indexed.
+        """
+        if not self._indexed:
+            return None
+        index = self._index
+        if index is None:
+            index = self._index = {}
+            for idx, (key, _) in enumerate(self._list):
+                ikey = key.lower()
+                if ikey in index:
+                    index[ikey].append(idx)
+                else:
+                    index[ikey] = [idx]
+        return index
+
     def __getitem__(self, key, _get_mode=False):
         if not _get_mode:
             if isinstance(key, six.integer_types):
@@ -868,9 +901,14 @@ class Headers(object):
             elif isinstance(key, slice):
                 return self.__class__(self._list[key])
         ikey = key.lower()
-        for k, v in self._list:
-            if k.lower() == ikey:
-                return v
+        index = self._get_index()
+        if index is not None:
+            if ikey in index:
+                return self._list[index[ikey][0]][1]
+        else:
+            for k, v in self._list:
+                if k.lower() == ikey:
+                    return v
         # micro optimization: if we are in get mode we will catch that
         # exception one stack level down so we can raise a standard
         # key error instead of our special one.
@@ -931,15 +969,19 @@ class Headers(object):
         :return: a :class:`list` of all the values for the key.
         """
         ikey = key.lower()
+        index = self._get_index()
+        if index is not None:
+            values = [self._list[idx][1] for idx in index.get(ikey, ())]
+        else:
+            values = [v for k, v in self if k.lower() == ikey]
+        if type is None:
+            return values
         result = []
-        for k, v in self:
-            if k.lower() == ikey:
-                if type is not None:
-                    try:
-                        v = type(v)
-                    except ValueError:
-                        continue
-                result.append(v)
+        for v in values:
+            try:
+                result.append(type(v))
+            except ValueError:
+                continue
         return result
 
     def get_all(self, name):
@@ -992,13 +1034,18 @@ class Headers(object):
     def __delitem__(self, key, _index_operation=True):
         if _index_operation and isinstance(key, (slice,) + six.integer_types):
             del self._list[key]
+            self._index = None
             return
         key = key.lower()
+        index = self._get_index()
+        if index is not None and key not in index:
+            return
         new = []
         for k, v in self._list:
             if k.lower() != key:
                 new.append((k, v))
         self._list[:] = new
+        self._index = None
 
     def remove(self, key):
         """Remove a key.
@@ -1017,8 +1064,10 @@ class Headers(object):
         :return: an item.
         """
         if key is None:
+            self._index = None
             return self._list.pop()
         if isinstance(key, six.integer_types):
+            self._index = None
             return self._list.pop(key)
         try:
             rv = self[key]
@@ -1035,6 +1084,9 @@ class Headers(object):
 
     def __contains__(self, key):
         """Check if a key is present."""
+        index = self._get_index()
+        if index is not None:
+            return key.lower() in index
         try:
             self.__getitem__(key, _get_mode=True)
         except KeyError:
@@ -1069,6 +1121,13 @@ class Headers(object):
         if kw:
             _value = _options_header_vkw(_value, kw)
         self._validate_value(_value)
+        index = self._index
+        if index is not None:
+            ikey = _key.lower()
+            if ikey in index:
+                index[ikey].append(len(self._list))
+            else:
+                index[ikey] = [len(self._list)]
         self._list.append((_key, _value))
 
     def _validate_value(self, value):
@@ -1087,6 +1146,7 @@ class Headers(object):
     def clear(self):
         """Clears all headers."""
         del self._list[:]
+        self._index = None
 
     def set(self, _key, _value, **kw):
         """Remove all header tuples for `key` and add a new one.  The newly
@@ -1106,6 +1166,18 @@ class Headers(object):
         if kw:
             _value = _options_header_vkw(_value, kw)
         self._validate_value(_value)
+        index = self._get_index()
+        if index is not None:
+            ikey = _key.lower()
+            positions = index.get(ikey)
+            if positions is None:
+                index[ikey] = [len(self._list)]
+                self._list.append((_key, _value))
+                return
+            if len(positions) == 1:
+                self._list[positions[0]] = (_key, _value)
+                return
+            self._index = None
         if not self._list:
             self._list.append((_key, _value))
             return
@@ -1139,6 +1211,7 @@ class Headers(object):
         if isinstance(key, (slice,) + six.integer_types):
             self._validate_value(value)
             self._list[key] = value
+            self._index = None
         else:
             self.set(key, value)
 
@@ -1211,6 +1284,10 @@ class ImmutableHeadersMixin(object):
         is_immutable(self)
 
 
+#: cache of header names to WSGI environment keys for :class:`EnvironHeaders`.
+_environ_key_cache = {}
+
+
 class EnvironHeaders(ImmutableHeadersMixin, Headers):
     """Read only version of the headers from a WSGI environment.  This
     provides the same interface as `Headers` and is constructed from
@@ -1220,8 +1297,22 @@ class EnvironHeaders(ImmutableHeadersMixin, Headers):
     subclass of the :exc:`~exceptions.BadRequest` HTTP exception and will
     render a page for a ``400 BAD REQUEST`` if caught in a catch-all for
     HTTP exceptions.
+
+    The names of the headers in the environment are collected when they are
+    first needed and reused until keys are added to or removed from the
+    environment.
+
+    .. versionchanged:: 0.9
+       Iterating over the headers no longer scans the whole environment
+       every time.
     """
 
+    #: a list of ``(environ_key, header_name)`` tuples or `None`
+    _headers = None
+
+    #: the keys of the environment the headers were collected from.
+    _environ_keys = None
+
     def __init__(self, environ):
         self.environ = environ
 
@@ -1236,23 +1327,45 @@ class EnvironHeaders(ImmutableHeadersMixin, Headers):
     def __getitem__(self, key, _get_mode=False):
         # _get_mode is a no-op for this class as there is no index but
         # used because get() calls it.
-        key = key.upper().replace('-', '_')
-        if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
-            return self.environ[key]
-        return self.environ['HTTP_' + key]
+        environ_key = _environ_key_cache.get(key)
+        if environ_key is None:
+            environ_key = key.upper().replace('-', '_')
+            if environ_key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ_key = 'HTTP_' + environ_key
+            if len(_environ_key_cache) >= 512:
+                _environ_key_cache.clear()
+            _environ_key_cache[key] = environ_key
+        return self.environ[environ_key]
+
+    def _get_headers(self):
+        """Returns the ``(environ_key, header_name)`` tuples of the headers
+        in the environment.
+        """
+        environ = self.environ
+        try:
+            keys = six.viewkeys(environ)
+        except AttributeError:
+            keys = frozenset(environ)
+        if self._headers is not None and keys == self._environ_keys:
+            return self._headers
+        headers = []
+        for key in environ:
+            if key.startswith('HTTP_') and key not in \
+               ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+                headers.append((key, key[5:].replace('_', '-').title()))
+            elif key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                headers.append((key, key.replace('_', '-').title()))
+        self._environ_keys = frozenset(environ)
+        self._headers = headers
+        return headers
 
     def __len__(self):
-        # the iter is necessary because otherwise list calls our
-        # len which would call list again and so forth.
-        return len(list(iter(self)))
+        return len(self._get_headers())
 
     def __iter__(self):
-        for key, value in six.iteritems(self.environ):
-            if key.startswith('HTTP_') and key not in \
-               ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
-                yield key[5:].replace('_', '-').title(), value
-            elif key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
-                yield key.replace('_', '-').title(), value
+        environ = self.environ
+        for key, name in self._get_headers():
+            yield name, environ[key]
 
     def copy(self):
         raise TypeError('cannot create %r copies' % self.__class__.__name__)
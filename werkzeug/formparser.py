@@ -10,24 +10,21 @@
     :license: BSD, see LICENSE for more details.
 """
 import base64
+import binascii
 import re
 from io import BytesIO
 import six
 from tempfile import TemporaryFile
-from itertools import chain, repeat
 from functools import update_wrapper
 
 from werkzeug._internal import _decode_unicode, _empty_stream, force_bytes, force_str
 from werkzeug.urls import url_decode_stream
-from werkzeug.wsgi import LimitedStream, make_line_iter
+from werkzeug.wsgi import LimitedStream, make_chunk_iter_func
 from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.datastructures import Headers, FileStorage, MultiDict
 from werkzeug.http import parse_options_header
 
 
-#: an iterator that yields empty strings
-_empty_string_iter = repeat('')
-
 #: a regular expression for multipart boundaries
 _multipart_boundary_re = re.compile('^[ -~]{0,200}[!-~]$')
 
@@ -35,6 +32,9 @@ _multipart_boundary_re = re.compile('^[ -~]{0,200}[!-~]$')
 #: for multipart messages.
 _supported_multipart_encodings = frozenset(['base64', 'quoted-printable'])
 
+#: the states of the multipart scanner
+_PREAMBLE, _PART_HEADERS, _PART_DATA, _EPILOGUE = range(4)
+
 
 def default_stream_factory(total_content_length, filename, content_type,
                            content_length=None):
@@ -147,6 +147,12 @@ class FormDataParser(object):
         self.cls = cls
         self.silent = silent
 
+    #: the class used to parse multipart data.  If this is `None` the
+    #: :class:`MultiPartParser` is used.
+    #:
+    #: .. versionadded:: 0.9
+    multipart_parser_class = None
+
     def get_parse_func(self, mimetype, options):
         return self.parse_functions.get(mimetype)
 
@@ -195,9 +201,10 @@ class FormDataParser(object):
 
     @exhaust_stream
     def _parse_multipart(self, stream, mimetype, content_length, options):
-        parser = MultiPartParser(self.stream_factory, self.charset, self.errors,
-                                 max_form_memory_size=self.max_form_memory_size,
-                                 cls=self.cls)
+        parser_class = self.multipart_parser_class or MultiPartParser
+        parser = parser_class(self.stream_factory, self.charset, self.errors,
+                              max_form_memory_size=self.max_form_memory_size,
+                              cls=self.cls)
         form, files = parser.parse(stream, options.get('boundary'),
                                    content_length)
         return _empty_stream, form, files
@@ -266,15 +273,231 @@ def parse_multipart_headers(iterable):
     return Headers.linked(result)
 
 
+class MultiPartDecoder(object):
+    """An incremental parser for multipart bodies.  Unlike the
+    :class:`MultiPartParser` it does not read from a stream but the data
+    is pushed into it with :meth:`feed` in chunks of any size.  Each call
+    returns a list of events in the form ``(event, value)``:
+
+    ``'headers'``
+        a new part starts, the value is a :class:`Headers` object with the
+        headers of the part.
+    ``'data'``
+        the value is a string with data of the current part.  The data of
+        a part is usually split into multiple events.
+    ``'end'``
+        the current part ended, the value is `None`.
+
+    Nothing is buffered besides the headers of a part and a few bytes that
+    might be the start of the next boundary, so this can be used to pipe
+    uploads into any kind of sink without storing them first::
+
+        decoder = MultiPartDecoder(boundary)
+        while not decoder.complete:
+            chunk = stream.read(65536)
+            if chunk:
+                events = decoder.feed(chunk)
+            else:
+                events = decoder.close()
+            for event, value in events:
+                if event == 'headers':
+                    checksum = hashlib.sha1()
+                elif event == 'data':
+                    checksum.update(value)
+            if not chunk:
+                break
+
+    Once all the data was passed, :meth:`close` has to be called which
+    returns the remaining events.  Malformed data raises a
+    :exc:`ValueError`.  Transfer encodings are not decoded.
+
+    .. versionadded:: 0.9
+
+    :param boundary: the boundary of the multipart body.
+    """
+
+    def __init__(self, boundary):
+        boundary = force_bytes(boundary)
+        self.next_part = b'--' + boundary
+        self.last_part = self.next_part + b'--'
+        self.state = _PREAMBLE
+        self.buffer = bytearray()
+        self.header_lines = []
+        # the position to continue the boundary search from and if the
+        # start of the buffer is the start of the part's data.
+        self.search_from = 0
+        self.part_start = True
+
+    @property
+    def complete(self):
+        """`True` if the final boundary was found.  Data after it is
+        ignored.
+        """
+        return self.state == _EPILOGUE
+
+    def fail(self, message):
+        raise ValueError(message)
+
+    def feed(self, data):
+        """Processes a chunk of data and returns a list of events."""
+        if self.state == _EPILOGUE:
+            return []
+        self.buffer.extend(data)
+        return self._process(False)
+
+    def close(self):
+        """Signals the end of the data.  Returns the remaining events and
+        fails if the data ended before the final boundary.
+        """
+        events = self._process(True)
+        if self.state == _PREAMBLE:
+            self.fail('Expected boundary at start of multipart data')
+        elif self.state == _PART_HEADERS:
+            self.fail('unexpected end of line in multipart header')
+        elif self.state == _PART_DATA:
+            self.fail('unexpected end of stream')
+        return events
+
+    def _find_line_end(self, pos, final):
+        """Returns the position after the next newline (``\\r\\n``,
+        ``\\r`` or ``\\n``) or -1 if more data is needed to tell.
+        """
+        buf = self.buffer
+        cr = buf.find(b'\r', pos)
+        lf = buf.find(b'\n', pos)
+        if lf != -1 and (cr == -1 or lf < cr):
+            return lf + 1
+        if cr != -1:
+            if cr + 1 < len(buf):
+                return buf[cr + 1:cr + 2] == b'\n' and cr + 2 or cr + 1
+            return final and cr + 1 or -1
+        if final and pos < len(buf):
+            return len(buf)
+        return -1
+
+    def _take(self, end):
+        rv = bytes(self.buffer[:end])
+        del self.buffer[:end]
+        return rv
+
+    def _process(self, final):
+        events = []
+        buf = self.buffer
+        while 1:
+            if self.state == _PREAMBLE:
+                end = self._find_line_end(0, final)
+                if end == -1:
+                    break
+                # there might be some additional newlines before the first
+                # boundary.  At least the python setuptools package sends
+                # some before headers.
+                line = self._take(end).strip()
+                if not line:
+                    continue
+                if line != self.next_part:
+                    self.fail('Expected boundary at start of multipart data')
+                self.state = _PART_HEADERS
+
+            elif self.state == _PART_HEADERS:
+                end = self._find_line_end(0, final)
+                if end == -1:
+                    break
+                line = self._take(end)
+                self.header_lines.append(line)
+                if _line_parse(line)[0]:
+                    continue
+                events.append(('headers',
+                               parse_multipart_headers(self.header_lines)))
+                self.header_lines = []
+                self.state = _PART_DATA
+                self.search_from = 0
+                self.part_start = True
+
+            elif self.state == _PART_DATA:
+                idx = buf.find(self.next_part, self.search_from)
+                if idx == -1:
+                    # no boundary in the buffer.  Everything except the
+                    # start of a boundary at the end of the buffer and the
+                    # newline before it can be passed on.
+                    self._emit_data(events, max(self.search_from, len(buf) -
+                                                len(self.next_part) + 1))
+                    break
+
+                # the boundary has to be at the start of a line
+                if idx == 0:
+                    at_line_start = self.part_start
+                else:
+                    at_line_start = buf[idx - 1:idx] in (b'\r', b'\n')
+                if not at_line_start:
+                    self.search_from = idx + 1
+                    continue
+
+                end = self._find_line_end(idx + len(self.next_part), final)
+                if end == -1:
+                    self._emit_data(events, idx)
+                    break
+                terminator = bytes(buf[idx:end]).rstrip()
+                if terminator not in (self.next_part, self.last_part):
+                    self.search_from = idx + 1
+                    continue
+
+                # the newline in front of the boundary belongs to the
+                # boundary and not to the data.
+                if idx == 0:
+                    data_end = 0
+                elif buf[idx - 2:idx] == b'\r\n':
+                    data_end = idx - 2
+                else:
+                    data_end = idx - 1
+                if data_end > 0:
+                    events.append(('data', self._take(data_end)))
+                del buf[:end - data_end]
+                events.append(('end', None))
+                if terminator == self.last_part:
+                    self.state = _EPILOGUE
+                else:
+                    self.state = _PART_HEADERS
+
+            else:
+                del buf[:]
+                break
+        return events
+
+    def _emit_data(self, events, pos):
+        """Passes on the data in front of the position where the boundary
+        search continues, except for the two bytes in front of it that
+        might be a newline before the boundary.
+        """
+        end = pos - 2
+        if end > 0:
+            events.append(('data', self._take(end)))
+            self.part_start = False
+            pos -= end
+        self.search_from = pos
+
+
 class MultiPartParser(object):
+    """Parses multipart form data from a stream into a form and a files
+    multi dict.  The parts are split by a :class:`MultiPartDecoder` and
+    the parser is notified about them with :meth:`on_part_begin`,
+    :meth:`on_part_data` and :meth:`on_part_end`.  Subclasses can override
+    these to handle the parts in a different way, for example to stream
+    uploads to another destination instead of storing them.  Such a
+    subclass can be used for requests by setting it as
+    :attr:`FormDataParser.multipart_parser_class`.
+
+    .. versionchanged:: 0.9
+       The part callbacks were added.
+    """
+
     def __init__(self, stream_factory=None, charset='utf-8', errors='replace',
                  max_form_memory_size=None, cls=None, buffer_size=10 * 1024):
+        if stream_factory is None:
+            stream_factory = default_stream_factory
         self.stream_factory = stream_factory
         self.charset = charset
         self.errors = errors
         self.max_form_memory_size = max_form_memory_size
-        if stream_factory is None:
-            stream_factory = default_stream_factory
         if cls is None:
             cls = MultiDict
         self.cls = cls
@@ -297,19 +520,6 @@ class MultiPartParser(object):
             return filename.split('\\')[-1]
         return filename
 
-    def _find_terminator(self, iterator):
-        """The terminator might have some additional newlines before it.
-        There is at least one application that sends additional newlines
-        before headers (the python setuptools package).
-        """
-        for line in iterator:
-            if not line:
-                break
-            line = line.strip()
-            if line:
-                return line
-        return ''
-
     def fail(self, message):
         raise ValueError(message)
 
@@ -354,116 +564,123 @@ class MultiPartParser(object):
             # the assert is skipped.
             self.fail('Boundary longer than buffer size')
 
-    def parse(self, file, boundary, content_length):
-        boundary = force_bytes(boundary)
-        next_part = b'--' + boundary
-        last_part = next_part + b'--'
+    def on_part_begin(self, headers):
+        """Called with the headers of every part when it starts."""
+        disposition = headers.get('content-disposition')
+        if disposition is None:
+            self.fail('Missing Content-Disposition header')
+        disposition, extra = parse_options_header(disposition)
+        self._part_headers = headers
+        self._part_name = extra.get('name')
+        self._part_filename = filename = extra.get('filename')
+        self._part_charset = self.get_part_charset(headers)
+
+        # if no content type is given we stream into memory.  A list is
+        # used as a temporary container.
+        if filename is None:
+            container = []
+            self._part_write = container.append
+            self._guard_memory = self.max_form_memory_size is not None
+
+        # otherwise we parse the rest of the headers and ask the stream
+        # factory for something we can write in.
+        else:
+            self._guard_memory = False
+            self._part_filename, container = self.start_file_streaming(
+                filename, headers, self._content_length)
+            self._part_write = container.write
+        self._part_container = container
+
+        # transfer encoded parts are decoded chunk by chunk, the bytes that
+        # cannot be decoded yet are kept until the next chunk arrives.
+        self._part_encoding = self.get_part_encoding(headers)
+        self._part_tail = b''
+
+    def _decode_part_data(self, data, final):
+        data = self._part_tail + data
+        if self._part_encoding == 'base64':
+            # base64 is decoded in groups of four characters, whitespace
+            # does not count.
+            data = b''.join(data.split())
+            end = len(data)
+            if not final:
+                end -= end % 4
+            decode = base64.b64decode
+        else:
+            # do not split an escape or soft line break of quoted
+            # printable data.
+            end = len(data)
+            if not final:
+                pos = data.rfind(b'=', -2)
+                if pos != -1:
+                    end = pos
+            decode = binascii.a2b_qp
+        self._part_tail = data[end:]
+        try:
+            return decode(data[:end])
+        except Exception:
+            self.fail('could not decode transfer encoded chunk')
 
-        form = []
-        files = []
-        in_memory = 0
+    def on_part_data(self, data):
+        """Called with the data of the current part.  The data of a part
+        is usually passed in multiple calls.
+        """
+        if self._part_encoding is not None:
+            data = self._decode_part_data(data, False)
+        self._part_write(data)
+
+        # if we write into memory and there is a memory size limit we
+        # count the number of bytes in memory and raise an exception if
+        # there is too much data in memory.
+        if self._guard_memory:
+            self._in_memory += len(data)
+            if self._in_memory > self.max_form_memory_size:
+                self.in_memory_threshold_reached(self._in_memory)
+
+    def on_part_end(self):
+        """Called when the current part ended."""
+        if self._part_encoding is not None:
+            self._part_write(self._decode_part_data(b'', True))
+
+        container = self._part_container
+        name = self._part_name
+        if self._part_filename is not None:
+            container.seek(0)
+            self._files.append((name, FileStorage(
+                container, self._part_filename, name,
+                headers=self._part_headers)))
+        else:
+            self._form.append((name, _decode_unicode(
+                b''.join(container), self._part_charset, self.errors)))
 
-        iterator = chain(make_line_iter(file, limit=content_length,
-                                        buffer_size=self.buffer_size),
-                         _empty_string_iter)
+    def parse(self, file, boundary, content_length):
+        self._form = []
+        self._files = []
+        self._in_memory = 0
+        self._content_length = content_length
 
-        terminator = self._find_terminator(iterator)
-        if terminator != next_part:
-            self.fail('Expected boundary at start of multipart data')
+        decoder = MultiPartDecoder(boundary)
+        _read = make_chunk_iter_func(file, content_length, self.buffer_size)
 
-        while terminator != last_part:
-            headers = parse_multipart_headers(iterator)
-
-            disposition = headers.get('content-disposition')
-            if disposition is None:
-                self.fail('Missing Content-Disposition header')
-            disposition, extra = parse_options_header(disposition)
-            transfer_encoding = self.get_part_encoding(headers)
-            name = extra.get('name')
-            filename = extra.get('filename')
-            part_charset = self.get_part_charset(headers)
-
-            # if no content type is given we stream into memory.  A list is
-            # used as a temporary container.
-            if filename is None:
-                is_file = False
-                container = []
-                _write = container.append
-                guard_memory = self.max_form_memory_size is not None
-
-            # otherwise we parse the rest of the headers and ask the stream
-            # factory for something we can write in.
-            else:
-                is_file = True
-                guard_memory = False
-                filename, container = self.start_file_streaming(
-                    filename, headers, content_length)
-                _write = container.write
-
-            buf = b''
-            for line in iterator:
-                if not line:
-                    self.fail('unexpected end of stream')
-
-                if line[:2] == b'--':
-                    terminator = line.rstrip()
-                    if terminator in (next_part, last_part):
-                        break
-
-                if transfer_encoding is not None:
-                    try:
-                        if transfer_encoding.lower().strip() == 'base64':
-                            line = force_bytes(base64.b64decode(line))
-                        else:
-                            line = line.decode(transfer_encoding)
-                    except Exception:
-                        self.fail('could not decode transfer encoded chunk')
-
-                # we have something in the buffer from the last iteration.
-                # this is usually a newline delimiter.
-                if buf:
-                    _write(buf)
-                    buf = b''
-
-                # If the line ends with windows CRLF we write everything except
-                # the last two bytes.  In all other cases however we write
-                # everything except the last byte.  If it was a newline, that's
-                # fine, otherwise it does not matter because we will write it
-                # the next iteration.  this ensures we do not write the
-                # final newline into the stream.  That way we do not have to
-                # truncate the stream.  However we do have to make sure that
-                # if something else than a newline is in there we write it
-                # out.
-                if line[-2:] == b'\r\n':
-                    buf = b'\r\n'
-                    cutoff = -2
+        while not decoder.complete:
+            chunk = _read()
+            try:
+                if chunk:
+                    events = decoder.feed(chunk)
                 else:
-                    buf = bytes([line[-1]]) if six.PY3 else line[-1]
-                    cutoff = -1
-                _write(line[:cutoff])
-
-                # if we write into memory and there is a memory size limit we
-                # count the number of bytes in memory and raise an exception if
-                # there is too much data in memory.
-                if guard_memory:
-                    in_memory += len(line)
-                    if in_memory > self.max_form_memory_size:
-                        self.in_memory_threshold_reached(in_memory)
-            else: # pragma: no cover
-                raise ValueError('unexpected end of part')
-
-            # if we have a leftover in the buffer that is not a newline
-            # character we have to flush it, otherwise we will chop of
-            # certain values.
-            if buf not in (b'', b'\r', b'\n', b'\r\n'):
-                _write(buf)
-
-            if is_file:
-                container.seek(0)
-                files.append((name, FileStorage(container, filename, name,
-                                                headers=headers)))
-            else:
-                form.append((name, _decode_unicode(b''.join(container),
-                                                   part_charset, self.errors)))
+                    events = decoder.close()
+            except ValueError as e:
+                self.fail(str(e))
+
+            for event, value in events:
+                if event == 'headers':
+                    self.on_part_begin(value)
+                elif event == 'data':
+                    self.on_part_data(value)
+                else:
+                    self.on_part_end()
+
+            if not chunk:
+                break
 
-        return self.cls(form), self.cls(files)
+        return self.cls(self._form), self.cls(self._files)
@@ -104,6 +104,10 @@ try:
     from urllib.parse import urljoin
 except ImportError:
     from urlparse import urljoin
+try:
+    from threading import Lock
+except ImportError: # pragma: no cover
+    from dummy_threading import Lock
 from werkzeug.urls import url_encode, url_quote
 from werkzeug.utils import redirect, format_string
 from werkzeug.exceptions import HTTPException, NotFound, MethodNotAllowed
@@ -136,6 +140,11 @@ _converter_args_re = re.compile(r'''
 ''', re.VERBOSE|re.UNICODE)
 
 
+# possible results of a rule lookup when matching
+_MATCH_FOUND, _MATCH_SLASH, _MATCH_ALIAS, _MATCH_NOT_ALLOWED, \
+    _MATCH_NOT_FOUND = range(5)
+
+
 _PYTHON_CONSTANTS = {
     'None':     None,
     'True':     True,
@@ -207,6 +216,30 @@ def parse_rule(rule):
         yield None, None, remaining
 
 
+def _clean_build_values(values):
+    """Returns a new dict of the values for URL building without the
+    values that are `None`.
+    """
+    if not values:
+        return {}
+    if isinstance(values, MultiDict):
+        valueiter = values.iteritems(multi=True)
+    else:
+        valueiter = six.iteritems(values)
+    return dict((k, v) for k, v in valueiter if v is not None)
+
+
+def _join_script_path(script_name, path):
+    """Joins a built path to the script name which must end with a slash.
+    Only if the script name or the path has dot segments they are resolved
+    with `urljoin`, otherwise the path can be appended as it is.
+    """
+    path = path.lstrip('/')
+    if '/.' in script_name or '/.' in '/' + path:
+        return urljoin(script_name, './' + path)
+    return script_name + path
+
+
 class RoutingException(Exception):
     """Special exceptions that require the application to redirect, notifying
     about missing urls, etc.
@@ -560,6 +593,7 @@ class Rule(RuleFactory):
         else:
             self.arguments = set()
         self._trace = self._converters = self._regex = self._weights = None
+        self._build_func = self._match_key = self._match_group = None
 
     def empty(self):
         """Return an unbound copy of this rule.  This can be useful if you
@@ -619,7 +653,9 @@ class Rule(RuleFactory):
         self._trace = []
         self._converters = {}
         self._weights = []
+        self._match_key = self._match_group = None
         regex_parts = []
+        converter_specs = []
 
         def _build_regex(rule):
             for converter, arguments, variable in parse_rule(rule):
@@ -639,6 +675,7 @@ class Rule(RuleFactory):
                         variable, converter, c_args, c_kwargs)
                     regex_parts.append('(?P<%s>%s)' % (variable, convobj.regex))
                     self._converters[variable] = convobj
+                    converter_specs.append((variable, type(convobj), arguments))
                     self._trace.append((True, variable))
                     self._weights.append((1, convobj.weight))
                     self.arguments.add(str(variable))
@@ -650,6 +687,7 @@ class Rule(RuleFactory):
         if not self.is_leaf:
             self._trace.append((False, '/'))
 
+        self._build_func = self._compile_builder()
         if self.build_only:
             return
         regex = r'^%s%s$' % (
@@ -659,6 +697,16 @@ class Rule(RuleFactory):
         )
         self._regex = re.compile(regex, re.UNICODE)
 
+        # rules with the same match key convert paths to the same values so
+        # the map only has to match one of them.  This is not the case if
+        # the rule does its own matching or creates its own converters.
+        cls = type(self)
+        if all(six.get_unbound_function(getattr(cls, name)) is
+               six.get_unbound_function(getattr(Rule, name))
+               for name in ('match', '_match_path', 'get_converter')):
+            self._match_key = (regex, self.strict_slashes, self.is_leaf,
+                               tuple(converter_specs))
+
     def match(self, path):
         """Check if the rule matches a given path. Path is a string in the
         form ``"subdomain|/path(method)"`` and is assembled by the map.  If
@@ -668,6 +716,14 @@ class Rule(RuleFactory):
         If the rule matches a dict with the converted values is returned,
         otherwise the return value is `None`.
 
+        :internal:
+        """
+        return self._finish_match(self._match_path(path))
+
+    def _match_path(self, path):
+        """Like :meth:`match` but the defaults are not added and the rule
+        does not redirect if it's an alias.
+
         :internal:
         """
         if not self.build_only:
@@ -693,37 +749,82 @@ class Rule(RuleFactory):
                     except ValidationError:
                         return
                     result[str(name)] = value
-                if self.defaults:
-                    result.update(self.defaults)
+                return result
 
-                if self.alias and self.map.redirect_defaults:
-                    raise RequestAliasRedirect(result)
+    def _finish_match(self, result):
+        """Adds the defaults to the values returned by :meth:`_match_path`
+        and redirects if the rule is an alias.
 
-                return result
+        :internal:
+        """
+        if result is not None:
+            if self.defaults:
+                result.update(self.defaults)
 
-    def build(self, values, append_unknown=True):
-        """Assembles the relative url for that rule and the subdomain.
-        If building doesn't work for some reasons `None` is returned.
+            if self.alias and self.map.redirect_defaults:
+                raise RequestAliasRedirect(result)
+
+            return result
+
+    def _compile_builder(self):
+        """Returns a function that assembles the subdomain and the path
+        from a dict of values and returns them as tuple.  The static parts
+        of the rule are quoted only once here and rules without converters
+        always return the same result.
 
         :internal:
         """
-        tmp = []
-        add = tmp.append
-        processed = set(self.arguments)
+        charset = self.map.charset
+        parts = []
+        static = []
         for is_dynamic, data in self._trace:
             if is_dynamic:
-                try:
-                    add(self._converters[data].to_url(values[data]))
-                except ValidationError:
-                    return
-                processed.add(data)
+                if static:
+                    parts.append(u''.join(static))
+                    del static[:]
+                parts.append((data, self._converters[data].to_url))
             else:
-                add(url_quote(data, self.map.charset, safe='/:|+'))
-        domain_part, url = (u''.join(tmp)).split('|', 1)
+                static.append(url_quote(data, charset, safe='/:|+'))
+        if static:
+            parts.append(u''.join(static))
+
+        if len(parts) == 1 and not isinstance(parts[0], tuple):
+            result = tuple(parts[0].split('|', 1))
+            return lambda values: result
+
+        def _build(values):
+            tmp = []
+            add = tmp.append
+            for part in parts:
+                if isinstance(part, tuple):
+                    try:
+                        add(part[1](values[part[0]]))
+                    except ValidationError:
+                        return
+                else:
+                    add(part)
+            return tuple(u''.join(tmp).split('|', 1))
+        return _build
+
+    def build(self, values, append_unknown=True):
+        """Assembles the relative url for that rule and the subdomain.
+        If building doesn't work for some reasons `None` is returned.
+
+        :internal:
+        """
+        rv = self._build_func(values)
+        if rv is None:
+            return
+        domain_part, url = rv
 
         if append_unknown:
+            for key in values:
+                if key not in self.arguments:
+                    break
+            else:
+                return domain_part, url
             query_vars = MultiDict(values)
-            for key in processed:
+            for key in self.arguments:
                 if key in query_vars:
                     del query_vars[key]
 
@@ -983,6 +1084,203 @@ DEFAULT_CONVERTERS = {
 }
 
 
+class RuleMatcher(object):
+    """A rule matcher knows which rules of a map have to be tested for a
+    given path.  It's created by :meth:`Map.update` from the sorted list of
+    rules and the map adapter tries the rules it returns in order.  This
+    default implementation simply returns all rules which is what Werkzeug
+    always did.
+
+    .. versionadded:: 0.9
+
+    :param rules: the rules of the map in matching order.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+
+    def get_candidates(self, path):
+        """Returns the rules that could match the given path in the order
+        they have to be tried.  The path is in the form ``"subdomain|/path"``
+        as assembled by the map adapter.  Returning a rule that does not
+        match is fine, leaving out a rule that does match is not.
+        """
+        return self.rules
+
+
+class _TrieNode(object):
+    __slots__ = ('rules', 'children')
+
+    def __init__(self):
+        self.rules = []
+        self.children = {}
+
+
+class _RuleIndex(object):
+    """Indexes the rules of one domain by their static path."""
+
+    def __init__(self):
+        self.static = {}
+        self.root = _TrieNode()
+
+    def add(self, key, rule, path_prefix, is_static):
+        if is_static:
+            self.static.setdefault(path_prefix, []).append((key, rule))
+            return
+        node = self.root
+        for segment in path_prefix.split(u'/')[:-1]:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _TrieNode()
+            node = child
+        node.rules.append((key, rule))
+
+    def collect(self, path, rv):
+        # static rules match the path with and without a trailing slash
+        rv.extend(self.static.get(path, ()))
+        if path.endswith(u'/'):
+            rv.extend(self.static.get(path[:-1], ()))
+        node = self.root
+        for segment in path.split(u'/'):
+            rv.extend(node.rules)
+            node = node.children.get(segment)
+            if node is None:
+                return
+        rv.extend(node.rules)
+
+
+class TrieRuleMatcher(RuleMatcher):
+    """A rule matcher that indexes rules by the static parts of their URL
+    so that only a handful of rules are tested per path instead of all of
+    them.  Rules without converters are looked up in a dictionary, all
+    other rules are stored in a trie of the static path segments in front
+    of their first converter.  Both are kept separately for every static
+    subdomain (or host if host matching is enabled).  The rules found are
+    returned in the same order as :class:`RuleMatcher` would return them so
+    matching behaves exactly the same, including redirects and
+    :exc:`MethodNotAllowed` errors.
+
+    This is worth it for maps with many rules::
+
+        url_map = Map(rules, matcher_class=TrieRuleMatcher)
+
+    .. versionadded:: 0.9
+    """
+
+    def __init__(self, rules):
+        RuleMatcher.__init__(self, rules)
+        self._indexes = {}
+        self._unindexed = []
+        base_functions = [six.get_unbound_function(Rule.match),
+                          six.get_unbound_function(Rule._match_path)]
+        for key, rule in enumerate(rules):
+            if rule.build_only:
+                continue
+            # rules that implement their own matching cannot be indexed
+            cls = type(rule)
+            if [six.get_unbound_function(cls.match),
+                six.get_unbound_function(cls._match_path)] != base_functions:
+                self._unindexed.append((key, rule))
+                continue
+            domain, path_prefix, is_static = self._analyze_rule(rule)
+            index = self._indexes.get(domain)
+            if index is None:
+                index = self._indexes[domain] = _RuleIndex()
+            index.add(key, rule, path_prefix, is_static)
+
+    def _analyze_rule(self, rule):
+        """Returns the static domain of the rule (`None` if the domain is
+        dynamic), the static part of the path in front of the first
+        converter and a flag that is `True` if the path has no converters.
+        """
+        trace = rule._trace
+        pos = trace.index((False, '|'))
+        domain = u''
+        for is_dynamic, data in trace[:pos]:
+            if is_dynamic:
+                domain = None
+                break
+            domain += data
+        path_trace = trace[pos + 1:]
+        # branch URLs have an additional slash in the trace that is not
+        # part of the regular expression
+        if not rule.is_leaf:
+            path_trace = path_trace[:-1]
+        path_prefix = u''
+        for is_dynamic, data in path_trace:
+            if is_dynamic:
+                return domain, path_prefix, False
+            path_prefix += data
+        return domain, path_prefix, True
+
+    def get_candidates(self, path):
+        domain, _, path = path.partition(u'|')
+        if not path.startswith(u'/'):
+            return self.rules
+        rv = list(self._unindexed)
+        index = self._indexes.get(domain)
+        if index is not None:
+            index.collect(path, rv)
+        index = self._indexes.get(None)
+        if index is not None:
+            index.collect(path, rv)
+        rv.sort()
+        return [rule for key, rule in rv]
+
+
+class _MatchCache(object):
+    """A bounded cache for rule lookups that discards the least recently
+    used results first.  Used by :class:`Map` if a `match_cache_size` is
+    set.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._mapping = {}
+        # the entries are kept in a circular doubly linked list of
+        # ``[prev, next, key, value]`` lists with the least recently
+        # used entry right after the root.
+        self._root = root = []
+        root[:] = [root, root, None, None]
+
+    def __len__(self):
+        return len(self._mapping)
+
+    def get(self, key):
+        with self._lock:
+            link = self._mapping.get(key)
+            if link is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            prev, next = link[0], link[1]
+            prev[1] = next
+            next[0] = prev
+            root = self._root
+            last = root[0]
+            last[1] = root[0] = link
+            link[0] = last
+            link[1] = root
+            return link[3]
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._mapping:
+                return
+            root = self._root
+            if len(self._mapping) >= self.maxsize:
+                oldest = root[1]
+                root[1] = oldest[1]
+                oldest[1][0] = root
+                del self._mapping[oldest[2]]
+            last = root[0]
+            link = [last, root, key, value]
+            last[1] = root[0] = self._mapping[key] = link
+
+
 class Map(object):
     """The map class stores all the URL rules and some configuration
     parameters.  Some of the configuration values are only stored on the
@@ -1009,25 +1307,49 @@ class Map(object):
                           feature and disables the subdomain one.  If
                           enabled the `host` parameter to rules is used
                           instead of the `subdomain` one.
+    :param matcher_class: the :class:`RuleMatcher` subclass that is used to
+                          find the rules that have to be tested when
+                          matching.  Defaults to :attr:`matcher_class`.
+    :param match_cache_size: if set to a positive number the results of the
+                             rule lookups are cached by path and method, up
+                             to this many of them.  Redirects and
+                             :exc:`NotFound` / :exc:`MethodNotAllowed` errors
+                             are cached as well.  Only enable this if all
+                             converters always return the same values for
+                             the same URL.  See :meth:`match_cache_info`.
 
     .. versionadded:: 0.5
         `sort_parameters` and `sort_key` was added.
 
     .. versionadded:: 0.7
         `encoding_errors` and `host_matching` was added.
+
+    .. versionadded:: 0.9
+        `matcher_class` and `match_cache_size` were added.
     """
 
     #: .. versionadded:: 0.6
     #:    a dict of default converters to be used.
     default_converters = ImmutableDict(DEFAULT_CONVERTERS)
 
+    #: .. versionadded:: 0.9
+    #:    the rule matcher used if no `matcher_class` is passed to the
+    #:    constructor.
+    matcher_class = RuleMatcher
+
     def __init__(self, rules=None, default_subdomain='', charset='utf-8',
                  strict_slashes=True, redirect_defaults=True,
                  converters=None, sort_parameters=False, sort_key=None,
-                 encoding_errors='replace', host_matching=False):
+                 encoding_errors='replace', host_matching=False,
+                 matcher_class=None, match_cache_size=0):
         self._rules = []
         self._rules_by_endpoint = {}
         self._remap = True
+        self._matcher = None
+        self._match_cache = None
+        self.match_cache_size = match_cache_size
+        if matcher_class is not None:
+            self.matcher_class = matcher_class
 
         self.default_subdomain = default_subdomain
         self.charset = charset
@@ -1207,8 +1529,48 @@ class Map(object):
             self._rules.sort(key=lambda x: x.match_compare_key())
             for rules in six.itervalues(self._rules_by_endpoint):
                 rules.sort(key=lambda x: x.build_compare_key())
+            self._matcher = self.matcher_class(self._rules)
+            self._group_rules()
+            if self.match_cache_size > 0:
+                self._match_cache = _MatchCache(self.match_cache_size)
+            else:
+                self._match_cache = None
             self._remap = False
 
+    def _group_rules(self):
+        """Numbers the groups of rules that share a match key so that the
+        map adapter only has to match one rule of every group.
+
+        :internal:
+        """
+        groups = {}
+        for rule in self._rules:
+            if rule._match_key is not None:
+                groups.setdefault(rule._match_key, []).append(rule)
+        group_id = 0
+        for rules in six.itervalues(groups):
+            if len(rules) > 1:
+                for rule in rules:
+                    rule._match_group = group_id
+                group_id += 1
+            else:
+                rules[0]._match_group = None
+
+    def match_cache_info(self):
+        """Returns a dict with the statistics of the match cache: the
+        number of `hits` and `misses`, the current `size` and the `maxsize`.
+        The cache is cleared whenever the rules change and so are the
+        statistics.  If the cache is disabled all values are zero.
+
+        .. versionadded:: 0.9
+        """
+        self.update()
+        cache = self._match_cache
+        if cache is None:
+            return dict(hits=0, misses=0, size=0, maxsize=0)
+        return dict(hits=cache.hits, misses=cache.misses, size=len(cache),
+                    maxsize=cache.maxsize)
+
     def __repr__(self):
         rules = self.iter_rules()
         return '%s(%s)' % (self.__class__.__name__, pformat(list(rules)))
@@ -1378,52 +1740,97 @@ class MapAdapter(object):
         path = u'%s|/%s' % (self.map.host_matching and self.server_name or
                             self.subdomain, path_info.lstrip('/'))
 
+        cache = self.map._match_cache
+        if cache is None:
+            result, rule, rv = self._find_match(path, method)
+        else:
+            key = (path, method)
+            cached = cache.get(key)
+            if cached is None:
+                cached = self._find_match(path, method)
+                cache.set(key, cached)
+            result, rule, rv = cached
+            # the cached values must not be modified by the caller
+            if isinstance(rv, dict):
+                rv = dict(rv)
+
+        if result == _MATCH_SLASH:
+            raise RequestRedirect(self.make_redirect_url(
+                path_info + '/', query_args))
+        elif result == _MATCH_ALIAS:
+            raise RequestRedirect(self.make_alias_redirect_url(
+                path, rule.endpoint, rv, method, query_args))
+        elif result == _MATCH_NOT_ALLOWED:
+            raise MethodNotAllowed(valid_methods=list(rv))
+        elif result == _MATCH_NOT_FOUND:
+            raise NotFound()
+
+        if self.map.redirect_defaults:
+            redirect_url = self.get_default_redirect(rule, method, rv,
+                                                     query_args)
+            if redirect_url is not None:
+                raise RequestRedirect(redirect_url)
+
+        if rule.redirect_to is not None:
+            if isinstance(rule.redirect_to, six.string_types):
+                def _handle_match(match):
+                    value = rv[match.group(1)]
+                    return rule._converters[match.group(1)].to_url(value)
+                redirect_url = _simple_rule_re.sub(_handle_match,
+                                                   rule.redirect_to)
+            else:
+                redirect_url = rule.redirect_to(self, **rv)
+            raise RequestRedirect(str(urljoin('%s://%s%s%s' % (
+                self.url_scheme,
+                self.subdomain and self.subdomain + '.' or '',
+                self.server_name,
+                self.script_name
+            ), redirect_url)))
+
+        if return_rule:
+            return rule, rv
+        else:
+            return rule.endpoint, rv
+
+    def _find_match(self, path, method):
+        """Looks up the rule for a path in the form ``"subdomain|/path"``
+        and a method.  The return value is a tuple in the form
+        ``(result, rule, values)`` where `result` is one of the
+        ``_MATCH_*`` constants.  For method mismatches the values are the
+        allowed methods instead.  The return value only depends on the
+        arguments and the rules of the map so it can be cached.
+
+        :internal:
+        """
         have_match_for = set()
-        for rule in self.map._rules:
+        # values of the rules that share their match key with other rules
+        group_values = {}
+        for rule in self.map._matcher.get_candidates(path):
             try:
-                rv = rule.match(path)
+                group = rule._match_group
+                if group is not None:
+                    if group in group_values:
+                        rv = group_values[group]
+                    else:
+                        rv = group_values[group] = rule._match_path(path)
+                    if rv is not None:
+                        rv = rule._finish_match(dict(rv))
+                else:
+                    rv = rule.match(path)
             except RequestSlash:
-                raise RequestRedirect(self.make_redirect_url(
-                    path_info + '/', query_args))
+                return _MATCH_SLASH, rule, None
             except RequestAliasRedirect as e:
-                raise RequestRedirect(self.make_alias_redirect_url(
-                    path, rule.endpoint, e.matched_values, method, query_args))
+                return _MATCH_ALIAS, rule, e.matched_values
             if rv is None:
                 continue
             if rule.methods is not None and method not in rule.methods:
                 have_match_for.update(rule.methods)
                 continue
-
-            if self.map.redirect_defaults:
-                redirect_url = self.get_default_redirect(rule, method, rv,
-                                                         query_args)
-                if redirect_url is not None:
-                    raise RequestRedirect(redirect_url)
-
-            if rule.redirect_to is not None:
-                if isinstance(rule.redirect_to, basestring):
-                    def _handle_match(match):
-                        value = rv[match.group(1)]
-                        return rule._converters[match.group(1)].to_url(value)
-                    redirect_url = _simple_rule_re.sub(_handle_match,
-                                                       rule.redirect_to)
-                else:
-                    redirect_url = rule.redirect_to(self, **rv)
-                raise RequestRedirect(str(urljoin('%s://%s%s%s' % (
-                    self.url_scheme,
-                    self.subdomain and self.subdomain + '.' or '',
-                    self.server_name,
-                    self.script_name
-                ), redirect_url)))
-
-            if return_rule:
-                return rule, rv
-            else:
-                return rule.endpoint, rv
+            return _MATCH_FOUND, rule, rv
 
         if have_match_for:
-            raise MethodNotAllowed(valid_methods=list(have_match_for))
-        raise NotFound()
+            return _MATCH_NOT_ALLOWED, None, frozenset(have_match_for)
+        return _MATCH_NOT_FOUND, None, None
 
     def test(self, path_info=None, method=None):
         """Test if a rule would match.  Works like `match` but returns `True`
@@ -1527,6 +1934,16 @@ class MapAdapter(object):
 
         :internal:
         """
+        rules = self.map._rules_by_endpoint.get(endpoint, ())
+
+        # with a single rule for the endpoint trying the default method
+        # first can't make a difference.
+        if len(rules) == 1:
+            rule = rules[0]
+            if rule.suitable_for(values, method):
+                return rule.build(values, append_unknown)
+            return
+
         # in case the method is none, try with the default method first
         if method is None:
             rv = self._partial_build(endpoint, values, self.default_method,
@@ -1536,7 +1953,7 @@ class MapAdapter(object):
 
         # default method did not match or a specific method is passed,
         # check all and go with first result.
-        for rule in self.map._rules_by_endpoint.get(endpoint, ()):
+        for rule in rules:
             if rule.suitable_for(values, method):
                 rv = rule.build(values, append_unknown)
                 if rv is not None:
@@ -1597,14 +2014,7 @@ class MapAdapter(object):
                                if you want the builder to ignore those.
         """
         self.map.update()
-        if values:
-            if isinstance(values, MultiDict):
-                valueiter = values.iteritems(multi=True)
-            else:
-                valueiter = six.iteritems(values)
-            values = dict((k, v) for k, v in valueiter if v is not None)
-        else:
-            values = {}
+        values = _clean_build_values(values)
 
         rv = self._partial_build(endpoint, values, method, append_unknown)
         if rv is None:
@@ -1617,10 +2027,68 @@ class MapAdapter(object):
         if not force_external and (
             (self.map.host_matching and host == self.server_name) or
             (not self.map.host_matching and domain_part == self.subdomain)):
-            return str(urljoin(self.script_name, './' + path.lstrip('/')))
+            return str(_join_script_path(self.script_name, path))
         return str('%s://%s%s/%s' % (
             self.url_scheme,
             host,
             self.script_name[:-1],
             path.lstrip('/')
         ))
+
+    def build_many(self, endpoint, values_iter, method=None,
+                   force_external=False, append_unknown=True):
+        """Builds URLs for the same endpoint with many different values and
+        returns them as list.  The result is the same as calling
+        :meth:`build` for every item of `values_iter`, but the work that
+        does not depend on the values is only done once which makes this a
+        lot faster for long lists:
+
+        >>> m = Map([Rule('/downloads/<int:id>', endpoint='downloads/show')])
+        >>> urls = m.bind("example.com", "/")
+        >>> urls.build_many("downloads/show", [{'id': 1}, {'id': 2}])
+        ['/downloads/1', '/downloads/2']
+
+        If one of the URLs cannot be built a `BuildError` is raised.
+
+        .. versionadded:: 0.9
+
+        :param endpoint: the endpoint of the URLs to build.
+        :param values_iter: an iterable of value dicts, one for every URL.
+        :param method: the HTTP method for the rule if there are different
+                       URLs for different methods on the same endpoint.
+        :param force_external: enforce full canonical external URLs.
+        :param append_unknown: unknown parameters are appended to the
+                               generated URLs as query string argument.
+        """
+        self.map.update()
+        script_name = self.script_name
+        # maps domain parts to the URL prefix or `None` for local URLs
+        prefixes = {}
+        rv = []
+        for values in values_iter:
+            values = _clean_build_values(values)
+            result = self._partial_build(endpoint, values, method,
+                                         append_unknown)
+            if result is None:
+                raise BuildError(endpoint, values, method)
+            domain_part, path = result
+
+            try:
+                prefix = prefixes[domain_part]
+            except KeyError:
+                host = self.get_host(domain_part)
+                if not force_external and (
+                    (self.map.host_matching and host == self.server_name) or
+                    (not self.map.host_matching and
+                     domain_part == self.subdomain)):
+                    prefix = None
+                else:
+                    prefix = '%s://%s%s/' % (self.url_scheme, host,
+                                             script_name[:-1])
+                prefixes[domain_part] = prefix
+
+            if prefix is None:
+                rv.append(str(_join_script_path(script_name, path)))
+            else:
+                rv.append(str(prefix + path.lstrip('/')))
+        return rv
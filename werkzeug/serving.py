@@ -38,6 +38,8 @@
 from __future__ import with_statement
 
 import os
+import errno
+import select
 import socket
 import sys
 import time
@@ -46,7 +48,13 @@ try:
 except ImportError:
     import thread
 import signal
+import struct
 import subprocess
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 try:
     from urllib.parse import unquote
 except ImportError:
@@ -65,11 +73,63 @@ import werkzeug
 from werkzeug._internal import _log, force_bytes
 from werkzeug.urls import _safe_urlsplit
 from werkzeug.exceptions import InternalServerError
+from werkzeug.wsgi import FileWrapper, LimitedStream
+
+
+def _sendmsg_all(sendmsg, buffers, max_buffers=1024):
+    """Sends all `buffers` with as few calls to `sendmsg` as possible.
+    The list of buffers is consumed.
+    """
+    while buffers:
+        sent = sendmsg(buffers[:max_buffers])
+        while sent:
+            size = len(buffers[0])
+            if sent < size:
+                buffers[0] = memoryview(buffers[0])[sent:]
+                break
+            del buffers[0]
+            sent -= size
+
+
+class SendfileWrapper(FileWrapper):
+    """The ``wsgi.file_wrapper`` of the development server.  If an
+    application returns it unchanged and the wrapped file has a file
+    descriptor, the server sends the file with the `sendfile` system call
+    which copies the data from the file to the socket in the kernel.
+    Otherwise, for example for SSL connections, file-like objects without a
+    file descriptor or Python versions that don't support it, the file is
+    read and sent in blocks like with :class:`~werkzeug.wsgi.FileWrapper`.
+
+    .. versionadded:: 0.9
+    """
 
 
 class WSGIRequestHandler(BaseHTTPRequestHandler, object):
     """A request handler that implements WSGI dispatching."""
 
+    #: the number of bytes of a response that are collected before they
+    #: are sent to the client.  The status line and the headers are always
+    #: sent together with the first chunk of the body.  If the application
+    #: returns a list or a tuple the whole response is already there and
+    #: is sent in as few system calls as possible, flushing whenever this
+    #: many bytes are buffered.  Other iterables are sent chunk by chunk as
+    #: required by the WSGI specification.
+    #:
+    #: .. versionadded:: 0.9
+    write_buffer_size = 64 * 1024
+
+    #: the number of seconds a persistent connection is kept open while
+    #: waiting for the next request.
+    #:
+    #: .. versionadded:: 0.9
+    keep_alive_timeout = 5
+
+    #: the maximum number of requests that are handled on one persistent
+    #: connection.  The last response closes the connection.
+    #:
+    #: .. versionadded:: 0.9
+    max_keep_alive_requests = 100
+
     @property
     def server_version(self):
         return 'Werkzeug/' + werkzeug.__version__
@@ -89,6 +149,7 @@ class WSGIRequestHandler(BaseHTTPRequestHandler, object):
             'wsgi.multithread':     self.server.multithread,
             'wsgi.multiprocess':    self.server.multiprocess,
             'wsgi.run_once':        False,
+            'wsgi.file_wrapper':    SendfileWrapper,
             'werkzeug.server.shutdown':
                                     shutdown_server,
             'SERVER_SOFTWARE':      self.server_version,
@@ -120,34 +181,77 @@ class WSGIRequestHandler(BaseHTTPRequestHandler, object):
         environ = self.make_environ()
         headers_set = []
         headers_sent = []
+        # [send_body, chunked] for the current response
+        transfer = []
+
+        request_body = None
+        if not self.close_connection:
+            # on a persistent connection the request body has to be read
+            # completely before the next request can be parsed, so the
+            # application must not read past it.
+            try:
+                content_length = int(environ['CONTENT_LENGTH'] or 0)
+            except ValueError:
+                content_length = -1
+            if content_length < 0 or 'HTTP_TRANSFER_ENCODING' in environ:
+                self.close_connection = True
+            else:
+                request_body = LimitedStream(self.rfile, content_length)
+                environ['wsgi.input'] = request_body
 
-        def write(data):
+        def write(data, flush=True):
             assert headers_set, 'write() before start_response'
             if not headers_sent:
                 status, response_headers = headers_sent[:] = headers_set
                 code, msg = status.split(None, 1)
-                self.send_response(int(code), msg)
+                code = int(code)
+                keep_alive = not self.close_connection
+                self.send_response(code, msg)
                 header_keys = set()
                 for key, value in response_headers:
                     self.send_header(key, value)
                     key = key.lower()
                     header_keys.add(key)
+                send_body = self.command != 'HEAD' and code >= 200 and \
+                    code not in (204, 304)
+                chunked = False
                 if 'content-length' not in header_keys:
-                    self.close_connection = True
-                    self.send_header('Connection', 'close')
+                    if send_body and keep_alive and \
+                       self.request_version >= 'HTTP/1.1' and \
+                       'transfer-encoding' not in header_keys:
+                        chunked = True
+                        self.send_header('Transfer-Encoding', 'chunked')
+                    elif send_body or not keep_alive:
+                        self.close_connection = True
+                        self.send_header('Connection', 'close')
+                if keep_alive and not self.close_connection:
+                    if self.requests_handled >= self.max_keep_alive_requests:
+                        self.close_connection = True
+                        self.send_header('Connection', 'close')
+                    elif self.request_version == 'HTTP/1.0':
+                        self.send_header('Connection', 'keep-alive')
+                transfer[:] = [send_body, chunked]
                 if 'server' not in header_keys:
                     self.send_header('Server', self.version_string())
                 if 'date' not in header_keys:
                     self.send_header('Date', self.date_time_string())
-                self.end_headers()
+                self._end_headers()
 
             if not six.PY3:
                 assert type(data) is bytes, 'applications must write bytes'
             else:
                 if type(data) is str:
                     data = data.encode('ISO-8859-1')
-            self.wfile.write(data)
-            self.wfile.flush()
+            send_body, chunked = transfer
+            if send_body and data:
+                if chunked:
+                    self._buffer_write(('%x\r\n' % len(data)).encode('ascii'))
+                    self._buffer_write(data)
+                    self._buffer_write(b'\r\n')
+                else:
+                    self._buffer_write(data)
+            if flush or self._buffered_bytes >= self.write_buffer_size:
+                self._flush_write_buffer()
 
         def start_response(status, response_headers, exc_info=None):
             if exc_info:
@@ -163,12 +267,30 @@ class WSGIRequestHandler(BaseHTTPRequestHandler, object):
 
         def execute(app):
             application_iter = app(environ, start_response)
+            # the items of lists and tuples are already there so they can
+            # be coalesced, everything else might be a stream.
+            flush = not isinstance(application_iter, (list, tuple))
             try:
-                for data in application_iter:
-                    write(data)
-                # make sure the headers are sent
-                if not headers_sent:
-                    write('')
+                try:
+                    if isinstance(application_iter, SendfileWrapper) and \
+                       headers_set and self.can_sendfile(application_iter.file):
+                        write('')
+                        send_body, chunked = transfer
+                        if not send_body:
+                            return
+                        if not chunked:
+                            self.sendfile(application_iter.file,
+                                          headers_set[1])
+                            return
+                    for data in application_iter:
+                        write(data, flush)
+                    # make sure the headers are sent
+                    if not headers_sent:
+                        write('')
+                    if transfer[1]:
+                        self._buffer_write(b'0\r\n\r\n')
+                finally:
+                    self._flush_write_buffer()
             finally:
                 if hasattr(application_iter, 'close'):
                     application_iter.close()
@@ -177,8 +299,12 @@ class WSGIRequestHandler(BaseHTTPRequestHandler, object):
         try:
             execute(app)
         except (socket.error, socket.timeout) as e:
+            self.close_connection = True
             self.connection_dropped(e, environ)
         except Exception:
+            # the response might be incomplete, the connection can't be
+            # reused after that.
+            self.close_connection = True
             if self.server.passthrough_errors:
                 raise
             from werkzeug.debug.tbtools import get_current_traceback
@@ -194,6 +320,62 @@ class WSGIRequestHandler(BaseHTTPRequestHandler, object):
             self.server.log('error', 'Error on request:\n%s',
                             traceback.plaintext)
 
+        if request_body is None:
+            self.close_connection = True
+        elif not self.close_connection:
+            try:
+                request_body.exhaust()
+            except (IOError, OSError, socket.error):
+                self.close_connection = True
+
+    def can_sendfile(self, file):
+        """Checks if :meth:`sendfile` can be used for the given file.
+        This requires a connection without SSL that supports `sendfile`
+        and a file with a file descriptor that is opened in binary mode.
+
+        .. versionadded:: 0.9
+        """
+        if self.server.ssl_context is not None or \
+           not hasattr(self.connection, 'sendfile') or \
+           'b' not in getattr(file, 'mode', 'b'):
+            return False
+        try:
+            file.fileno()
+            file.tell()
+        except (AttributeError, IOError, OSError, ValueError):
+            return False
+        return True
+
+    def sendfile(self, file, response_headers):
+        """Sends the rest of the file as response body.  If the headers
+        contain a content length no more bytes are sent.
+
+        .. versionadded:: 0.9
+        """
+        count = None
+        for key, value in response_headers:
+            if key.lower() == 'content-length':
+                try:
+                    count = int(value)
+                except ValueError:
+                    pass
+        self.connection.sendfile(file, file.tell(), count)
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        if self.server.keep_alive:
+            self.protocol_version = 'HTTP/1.1'
+            # small writes at the end of a response must not wait for the
+            # delayed ack of the client, it's not closing the connection.
+            try:
+                self.connection.setsockopt(socket.IPPROTO_TCP,
+                                           socket.TCP_NODELAY, 1)
+            except (AttributeError, socket.error):
+                pass
+        self.requests_handled = 0
+        self._write_buffer = []
+        self._buffered_bytes = 0
+
     def handle(self):
         """Handles a request ignoring dropped connections."""
         rv = None
@@ -229,22 +411,84 @@ class WSGIRequestHandler(BaseHTTPRequestHandler, object):
 
     def handle_one_request(self):
         """Handle a single HTTP request."""
-        self.raw_requestline = self.rfile.readline()
+        if self.requests_handled:
+            # waiting for the next request on a persistent connection
+            timeout = self.server.get_keep_alive_timeout(
+                self.keep_alive_timeout)
+            if timeout <= 0:
+                self.close_connection = 1
+                return
+            self.connection.settimeout(timeout)
+            self.raw_requestline = self.rfile.readline()
+            self.connection.settimeout(self.timeout)
+        else:
+            self.raw_requestline = self.rfile.readline()
         if not self.raw_requestline:
             self.close_connection = 1
         elif self.parse_request():
+            self.requests_handled += 1
             return self.run_wsgi()
 
     def send_response(self, code, message=None):
         """Send the response header and log the response code."""
         self.log_request(code)
+        self.send_response_only(code, message)
+
+    def send_response_only(self, code, message=None):
+        """Buffer the status line without logging it."""
         if message is None:
             message = code in self.responses and self.responses[code][0] or ''
         if self.request_version != 'HTTP/0.9':
-            self.wfile.write(force_bytes(
+            self._buffer_write(force_bytes(
                 "%s %d %s\r\n" % (self.protocol_version, code, message),
                 'ISO-8859-1'))
 
+    def send_header(self, keyword, value):
+        """Buffer a header line.  The headers are sent with
+        :meth:`end_headers` or together with the response body.
+        """
+        if self.request_version != 'HTTP/0.9':
+            self._buffer_write(force_bytes('%s: %s\r\n' % (keyword, value),
+                                           'ISO-8859-1'))
+        # unlike the base class a header never reopens a connection the
+        # server already decided to close.
+        if keyword.lower() == 'connection' and value.lower() == 'close':
+            self.close_connection = True
+
+    def end_headers(self):
+        """Send the blank line ending the headers and flush the buffer."""
+        self._end_headers()
+        self._flush_write_buffer()
+
+    def flush_headers(self):
+        """Send everything that was buffered so far."""
+        self._flush_write_buffer()
+
+    def _end_headers(self):
+        if self.request_version != 'HTTP/0.9':
+            self._buffer_write(b'\r\n')
+
+    def _buffer_write(self, data):
+        if data:
+            self._write_buffer.append(data)
+            self._buffered_bytes += len(data)
+
+    def _flush_write_buffer(self):
+        buffers = self._write_buffer
+        if not buffers:
+            return
+        self._write_buffer = []
+        self._buffered_bytes = 0
+        sendmsg = None
+        if self.server.ssl_context is None and len(buffers) > 1:
+            sendmsg = getattr(self.connection, 'sendmsg', None)
+        if sendmsg is not None:
+            self.wfile.flush()
+            _sendmsg_all(sendmsg, buffers)
+        else:
+            self.wfile.write(b''.join(buffers))
+            self.wfile.flush()
+
     def version_string(self):
         return BaseHTTPRequestHandler.version_string(self).strip()
 
@@ -405,13 +649,15 @@ class BaseWSGIServer(HTTPServer, object):
     request_queue_size = 128
 
     def __init__(self, host, port, app, handler=None,
-                 passthrough_errors=False, ssl_context=None):
+                 passthrough_errors=False, ssl_context=None,
+                 keep_alive=False):
         if handler is None:
             handler = WSGIRequestHandler
         self.address_family = select_ip_version(host, port)
         HTTPServer.__init__(self, (host, int(port)), handler)
         self.app = app
         self.passthrough_errors = passthrough_errors
+        self.keep_alive = keep_alive
         self.shutdown_signal = False
 
         if ssl_context is not None:
@@ -432,6 +678,17 @@ class BaseWSGIServer(HTTPServer, object):
     def log(self, type, message, *args):
         _log(type, message, *args)
 
+    def get_keep_alive_timeout(self, timeout):
+        """Called by the request handler before it waits for the next
+        request on a persistent connection with the handler's
+        :attr:`~WSGIRequestHandler.keep_alive_timeout`.  Returns the
+        number of seconds to wait, if it's zero the connection is closed
+        instead.
+
+        .. versionadded:: 0.9
+        """
+        return timeout
+
     def serve_forever(self):
         self.shutdown_signal = False
         try:
@@ -457,35 +714,458 @@ class ThreadedWSGIServer(ThreadingMixIn, BaseWSGIServer):
     multithread = True
 
 
+class PooledWSGIServer(BaseWSGIServer):
+    """A WSGI server that handles connections with a fixed number of
+    worker threads.  Accepted connections wait in a queue of `backlog`
+    entries until a worker is free.  If the queue is full the `overload`
+    policy decides what happens: ``'block'`` stops accepting connections
+    until there is room again, ``'reject'`` answers the new connection
+    with ``503 Service Unavailable`` and closes it.
+
+    With `keep_alive` a worker stays with a persistent connection while it
+    waits for the next request, so idle clients could occupy the whole
+    pool.  Workers therefore wait at most :attr:`keep_alive_timeout`
+    seconds and close the connection right away if other connections are
+    waiting in the queue.
+
+    .. versionadded:: 0.9
+    """
+    multithread = True
+
+    #: the maximum number of seconds a worker waits for the next request on
+    #: a persistent connection.  It's shorter than the timeout of the
+    #: request handler because the worker can't serve other connections
+    #: while it's waiting.
+    keep_alive_timeout = 1
+
+    #: the response sent to connections rejected by the ``'reject'``
+    #: overload policy.
+    overload_response = (b'HTTP/1.0 503 Service Unavailable\r\n'
+                         b'Content-Type: text/plain\r\n'
+                         b'Content-Length: 19\r\n'
+                         b'Connection: close\r\n\r\n'
+                         b'Service Unavailable')
+
+    def __init__(self, host, port, app, pool_size=10, handler=None,
+                 passthrough_errors=False, ssl_context=None,
+                 keep_alive=False, backlog=None, overload='block'):
+        if overload not in ('block', 'reject'):
+            raise ValueError('unknown overload policy %r' % (overload,))
+        BaseWSGIServer.__init__(self, host, port, app, handler,
+                                passthrough_errors, ssl_context, keep_alive)
+        if backlog is None:
+            backlog = self.request_queue_size
+        self.pool_size = pool_size
+        self.backlog = backlog
+        self.overload = overload
+        self._queue = queue.Queue(backlog)
+        self._stats_lock = threading.Lock()
+        self._busy = 0
+        self._max_queue_depth = 0
+        self._handled = 0
+        self._rejected = 0
+        self._workers = []
+
+    def get_keep_alive_timeout(self, timeout):
+        if not self._queue.empty():
+            return 0
+        return min(timeout, self.keep_alive_timeout)
+
+    def start_workers(self):
+        """Starts the worker threads if they are not running yet.  This
+        happens automatically when the first connection is accepted.
+        """
+        if self._workers:
+            return
+        for x in range(self.pool_size):
+            t = threading.Thread(target=self._worker)
+            t.setDaemon(True)
+            t.start()
+            self._workers.append(t)
+
+    def stop_workers(self):
+        """Stops the worker threads after they finished the connections
+        that are already queued.
+        """
+        workers, self._workers = self._workers, []
+        for t in workers:
+            self._queue.put(None)
+        for t in workers:
+            t.join()
+
+    def _worker(self):
+        while 1:
+            item = self._queue.get()
+            if item is None:
+                break
+            request, client_address = item
+            with self._stats_lock:
+                self._busy += 1
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                # the passthrough mode reraises, but the worker has to
+                # stay alive for the next connection.
+                HTTPServer.handle_error(self, request, client_address)
+            finally:
+                self.shutdown_request(request)
+                with self._stats_lock:
+                    self._busy -= 1
+                    self._handled += 1
+
+    def process_request(self, request, client_address):
+        self.start_workers()
+        item = (request, client_address)
+        if self.overload == 'block':
+            self._queue.put(item)
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.reject_request(request, client_address)
+                return
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+
+    def reject_request(self, request, client_address):
+        """Called with a connection that could not be queued because the
+        server is overloaded.  Sends :attr:`overload_response` and closes
+        the connection.
+        """
+        with self._stats_lock:
+            self._rejected += 1
+        try:
+            request.sendall(self.overload_response)
+        except Exception:
+            pass
+        self.shutdown_request(request)
+
+    def get_stats(self):
+        """Returns a dict with the current statistics of the pool:
+
+        ``pool_size``
+            the number of worker threads.
+        ``busy_workers``
+            the number of workers handling a connection right now.
+        ``utilization``
+            ``busy_workers`` as fraction of ``pool_size``.
+        ``queue_depth``
+            the number of connections waiting for a worker.
+        ``max_queue_depth``
+            the highest queue depth seen so far.
+        ``handled``
+            the number of connections that were handled.
+        ``rejected``
+            the number of connections rejected because of overload.
+        """
+        with self._stats_lock:
+            return {
+                'pool_size':        self.pool_size,
+                'busy_workers':     self._busy,
+                'utilization':      self._busy / float(self.pool_size),
+                'queue_depth':      self._queue.qsize(),
+                'max_queue_depth':  self._max_queue_depth,
+                'handled':          self._handled,
+                'rejected':         self._rejected
+            }
+
+    def server_close(self):
+        BaseWSGIServer.server_close(self)
+        self.stop_workers()
+
+
 class ForkingWSGIServer(ForkingMixIn, BaseWSGIServer):
     """A WSGI server that does forking."""
     multiprocess = True
 
     def __init__(self, host, port, app, processes=40, handler=None,
-                 passthrough_errors=False, ssl_context=None):
+                 passthrough_errors=False, ssl_context=None,
+                 keep_alive=False):
         BaseWSGIServer.__init__(self, host, port, app, handler,
-                                passthrough_errors, ssl_context)
+                                passthrough_errors, ssl_context, keep_alive)
         self.max_children = processes
 
 
+class PreforkWSGIServer(BaseWSGIServer):
+    """A WSGI server that forks a fixed number of long-lived worker
+    processes which accept and handle connections on their own.  The
+    master process only binds the socket and supervises the workers:
+
+    -   a worker that handled `max_requests` requests asks the master for
+        a replacement and exits once the new worker was started.  A worker
+        that dies is replaced as well.
+    -   ``SIGHUP`` gracefully restarts all workers.  New workers are forked
+        and the old ones finish the requests they are handling before they
+        exit.
+    -   ``SIGTERM`` and ``SIGINT`` stop the workers and the server.
+
+    By default the workers share the socket of the master.  If
+    `reuse_port` is enabled every worker opens its own listening socket
+    with ``SO_REUSEPORT`` and the kernel distributes the connections
+    between them.
+
+    .. versionadded:: 0.9
+    """
+    multiprocess = True
+
+    #: the interval in seconds in which the master checks its workers
+    #: and the workers check if they should stop.
+    poll_interval = 0.5
+
+    def __init__(self, host, port, app, processes=4, handler=None,
+                 passthrough_errors=False, ssl_context=None,
+                 keep_alive=False, max_requests=0, reuse_port=False):
+        if reuse_port and not hasattr(socket, 'SO_REUSEPORT'):
+            raise ValueError('SO_REUSEPORT is not supported on this '
+                             'platform.')
+        self.processes = processes
+        self.max_requests = max_requests
+        self.reuse_port = reuse_port
+        BaseWSGIServer.__init__(self, host, port, app, handler,
+                                passthrough_errors, ssl_context, keep_alive)
+        self._workers = {}
+        self._requests_handled = 0
+        self._stopping = False
+        self._restarting = False
+        self._stopped = threading.Event()
+        self._retire_pipe = None
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        BaseWSGIServer.server_bind(self)
+
+    def server_activate(self):
+        # with SO_REUSEPORT the master only reserves the address, the
+        # kernel would otherwise queue connections nobody accepts.
+        if not self.reuse_port:
+            BaseWSGIServer.server_activate(self)
+
+    def get_request(self):
+        con, info = BaseWSGIServer.get_request(self)
+        # the listening socket of a worker is non-blocking
+        con.setblocking(1)
+        return con, info
+
+    def finish_request(self, request, client_address):
+        # count requests, not connections, a persistent connection can
+        # carry many of them.
+        handler = self.RequestHandlerClass(request, client_address, self)
+        self._requests_handled += getattr(handler, 'requests_handled', 1)
+
+    def serve_forever(self):
+        self._stopping = False
+        self._restarting = False
+        self._stopped.clear()
+        old_handlers = {}
+        try:
+            for sig, handler in [('SIGHUP', self._handle_restart),
+                                 ('SIGTERM', self._handle_stop)]:
+                sig = getattr(signal, sig)
+                old_handlers[sig] = signal.signal(sig, handler)
+        except ValueError:
+            # signals can only be handled in the main thread
+            pass
+        # workers that reached max_requests write their pid in here
+        self._retire_pipe = os.pipe()
+        try:
+            for x in range(self.processes):
+                self.spawn_worker()
+            while not self._stopping:
+                if self._restarting:
+                    self._restarting = False
+                    self.restart_workers()
+                self.reap_workers()
+                self._process_retirements()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_workers()
+            for fd in self._retire_pipe:
+                os.close(fd)
+            self._retire_pipe = None
+            for sig, handler in old_handlers.items():
+                signal.signal(sig, handler)
+            self._stopped.set()
+
+    def _process_retirements(self):
+        fd = self._retire_pipe[0]
+        try:
+            if not select.select([fd], [], [], self.poll_interval)[0]:
+                return
+            data = os.read(fd, 4096)
+        except (select.error, OSError) as e:
+            if e.args[0] != errno.EINTR:
+                raise
+            return
+        for offset in range(0, len(data) - 3, 4):
+            pid = struct.unpack('=i', data[offset:offset + 4])[0]
+            self.retire_worker(pid)
+
+    def shutdown(self):
+        """Stops :meth:`serve_forever` and waits until all workers exited.
+        This has to be called from another thread.
+        """
+        self._stopping = True
+        self._stopped.wait()
+
+    def _handle_restart(self, signum, frame):
+        self._restarting = True
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def spawn_worker(self):
+        """Forks a new worker process and returns its pid."""
+        pid = os.fork()
+        if pid:
+            self._workers[pid] = True
+            return pid
+        status = 1
+        try:
+            self.run_worker()
+            status = 0
+        except Exception:
+            import traceback
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    def retire_worker(self, pid):
+        """Replaces a worker with a new one.  The old worker finishes the
+        request it is handling before it exits.
+        """
+        if not self._workers.get(pid):
+            return
+        self._workers[pid] = False
+        self.spawn_worker()
+        self._kill_worker(pid)
+
+    def restart_workers(self):
+        """Replaces all workers with new ones."""
+        for pid, active in list(self._workers.items()):
+            if active:
+                self.retire_worker(pid)
+
+    def reap_workers(self):
+        """Collects exited workers and replaces them unless they were
+        retired or the server is stopping.  Only the workers are waited
+        for, other child processes of the application are left alone.
+        """
+        for pid in list(self._workers):
+            try:
+                exited = os.waitpid(pid, os.WNOHANG)[0]
+            except OSError:
+                exited = pid
+            if exited and self._workers.pop(pid) and not self._stopping:
+                self.spawn_worker()
+
+    def stop_workers(self):
+        """Tells all workers to stop and waits until they exited."""
+        for pid in list(self._workers):
+            self._kill_worker(pid)
+        for pid in list(self._workers):
+            try:
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+            self._workers.pop(pid, None)
+
+    def _kill_worker(self, pid):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+    def run_worker(self):
+        """The accept loop of a worker process.  It returns once the
+        master told the worker to stop.
+        """
+        self._workers = {}
+        self._stopping = False
+        for sig in signal.SIGHUP, signal.SIGTERM, signal.SIGINT:
+            signal.signal(sig, self._handle_stop)
+        os.close(self._retire_pipe[0])
+        if self.reuse_port:
+            self.socket.close()
+            self.socket = self._make_worker_socket()
+        self.socket.setblocking(0)
+        self._requests_handled = 0
+        retiring = False
+        while not self._stopping:
+            # keep accepting until the replacement is running, with
+            # SO_REUSEPORT connections would be refused otherwise.
+            if self.max_requests and not retiring and \
+               self._requests_handled >= self.max_requests:
+                os.write(self._retire_pipe[1], struct.pack('=i', os.getpid()))
+                retiring = True
+            try:
+                ready = select.select([self], [], [], self.poll_interval)[0]
+            except (select.error, OSError) as e:
+                if e.args[0] != errno.EINTR:
+                    raise
+                continue
+            if ready:
+                self._handle_request_noblock()
+        if self.reuse_port:
+            # connections in the queue of our own socket are reset when
+            # it's closed, handle them first.
+            for x in range(self.request_queue_size):
+                if not select.select([self], [], [], 0)[0]:
+                    break
+                self._handle_request_noblock()
+        self.server_close()
+
+    def _make_worker_socket(self):
+        sock = socket.socket(self.address_family, self.socket_type)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(self.server_address)
+        sock.listen(self.request_queue_size)
+        if self.ssl_context is not None:
+            from OpenSSL import tsafe
+            sock = tsafe.Connection(self.ssl_context, sock)
+        return sock
+
+
 def make_server(host, port, app=None, threaded=False, processes=1,
                 request_handler=None, passthrough_errors=False,
-                ssl_context=None):
+                ssl_context=None, keep_alive=False, pool_size=None,
+                pool_backlog=None, pool_overload='block', prefork=False,
+                max_requests=0, reuse_port=False):
     """Create a new server instance that is either threaded, or forks
-    or just processes one request after another.
+    or just processes one request after another.  If a `pool_size` is
+    given the server handles requests with a :class:`PooledWSGIServer`
+    of that many threads.  If `prefork` is enabled a
+    :class:`PreforkWSGIServer` with `processes` workers is created.
+
+    .. versionchanged:: 0.9
+       The `keep_alive`, `pool_*`, `prefork`, `max_requests` and
+       `reuse_port` parameters were added.
     """
-    if threaded and processes > 1:
+    if (threaded or pool_size) and (processes > 1 or prefork):
         raise ValueError("cannot have a multithreaded and "
                          "multi process server.")
+    elif prefork:
+        return PreforkWSGIServer(host, port, app, processes, request_handler,
+                                 passthrough_errors, ssl_context, keep_alive,
+                                 max_requests, reuse_port)
+    elif pool_size:
+        return PooledWSGIServer(host, port, app, pool_size, request_handler,
+                                passthrough_errors, ssl_context, keep_alive,
+                                pool_backlog, pool_overload)
     elif threaded:
         return ThreadedWSGIServer(host, port, app, request_handler,
-                                  passthrough_errors, ssl_context)
+                                  passthrough_errors, ssl_context,
+                                  keep_alive)
     elif processes > 1:
         return ForkingWSGIServer(host, port, app, processes, request_handler,
-                                 passthrough_errors, ssl_context)
+                                 passthrough_errors, ssl_context, keep_alive)
     else:
         return BaseWSGIServer(host, port, app, request_handler,
-                              passthrough_errors, ssl_context)
+                              passthrough_errors, ssl_context, keep_alive)
 
 
 def _iter_module_files():
@@ -623,7 +1303,9 @@ def run_simple(hostname, port, application, use_reloader=False,
                use_debugger=False, use_evalex=True,
                extra_files=None, reloader_interval=1, threaded=False,
                processes=1, request_handler=None, static_files=None,
-               passthrough_errors=False, ssl_context=None):
+               passthrough_errors=False, ssl_context=None, keep_alive=False,
+               pool_size=None, pool_backlog=None, pool_overload='block',
+               prefork=False, max_requests=0, reuse_port=False):
     """Start an application using wsgiref and with an optional reloader.  This
     wraps `wsgiref` to fix the wrong default reporting of the multithreaded
     WSGI variable and adds optional multithreading and fork support.
@@ -644,7 +1326,9 @@ def run_simple(hostname, port, application, use_reloader=False,
        file and private key.
 
     .. versionadded:: 0.9
-       Added command-line interface.
+       Added command-line interface, the `keep_alive` parameter, the
+       `pool_*` parameters for a thread pool and the `prefork`,
+       `max_requests` and `reuse_port` parameters.
 
     :param hostname: The host for the application.  eg: ``'localhost'``
     :param port: The port for the server.  eg: ``8080``
@@ -678,6 +1362,35 @@ def run_simple(hostname, port, application, use_reloader=False,
                         the string ``'adhoc'`` if the server should
                         automatically create one, or `None` to disable SSL
                         (which is the default).
+    :param keep_alive: if set to `True` the server speaks HTTP/1.1 and keeps
+                       connections open for further requests.  Responses
+                       without a content length are sent with chunked
+                       transfer encoding.  The idle timeout and the maximum
+                       number of requests per connection can be configured
+                       on the request handler.  As a connection occupies
+                       the server while it's open this should be combined
+                       with `threaded` or `processes`.
+    :param pool_size: if set, handle requests with a fixed pool of this
+                      many threads instead of a new thread per connection.
+                      Persistent connections are closed early if other
+                      connections wait for a thread, see
+                      :class:`PooledWSGIServer`.
+    :param pool_backlog: the number of accepted connections that can wait
+                         for a free thread of the pool.  Defaults to 128.
+    :param pool_overload: what to do with a connection if the backlog of
+                          the pool is full.  ``'block'`` (the default)
+                          stops accepting connections until there is room,
+                          ``'reject'`` responds with ``503 Service
+                          Unavailable``.
+    :param prefork: if set to `True`, fork `processes` long-lived workers
+                    at startup instead of a new process per request.
+    :param max_requests: the number of requests after which a pre-forked
+                         worker is replaced by a new one.  `0` (the
+                         default) means workers are never recycled.  The
+                         requests of a persistent connection are counted
+                         when it's closed.
+    :param reuse_port: if set to `True`, every pre-forked worker listens on
+                       its own socket with ``SO_REUSEPORT``.
     """
     if use_debugger:
         from werkzeug.debug import DebuggedApplication
@@ -689,7 +1402,10 @@ def run_simple(hostname, port, application, use_reloader=False,
     def inner():
         make_server(hostname, port, application, threaded,
                     processes, request_handler,
-                    passthrough_errors, ssl_context).serve_forever()
+                    passthrough_errors, ssl_context,
+                    keep_alive, pool_size, pool_backlog,
+                    pool_overload, prefork, max_requests,
+                    reuse_port).serve_forever()
 
     if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
         display_hostname = hostname != '*' and hostname or 'localhost'
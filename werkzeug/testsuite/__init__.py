@@ -88,6 +88,7 @@ class _ExceptionCatcher(object):
                                 exception_name)
         elif not issubclass(exc_type, self.exc_type):
             six.reraise(exc_type, exc_value, tb)
+        self.exception = exc_value
         return True
 
 
@@ -30,6 +30,117 @@ except ImportError:
     redis = None
 
 
+def _encode(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode('ascii')
+
+
+class FakeClient(object):
+    """A fake cache client that counts the round trips to the server.
+    The commands are the methods with a ``_cmd_`` prefix.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        command = getattr(self, '_cmd_' + name)
+        def call(*args):
+            self.round_trips += 1
+            return command(*args)
+        return call
+
+
+class FakeRedis(FakeClient):
+
+    def pipeline(self):
+        return FakeRedisPipeline(self)
+
+    def _cmd_get(self, key):
+        return self.data.get(key)
+
+    def _cmd_mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def _cmd_setex(self, key, value, timeout):
+        self.data[key] = _encode(value)
+
+    def _cmd_setnx(self, key, value):
+        if key in self.data:
+            return False
+        self.data[key] = _encode(value)
+        return True
+
+    def _cmd_expire(self, key, timeout):
+        return key in self.data
+
+    def _cmd_delete(self, *keys):
+        return len([self.data.pop(key) for key in keys if key in self.data])
+
+    def _cmd_incr(self, key, delta=1):
+        value = int(self.data.get(key, 0)) + delta
+        self.data[key] = _encode(value)
+        return value
+
+    def _cmd_decr(self, key, delta=1):
+        return self._cmd_incr(key, -delta)
+
+
+class FakeRedisPipeline(object):
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.client, '_cmd_' + name)
+        def queue(*args):
+            self.commands.append((command, args))
+        return queue
+
+    def execute(self):
+        self.client.round_trips += 1
+        return [command(*args) for command, args in self.commands]
+
+
+class FakeMemcache(FakeClient):
+
+    def _cmd_get(self, key):
+        return self.data.get(key)
+
+    def _cmd_get_multi(self, keys):
+        return dict((key, self.data[key]) for key in keys
+                    if key in self.data)
+
+    def _cmd_set(self, key, value, timeout):
+        self.data[key] = value
+
+    def _cmd_set_multi(self, mapping, timeout):
+        self.data.update(mapping)
+
+    def _cmd_add(self, key, value, timeout):
+        self.data.setdefault(key, value)
+
+    def _cmd_delete(self, key):
+        self.data.pop(key, None)
+
+    def _cmd_delete_multi(self, keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def _cmd_incr(self, key, delta):
+        if key in self.data:
+            self.data[key] += delta
+            return self.data[key]
+
+    def _cmd_decr(self, key, delta):
+        return self._cmd_incr(key, -delta)
+
+
 class SimpleCacheTestCase(WerkzeugTestCase):
 
     def test_get_dict(self):
@@ -49,6 +160,202 @@ class SimpleCacheTestCase(WerkzeugTestCase):
         c.set_many((i, i*i) for i in xrange(3))
         assert c.get(2) == 4
 
+    def test_serializer(self):
+        value = {'foo': ['bar']}
+        for serializer in 'pickle', 'copy', None:
+            c = cache.SimpleCache(serializer=serializer)
+            c.set('value', value)
+            c.set('number', 42)
+            c.add('string', u'foo')
+            assert c.get('value') == value
+            assert c.get('number') == 42
+            assert c.get('string') == u'foo'
+            if serializer is None:
+                assert c.get('value') is value
+            else:
+                c.get('value')['foo'].append('baz')
+                value['spam'] = 'eggs'
+                assert c.get('value') == {'foo': ['bar']}
+                del value['spam']
+        self.assert_raises(ValueError, cache.SimpleCache, serializer='json')
+
+    def test_pipeline(self):
+        c = cache.SimpleCache()
+        with c.pipeline() as pipe:
+            pipe.set('foo', 'bar')
+            pipe.inc('counter')
+            pipe.get_many('foo', 'counter')
+        assert pipe.results == [None, None, ['bar', 1]]
+        try:
+            with c.pipeline() as pipe:
+                pipe.set('foo', 'baz')
+                1/0
+        except ZeroDivisionError:
+            pass
+        assert pipe.results is None
+        assert c.get('foo') == 'bar'
+
+
+class LRUCacheTestCase(WerkzeugTestCase):
+
+    def test_get_set(self):
+        c = cache.LRUCache()
+        c.set('foo', ['bar'])
+        assert c.get('foo') == ['bar']
+        assert c.get('missing') is None
+        c.add('foo', 'baz')
+        assert c.get('foo') == ['bar']
+        c.delete('foo')
+        assert c.get('foo') is None
+        c.add('foo', 'baz')
+        assert c.get('foo') == 'baz'
+        c.clear()
+        assert c.get('foo') is None
+
+    def test_evict_least_recently_used(self):
+        c = cache.LRUCache(threshold=3)
+        for key in 'abc':
+            c.set(key, key)
+        assert c.get('a') == 'a'
+        c.set('d', 'd')
+        assert c.get('b') is None
+        c.set('c', 'c')
+        c.set('e', 'e')
+        assert list(c.get_many('a', 'c', 'd', 'e')) == [None, 'c', 'd', 'e']
+        stats = c.get_stats()
+        assert stats['size'] == 3
+        assert stats['evictions'] == 2
+        assert stats['hits'] == 4
+        assert stats['misses'] == 2
+
+    def test_expire(self):
+        c = cache.LRUCache(threshold=3)
+        c.set('a', 'a', -1)
+        assert c.get('a') is None
+        c.set('b', 'b', 100)
+        c.set('c', 'c', -1)
+        c.set('d', 'd', 100)
+        c.set('e', 'e', 100)
+        # the expired item goes first, even if it's not the oldest
+        assert list(c.get_many('b', 'c', 'd', 'e')) == ['b', None, 'd', 'e']
+        stats = c.get_stats()
+        assert stats['expirations'] == 2
+        assert stats['evictions'] == 0
+
+    def test_inc_dec(self):
+        c = cache.LRUCache(threadsafe=True)
+        assert c.inc('foo') == 1
+        assert c.inc('foo', 5) == 6
+        assert c.dec('foo', 2) == 4
+        assert c.get('foo') == 4
+
+    def test_threadsafe(self):
+        from threading import Thread
+        c = cache.LRUCache(threshold=50, threadsafe=True)
+        def worker():
+            for x in range(1000):
+                c.set(x % 100, x)
+                c.get(x % 73)
+                c.inc('counter')
+        threads = [Thread(target=worker) for x in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert c.get('counter') == 4000
+        assert c.get_stats()['size'] <= 50
+
+
+class SharedMemoryCacheTestCase(WerkzeugTestCase):
+
+    def setup(self):
+        self.caches = []
+
+    def teardown(self):
+        for c in self.caches:
+            c.close()
+
+    def make_cache(self, *args, **kwargs):
+        c = cache.SharedMemoryCache(*args, **kwargs)
+        self.caches.append(c)
+        return c
+
+    def test_get_set(self):
+        c = self.make_cache()
+        c.set('foo', ['bar'])
+        c.set(u'fööbar', 42)
+        assert c.get('foo') == ['bar']
+        assert c.get(u'fööbar') == 42
+        assert c.get('missing') is None
+        c.add('foo', 'baz')
+        assert c.get('foo') == ['bar']
+        c.delete('foo')
+        assert c.get('foo') is None
+        c.add('foo', 'baz')
+        assert c.get('foo') == 'baz'
+        c.set('foo', 'x' * 2000)
+        assert c.get('foo') is None
+        c.set('bar', 'bar', -1)
+        assert c.get('bar') is None
+        stats = c.get_stats()
+        assert stats['hits'] == 4
+        assert stats['misses'] == 4
+        c.clear()
+        assert c.get(u'fööbar') is None
+        assert c.get_stats()['hits'] == 0
+
+    def test_inc_dec(self):
+        c = self.make_cache()
+        assert c.inc('foo') == 1
+        assert c.inc('foo', 5) == 6
+        assert c.dec('foo', 2) == 4
+        assert c.get('foo') == 4
+        c.set('bar', 1.5)
+        assert c.inc('bar') == 2.5
+
+    def test_evict_least_recently_used(self):
+        c = self.make_cache(capacity=8)
+        for x in range(8):
+            c.set(str(x), x)
+        for x in range(1, 8):
+            assert c.get(str(x)) == x
+        c.set('8', 8)
+        assert c.get('0') is None
+        assert c.get('8') == 8
+        assert c.get_stats()['evictions'] == 1
+
+    def test_shared(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp_dir, 'cache')
+            c = self.make_cache(filename)
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    for x in range(100):
+                        c.inc('counter')
+                    c.set('child', 'value')
+                finally:
+                    os._exit(0)
+            for x in range(100):
+                c.inc('counter')
+            os.waitpid(pid, 0)
+            assert c.get('child') == 'value'
+            assert c.get('counter') == 200
+            c.close()
+            c = self.make_cache(filename, capacity=16)
+            assert c.get('child') == 'value'
+
+            # files that are not a cache are not overwritten
+            filename = os.path.join(tmp_dir, 'other')
+            with open(filename, 'wb') as f:
+                f.write(b'important data')
+            self.assert_raises(ValueError, cache.SharedMemoryCache, filename)
+            with open(filename, 'rb') as f:
+                assert f.read() == b'important data'
+        finally:
+            shutil.rmtree(tmp_dir)
+
 
 class FileSystemCacheTestCase(WerkzeugTestCase):
 
@@ -64,29 +371,146 @@ class FileSystemCacheTestCase(WerkzeugTestCase):
         finally:
             shutil.rmtree(tmp_dir)
 
+    def list_files(self, tmp_dir):
+        return [os.path.join(dirpath, fn)
+                for dirpath, dirnames, filenames in os.walk(tmp_dir)
+                for fn in filenames]
+
     def test_filesystemcache_prune(self):
         THRESHOLD = 13
         tmp_dir = tempfile.mkdtemp()
         c = cache.FileSystemCache(cache_dir=tmp_dir, threshold=THRESHOLD)
         for i in range(2 * THRESHOLD):
-            c.set(str(i), i)
-        cache_files = os.listdir(tmp_dir)
-        shutil.rmtree(tmp_dir)
+            c.set(str(i), i, 100 + i)
+        cache_files = self.list_files(tmp_dir)
         assert len(cache_files) <= THRESHOLD
+        # the items that expire last are kept
+        assert c.get(str(2 * THRESHOLD - 1)) == 2 * THRESHOLD - 1
+        assert c.get('0') is None
+        shutil.rmtree(tmp_dir)
 
+    def test_filesystemcache_amortized_prune(self):
+        tmp_dir = tempfile.mkdtemp()
+        c = cache.FileSystemCache(cache_dir=tmp_dir, threshold=100)
+        c.set_many((str(i), i) for i in range(105))
+        assert len(self.list_files(tmp_dir)) == 100
+        for i in range(9):
+            c.set('new%d' % i, i)
+        assert len(self.list_files(tmp_dir)) == 109
+        c.set('new9', 9)
+        assert len(self.list_files(tmp_dir)) == 100
+        shutil.rmtree(tmp_dir)
+
+    def test_filesystemcache_layout(self):
+        tmp_dir = tempfile.mkdtemp()
+        c = cache.FileSystemCache(cache_dir=tmp_dir)
+        c.set('foo', 'bar', 60)
+        fname, = self.list_files(tmp_dir)
+        assert os.path.basename(os.path.dirname(fname)) == \
+            os.path.basename(fname)[:2]
+        assert abs(os.stat(fname).st_mtime - time.time() - 60) < 5
+        # files of older versions are ignored and pruned
+        with open(os.path.join(tmp_dir, 'legacy'), 'wb') as f:
+            f.write(b'J\x00\x00\x00\x00.')
+        assert len(self.list_files(tmp_dir)) == 2
+        c._prune()
+        assert self.list_files(tmp_dir) == [fname]
+        shutil.rmtree(tmp_dir)
+
+    def test_filesystemcache_many(self):
+        tmp_dir = tempfile.mkdtemp()
+        c = cache.FileSystemCache(cache_dir=tmp_dir)
+        c.set_many({'foo': 'bar', 'spam': ['eggs']})
+        assert c.get_many('foo', 'missing', 'spam') == \
+            ['bar', None, ['eggs']]
+        c.set('old', 'value', -1)
+        assert c.get_many('old') == [None]
+        shutil.rmtree(tmp_dir)
 
     def test_filesystemcache_clear(self):
         tmp_dir = tempfile.mkdtemp()
         c = cache.FileSystemCache(cache_dir=tmp_dir)
         c.set('foo', 'bar')
-        cache_files = os.listdir(tmp_dir)
+        cache_files = self.list_files(tmp_dir)
         assert len(cache_files) == 1
         c.clear()
-        cache_files = os.listdir(tmp_dir)
+        cache_files = self.list_files(tmp_dir)
         assert len(cache_files) == 0
         shutil.rmtree(tmp_dir)
 
 
+class RedisPipelineTestCase(WerkzeugTestCase):
+
+    def test_bulk_operations(self):
+        client = FakeRedis()
+        c = cache.RedisCache(client, key_prefix='prefix:')
+        c.set_many({'foo': 'bar', 'spam': ['eggs'], 'number': 42})
+        assert client.round_trips == 1
+        assert c.get_many('foo', 'spam', 'number', 'missing') == \
+            ['bar', ['eggs'], 42, None]
+        assert client.round_trips == 2
+        c.delete_many('foo', 'spam')
+        assert client.round_trips == 3
+        assert c.get_dict('foo', 'number') == {'foo': None, 'number': 42}
+
+    def test_pipeline(self):
+        client = FakeRedis()
+        c = cache.RedisCache(client, key_prefix='prefix:')
+        with c.pipeline() as pipe:
+            pipe.set('foo', 'bar')
+            pipe.set_many({'spam': 'eggs'}, 60)
+            pipe.inc('counter', 5)
+            pipe.dec('counter')
+            pipe.get('foo')
+            pipe.get_many('foo', 'spam')
+            pipe.add('new', 'value')
+            pipe.get_dict('new')
+            pipe.delete('foo')
+            pipe.get('foo')
+        assert pipe.results == [None, None, 5, 4, 'bar', ['bar', 'eggs'],
+                                None, {'new': 'value'}, None, None]
+        # one transaction before and after add, which needs setnx and
+        # expire.
+        assert client.round_trips == 4
+        assert len(pipe) == 0
+        assert pipe.execute() == []
+        assert client.round_trips == 4
+
+
+class MemcachedCacheTestCase(WerkzeugTestCase):
+
+    def test_bulk_operations(self):
+        client = FakeMemcache()
+        c = cache.MemcachedCache(client, key_prefix='prefix:')
+        c.set_many({'foo': 'bar', u'spam': ['eggs']})
+        assert client.round_trips == 1
+        assert c.get_many('foo', u'spam', 'missing', 'x' * 300) == \
+            ['bar', ['eggs'], None, None]
+        assert client.round_trips == 2
+        c.delete_many('foo', 'spam')
+        assert client.round_trips == 3
+        assert client.data == {}
+
+    def test_pipeline(self):
+        client = FakeMemcache()
+        c = cache.MemcachedCache(client)
+        with c.pipeline() as pipe:
+            pipe.set('foo', 'bar')
+            pipe.set('spam', 'eggs')
+            pipe.set('counter', 1, 60)
+            pipe.inc('counter', 2)
+            pipe.get('foo')
+            pipe.get('spam')
+            pipe.get('missing')
+            pipe.delete('foo')
+            pipe.delete('spam')
+            pipe.get('foo')
+        assert pipe.results == [None, None, None, 3, 'bar', 'eggs', None,
+                                None, None, None]
+        # set_multi, set, incr, get_multi, delete_multi, get
+        assert client.round_trips == 6
+
+
 class RedisCacheTestCase(WerkzeugTestCase):
 
     def make_cache(self):
@@ -167,7 +591,12 @@ class RedisCacheTestCase(WerkzeugTestCase):
 def suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(SimpleCacheTestCase))
+    suite.addTest(unittest.makeSuite(LRUCacheTestCase))
+    if cache.fcntl is not None:
+        suite.addTest(unittest.makeSuite(SharedMemoryCacheTestCase))
     suite.addTest(unittest.makeSuite(FileSystemCacheTestCase))
+    suite.addTest(unittest.makeSuite(RedisPipelineTestCase))
+    suite.addTest(unittest.makeSuite(MemcachedCacheTestCase))
     if redis is not None:
         suite.addTest(unittest.makeSuite(RedisCacheTestCase))
     return suite
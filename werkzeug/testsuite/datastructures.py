@@ -542,6 +542,33 @@ class HeadersTestCase(WerkzeugTestCase):
             with self.assert_raises(ValueError):
                 h.set('foo', 'test', option=variation)
 
+    def test_index_updates(self):
+        h = self.storage_class([('X-Foo', '1'), ('Content-Type', 'text/plain')])
+        self.assert_equal(h['x-foo'], '1')
+        h.add('x-FOO', '2')
+        self.assert_equal(h.getlist('X-Foo'), ['1', '2'])
+        h.set('content-type', 'text/html')
+        self.assert_equal(h['Content-Type'], 'text/html')
+        del h[0]
+        self.assert_equal(h.getlist('x-foo'), ['2'])
+        h[0] = ('X-Bar', '3')
+        assert 'content-type' not in h
+        self.assert_equal(h['x-bar'], '3')
+        h.set('X-Foo', '4')
+        h.add('x-foo', '5')
+        h.set('x-foo', '6')
+        self.assert_equal(h.to_list(), [('X-Bar', '3'), ('x-foo', '6')])
+        h.pop()
+        assert 'x-foo' not in h
+        h.clear()
+        assert 'x-bar' not in h
+
+        headerlist = [('Content-Type', 'text/plain')]
+        h = self.storage_class.linked(headerlist)
+        self.assert_equal(h['content-type'], 'text/plain')
+        headerlist[0] = ('Content-Type', 'text/html')
+        self.assert_equal(h['content-type'], 'text/html')
+
 
 class EnvironHeadersTestCase(WerkzeugTestCase):
     storage_class = datastructures.EnvironHeaders
@@ -568,6 +595,25 @@ class EnvironHeadersTestCase(WerkzeugTestCase):
         assert not self.storage_class({'wsgi.version': (1, 0)})
         assert len(self.storage_class({'wsgi.version': (1, 0)})) == 0
 
+    def test_environ_changes(self):
+        environ = {'HTTP_ACCEPT': '*', 'wsgi.version': (1, 0)}
+        headers = self.storage_class(environ)
+        self.assert_equal(list(headers), [('Accept', '*')])
+        environ['HTTP_ACCEPT'] = 'text/html'
+        self.assert_equal(list(headers), [('Accept', 'text/html')])
+        environ['HTTP_X_FOO'] = 'bar'
+        self.assert_equal(len(headers), 2)
+        self.assert_equal(headers['x-foo'], 'bar')
+        # same number of keys but a different header
+        del environ['wsgi.version']
+        environ['CONTENT_TYPE'] = 'text/plain'
+        self.assert_equal(sorted(headers), [('Accept', 'text/html'),
+                                            ('Content-Type', 'text/plain'),
+                                            ('X-Foo', 'bar')])
+        del environ['HTTP_ACCEPT']
+        assert 'accept' not in headers
+        self.assert_equal(len(headers), 2)
+
 
 class HeaderSetTestCase(WerkzeugTestCase):
     storage_class = datastructures.HeaderSet
@@ -11,6 +11,7 @@
 
 from __future__ import with_statement
 
+import base64
 import unittest
 from io import BytesIO
 from os.path import join, dirname
@@ -335,6 +336,120 @@ class MultiPartTestCase(WerkzeugTestCase):
                                      method='POST')
         self.assert_equal(req.form['test'], u'Sk\xe5ne l\xe4n')
 
+    def test_chunk_boundaries(self):
+        contents = b'line\r\n\n--foo-not-a-boundary\r\n--fo\r' * 100
+        data = (b'--foo\r\n'
+                b'Content-Disposition: form-data; name="test"; filename="t"\r\n'
+                b'\r\n' + contents + b'\r\n'
+                b'--foo\r\n'
+                b'Content-Disposition: form-data; name="field"\r\n'
+                b'\r\n'
+                b'value\r\n'
+                b'--foo--\r\n')
+        for chunk_size in 1, 2, 3, 7, 1024:
+            chunks = [data[x:x + chunk_size]
+                      for x in range(0, len(data), chunk_size)]
+            parser = formparser.MultiPartParser(
+                formparser.default_stream_factory)
+            form, files = parser.parse(iter(chunks), 'foo', len(data))
+            self.assert_equal(files['test'].read(), contents)
+            self.assert_equal(form['field'], 'value')
+
+    def test_transfer_encoded_chunks(self):
+        contents = bytes(bytearray(range(256))) * 20
+        writes = []
+
+        class RecordingStream(BytesIO):
+            def write(self, data):
+                writes.append(len(data))
+                return BytesIO.write(self, data)
+
+        def stream_factory(*args):
+            return RecordingStream()
+
+        encoded = base64.b64encode(contents)
+        encoded = b'\r\n'.join(encoded[x:x + 76]
+                                for x in range(0, len(encoded), 76))
+        data = (b'--foo\r\n'
+                b'Content-Disposition: form-data; name="test"; filename="t"\r\n'
+                b'Content-Transfer-Encoding: base64\r\n'
+                b'\r\n' + encoded + b'\r\n'
+                b'--foo\r\n'
+                b'Content-Disposition: form-data; name="field"\r\n'
+                b'Content-Transfer-Encoding: quoted-printable\r\n'
+                b'\r\n'
+                b'caf=C3=A9 au=\r\n lait\r\n'
+                b'--foo--\r\n')
+        for chunk_size in 1, 3, 7, 1024:
+            del writes[:]
+            chunks = [data[x:x + chunk_size]
+                      for x in range(0, len(data), chunk_size)]
+            parser = formparser.MultiPartParser(stream_factory)
+            form, files = parser.parse(iter(chunks), 'foo', len(data))
+            self.assert_equal(files['test'].read(), contents)
+            self.assert_equal(form['field'], u'caf\xe9 au lait')
+            self.assertTrue(max(writes) < len(contents))
+
+    def test_decoder_events(self):
+        data = (b'--foo\r\n'
+                b'Content-Disposition: form-data; name="a"\r\n'
+                b'\r\n'
+                b'first\r\nvalue\r\n'
+                b'--foo\r\n'
+                b'Content-Disposition: form-data; name="b"\r\n'
+                b'\r\n'
+                b'\r\n'
+                b'--foo--\r\nepilogue')
+        for chunk_size in 1, 5, 1024:
+            decoder = formparser.MultiPartDecoder('foo')
+            events = []
+            for x in range(0, len(data), chunk_size):
+                events.extend(decoder.feed(data[x:x + chunk_size]))
+            assert decoder.complete
+            events.extend(decoder.close())
+            parts = []
+            for event, value in events:
+                if event == 'headers':
+                    parts.append([value['content-disposition'], b''])
+                elif event == 'data':
+                    parts[-1][1] += value
+                else:
+                    self.assert_equal(event, 'end')
+            self.assert_equal(parts, [
+                ['form-data; name="a"', b'first\r\nvalue'],
+                ['form-data; name="b"', b'']
+            ])
+
+        decoder = formparser.MultiPartDecoder('foo')
+        decoder.feed(b'--foo\r\nContent-Type: text/plain\r\n\r\ndata')
+        self.assert_raises(ValueError, decoder.close)
+
+    def test_streaming_parser(self):
+        sizes = []
+
+        class CountingParser(formparser.MultiPartParser):
+            def on_part_begin(self, headers):
+                sizes.append(0)
+            def on_part_data(self, data):
+                sizes[-1] += len(data)
+            def on_part_end(self):
+                pass
+
+        class StreamingFormDataParser(formparser.FormDataParser):
+            multipart_parser_class = CountingParser
+
+        data = (b'--foo\r\n'
+                b'Content-Disposition: form-data; name="f"; filename="f"\r\n'
+                b'\r\n' + b'x' * 10000 + b'\r\n'
+                b'--foo--\r\n')
+        parser = StreamingFormDataParser(max_form_memory_size=100)
+        stream, form, files = parser.parse(BytesIO(data),
+                                           'multipart/form-data',
+                                           len(data), {'boundary': 'foo'})
+        self.assert_equal(len(form), 0)
+        self.assert_equal(len(files), 0)
+        self.assert_equal(sizes, [10000])
+
 
 class InternalFunctionsTestCase(WerkzeugTestCase):
 
@@ -344,15 +459,6 @@ class InternalFunctionsTestCase(WerkzeugTestCase):
         self.assertEqual(formparser._line_parse(b'foo\r'), (b'foo', True))
         self.assertEqual(formparser._line_parse(b'foo\n'), (b'foo', True))
 
-    def test_find_terminator(self):
-        lineiter = iter('\n\n\nfoo\nbar\nbaz'.splitlines(True))
-        find_terminator = formparser.MultiPartParser()._find_terminator
-        line = find_terminator(lineiter)
-        assert line == 'foo'
-        assert list(lineiter) == ['bar\n', 'baz']
-        assert find_terminator([]) == ''
-        assert find_terminator(['']) == ''
-
 
 def suite():
     suite = unittest.TestSuite()
@@ -640,6 +640,166 @@ class RoutingTestCase(WerkzeugTestCase):
         url = a.build('foobar', {}, force_external=True)
         self.assert_equal(url, 'http://xn--n3h.example.com/foo+bar/')
 
+    def test_trie_rule_matcher(self):
+        make_rules = lambda: [
+            r.Rule('/', endpoint='index'),
+            r.Rule('/foo', endpoint='foo'),
+            r.Rule('/bar/', endpoint='bar'),
+            r.Rule('/bar/<int:id>', endpoint='bar_detail'),
+            r.Rule('/bar/<name>', endpoint='bar_named'),
+            r.Rule('/page-<int:page>', endpoint='page'),
+            r.Rule('/all/', defaults={'page': 1}, endpoint='all'),
+            r.Rule('/all/page/<int:page>', endpoint='all'),
+            r.Rule('/old/<int:id>', endpoint='bar_detail', alias=True),
+            r.Rule('/post', methods=['POST'], endpoint='post'),
+            r.Rule('/<path:wiki>', endpoint='wiki', methods=['GET']),
+            r.Rule('/static/<path:file>', endpoint='static', build_only=True),
+            r.Subdomain('kb', [
+                r.Rule('/', endpoint='kb/index'),
+                r.Rule('/browse/<int:id>/', endpoint='kb/browse')
+            ]),
+            r.Rule('/', subdomain='<user>', endpoint='user/index')
+        ]
+        paths = ['/', '/foo', '/foo/', '/bar', '/bar/', '/bar/42',
+                 '/bar/baz', '/page-3', '/page-x', '/all/', '/all/page/1',
+                 '/all/page/2', '/old/42', '/post', '/missing/path',
+                 '/browse/42', '/browse/42/', '/static/foo.css', '']
+        linear = r.Map(make_rules())
+        trie = r.Map(make_rules(), matcher_class=r.TrieRuleMatcher)
+
+        def outcome(adapter, path, method):
+            try:
+                return adapter.match(path, method)
+            except r.RequestRedirect as e:
+                return 'redirect', e.new_url
+            except r.MethodNotAllowed as e:
+                return 'not allowed', sorted(e.valid_methods)
+            except r.NotFound:
+                return 'not found'
+
+        for subdomain in '', 'kb', 'john':
+            a = linear.bind('example.org', '/', subdomain)
+            b = trie.bind('example.org', '/', subdomain)
+            for path in paths:
+                for method in 'GET', 'POST', 'HEAD', 'PUT':
+                    self.assert_equal(outcome(a, path, method),
+                                      outcome(b, path, method))
+
+        a = trie.bind('example.org', '/')
+        self.assert_equal(a.match('/bar/42'), ('bar_detail', {'id': 42}))
+        self.assert_equal(a.match('/bar/x'), ('bar_named', {'name': 'x'}))
+        self.assert_equal(a.match('/page-3'), ('page', {'page': 3}))
+        self.assert_equal(a.match('/some/page'), ('wiki', {'wiki': 'some/page'}))
+        self.assert_raises(r.MethodNotAllowed, a.match, '/post', 'PUT')
+
+    def test_match_cache(self):
+        map = r.Map([
+            r.Rule('/', endpoint='index'),
+            r.Rule('/foo/', endpoint='foo'),
+            r.Rule('/post', methods=['POST'], endpoint='post'),
+            r.Rule('/user/<int:id>', endpoint='user')
+        ], match_cache_size=2)
+        adapter = map.bind('example.org', '/')
+
+        endpoint, values = adapter.match('/user/42')
+        self.assert_equal((endpoint, values), ('user', {'id': 42}))
+        values['id'] = 23
+        self.assert_equal(adapter.match('/user/42'), ('user', {'id': 42}))
+        info = map.match_cache_info()
+        self.assert_equal((info['hits'], info['misses']), (1, 1))
+
+        for x in range(2):
+            self.assert_raises(r.NotFound, adapter.match, '/missing')
+            self.assert_raises(r.MethodNotAllowed, adapter.match, '/post')
+        for x in '1', '2':
+            with self.assert_raises(r.RequestRedirect) as catcher:
+                adapter.match('/foo', query_args={'x': x})
+            self.assert_equal(catcher.exception.new_url,
+                              'http://example.org/foo/?x=' + x)
+        info = map.match_cache_info()
+        self.assert_equal(info, dict(hits=4, misses=4, size=2, maxsize=2))
+
+        map.add(r.Rule('/missing', endpoint='missing'))
+        self.assert_equal(adapter.match('/missing'), ('missing', {}))
+        self.assert_equal(map.match_cache_info()['misses'], 1)
+
+    def test_precompiled_builders(self):
+        map = r.Map([
+            r.Rule('/', endpoint='index'),
+            r.Rule(u'/s\xfc\xdf', endpoint='umlauts'),
+            r.Rule('/page/<int(max=10):page>', endpoint='page'),
+            r.Rule('/post', endpoint='post', methods=['POST'])
+        ])
+        adapter = map.bind('example.org', '/')
+        self.assert_equal(adapter.build('index'), '/')
+        self.assert_equal(adapter.build('index', {'q': 'x'}), '/?q=x')
+        self.assert_equal(adapter.build('index'), '/')
+        self.assert_equal(adapter.build('umlauts'), '/s%C3%BC%C3%9F')
+        self.assert_equal(adapter.build('page', {'page': 3}), '/page/3')
+        self.assert_equal(adapter.build('page', {'page': 3, 'x': 'y'}),
+                          '/page/3?x=y')
+        self.assert_equal(adapter.build('post'), '/post')
+        self.assert_raises(r.BuildError, adapter.build, 'page')
+        self.assert_raises(r.BuildError, adapter.build, 'post', method='GET')
+
+    def test_build_many(self):
+        map = r.Map([
+            r.Rule('/', endpoint='index'),
+            r.Rule('/page/<name>', endpoint='page'),
+            r.Rule('/page/<int:id>', endpoint='page'),
+            r.Subdomain('kb', [r.Rule('/<int:id>', endpoint='kb')])
+        ])
+        adapter = map.bind('example.org', '/app')
+        values = [{'id': 1}, {'name': 'foo', 'x': 'y'}, {'name': '..'},
+                  {'id': 2, 'name': None}]
+        for kwargs in {}, {'force_external': True}, {'append_unknown': False}:
+            self.assert_equal(adapter.build_many('page', values, **kwargs),
+                              [adapter.build('page', x, **kwargs)
+                               for x in values])
+        self.assert_equal(adapter.build_many('page', values)[:2],
+                          ['/app/page/1', '/app/page/foo?x=y'])
+        self.assert_equal(adapter.build_many('kb', iter([{'id': 1}])),
+                          ['http://kb.example.org/app/1'])
+        self.assert_equal(adapter.build_many('index', []), [])
+        self.assert_raises(r.BuildError, adapter.build_many, 'page',
+                           [{'id': 1}, {}])
+
+        # dot segments in the script name are resolved
+        adapter = map.bind('example.org', '/app/../x')
+        self.assert_equal(adapter.build('page', {'id': 1}), '/x/page/1')
+        self.assert_equal(adapter.build_many('page', [{'id': 1}]),
+                          ['/x/page/1'])
+
+    def test_rules_sharing_a_pattern(self):
+        map = r.Map([
+            r.Rule('/item/<int:id>', methods=['GET'], endpoint='show'),
+            r.Rule('/item/<int:id>', methods=['PUT'], endpoint='update',
+                   defaults={'partial': False}),
+            r.Rule('/item/<int(max=9):id>', methods=['DELETE'],
+                   endpoint='delete'),
+            r.Rule('/list/', methods=['GET'], endpoint='list'),
+            r.Rule('/list/', methods=['POST'], endpoint='create')
+        ])
+        adapter = map.bind('example.org', '/')
+        self.assert_equal(adapter.match('/item/42', 'GET'),
+                          ('show', {'id': 42}))
+        self.assert_equal(adapter.match('/item/42', 'HEAD'),
+                          ('show', {'id': 42}))
+        self.assert_equal(adapter.match('/item/42', 'PUT'),
+                          ('update', {'id': 42, 'partial': False}))
+        self.assert_equal(adapter.match('/item/4', 'DELETE'),
+                          ('delete', {'id': 4}))
+        try:
+            adapter.match('/item/42', 'DELETE')
+        except r.MethodNotAllowed as e:
+            self.assert_equal(sorted(e.valid_methods),
+                              ['GET', 'HEAD', 'PUT'])
+        else:
+            self.fail('Expected method not allowed')
+        self.assert_equal(adapter.match('/list/', 'POST'), ('create', {}))
+        self.assert_raises(r.RequestRedirect, adapter.match, '/list', 'POST')
+
+
 def suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(RoutingTestCase))
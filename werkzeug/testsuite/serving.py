@@ -10,6 +10,7 @@
 """
 import sys
 import time
+import socket
 import urllib
 from six.moves import http_client as httplib
 import unittest
@@ -43,7 +44,7 @@ def silencestderr(f):
     return update_wrapper(new_func, f)
 
 
-def run_dev_server(application):
+def run_dev_server(application, **kwargs):
     servers = []
     def tracking_make_server(*args, **kwargs):
         srv = real_make_server(*args, **kwargs)
@@ -51,7 +52,8 @@ def run_dev_server(application):
         return srv
     serving.make_server = tracking_make_server
     try:
-        t = Thread(target=serving.run_simple, args=('localhost', 0, application))
+        t = Thread(target=serving.run_simple,
+                   args=('localhost', 0, application), kwargs=kwargs)
         t.setDaemon(True)
         t.start()
         time.sleep(0.25)
@@ -100,6 +102,312 @@ class ServingTestCase(WerkzeugTestCase):
         res = conn.getresponse()
         self.assertEqual(res.read(), b'YES')
 
+    @silencestderr
+    def test_buffered_response(self):
+        chunks = [b'chunk %d\n' % x if six.PY3 else 'chunk %d\n' % x
+                  for x in range(100)]
+        body = b''.join(chunks)
+        def list_app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain'),
+                                      ('X-Foo', 'bar')])
+            if environ['PATH_INFO'] == '/generator':
+                return iter(chunks)
+            return chunks
+
+        server, addr = run_dev_server(list_app)
+        for path in '/list', '/generator':
+            conn = httplib.HTTPConnection(addr)
+            conn.request('GET', path)
+            res = conn.getresponse()
+            self.assertEqual(res.getheader('X-Foo'), 'bar')
+            self.assertEqual(res.read(), body)
+            conn.close()
+
+    @silencestderr
+    def test_file_wrapper(self):
+        from tempfile import TemporaryFile
+        from io import BytesIO
+        from werkzeug.wsgi import wrap_file
+        body = b'x' * 100000 + b'y' * 1000
+        def file_app(environ, start_response):
+            assert environ['wsgi.file_wrapper'] is serving.SendfileWrapper
+            if environ['PATH_INFO'] == '/bytesio':
+                f = BytesIO(body)
+            else:
+                f = TemporaryFile()
+                f.write(body)
+                f.seek(1000)
+            headers = [('Content-Type', 'text/plain')]
+            if environ['PATH_INFO'] == '/limited':
+                headers.append(('Content-Length', '100'))
+            start_response('200 OK', headers)
+            return wrap_file(environ, f)
+
+        server, addr = run_dev_server(file_app)
+        for path, expected in [('/file', body[1000:]),
+                               ('/limited', body[1000:1100]),
+                               ('/bytesio', body)]:
+            conn = httplib.HTTPConnection(addr)
+            conn.request('GET', path)
+            res = conn.getresponse()
+            self.assertEqual(res.read(), expected)
+            conn.close()
+
+        handler = server.RequestHandlerClass.__new__(server.RequestHandlerClass)
+        handler.server = server
+        handler.connection = server.socket
+        for mode, expected in ('w+b', True), ('w+', False):
+            f = TemporaryFile(mode)
+            try:
+                self.assert_equal(handler.can_sendfile(f),
+                                  hasattr(server.socket, 'sendfile') and
+                                  expected)
+            finally:
+                f.close()
+
+    @silencestderr
+    def test_keep_alive(self):
+        def app(environ, start_response):
+            headers = [('Content-Type', 'text/plain')]
+            if environ['PATH_INFO'] == '/length':
+                port = force_bytes(str(environ['REMOTE_PORT']))
+                headers.append(('Content-Length', str(len(port))))
+                start_response('200 OK', headers)
+                return [port]
+            start_response('200 OK', headers)
+            rv = [b'foo', b'', b'bar']
+            if environ['REQUEST_METHOD'] == 'POST':
+                rv.append(environ['wsgi.input'].read(2))
+            return iter(rv)
+
+        server, addr = run_dev_server(app, threaded=True, keep_alive=True)
+        conn = httplib.HTTPConnection(addr)
+        ports = set()
+        for x in range(3):
+            conn.request('GET', '/length')
+            res = conn.getresponse()
+            self.assertEqual(res.getheader('Connection'), None)
+            self.assertEqual(res.getheader('Transfer-Encoding'), None)
+            ports.add(res.read())
+            conn.request('POST', '/chunked', body=b'xxyyzz')
+            res = conn.getresponse()
+            self.assertEqual(res.getheader('Transfer-Encoding'), 'chunked')
+            self.assertEqual(res.read(), b'foobarxx')
+            conn.request('HEAD', '/chunked')
+            res = conn.getresponse()
+            self.assertEqual(res.getheader('Transfer-Encoding'), None)
+            self.assertEqual(res.read(), b'')
+        self.assertEqual(len(ports), 1)
+        conn.close()
+
+        # HTTP/1.0 clients get the old behavior unless they ask for more
+        sock = socket.create_connection(server.socket.getsockname()[:2])
+        sock.sendall(b'GET /chunked HTTP/1.0\r\n\r\n')
+        rv = b''
+        while True:
+            data = sock.recv(1024)
+            if not data:
+                break
+            rv += data
+        self.assertIn(b'Connection: close', rv)
+        self.assert_(rv.endswith(b'\r\n\r\nfoobar'))
+
+    @silencestderr
+    def test_keep_alive_limits(self):
+        handler = type('Handler', (serving.WSGIRequestHandler,), {
+            'keep_alive_timeout': 0.2,
+            'max_keep_alive_requests': 2
+        })
+        def app(environ, start_response):
+            start_response('200 OK', [('Content-Length', '2')])
+            return [b'ok']
+        server, addr = run_dev_server(app, threaded=True, keep_alive=True,
+                                      request_handler=handler)
+
+        sock = socket.create_connection(server.socket.getsockname()[:2])
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n' * 3)
+        rv = b''
+        while True:
+            data = sock.recv(1024)
+            if not data:
+                break
+            rv += data
+        self.assertEqual(rv.count(b'200 OK'), 2)
+        self.assertEqual(rv.count(b'Connection: close'), 1)
+
+        sock = socket.create_connection(server.socket.getsockname()[:2])
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        time.sleep(0.5)
+        rv = b''
+        while True:
+            data = sock.recv(1024)
+            if not data:
+                break
+            rv += data
+        self.assertEqual(rv.count(b'200 OK'), 1)
+
+        # a response header must not keep a connection open that the
+        # server has to close because of the request body.
+        def keep_alive_app(environ, start_response):
+            start_response('200 OK', [('Content-Length', '2'),
+                                      ('Connection', 'keep-alive')])
+            return [b'ok']
+        server, addr = run_dev_server(keep_alive_app, threaded=True,
+                                      keep_alive=True)
+        sock = socket.create_connection(server.socket.getsockname()[:2])
+        sock.sendall(b'POST / HTTP/1.1\r\nHost: localhost\r\n'
+                     b'Transfer-Encoding: chunked\r\n\r\n'
+                     b'2\r\nok\r\n0\r\n\r\n')
+        sock.settimeout(2)
+        rv = b''
+        while True:
+            data = sock.recv(1024)
+            if not data:
+                break
+            rv += data
+        self.assertEqual(rv.count(b'200 OK'), 1)
+
+    @silencestderr
+    def test_pooled_server(self):
+        from threading import Event
+        release = Event()
+        def app(environ, start_response):
+            if environ['PATH_INFO'] == '/wait':
+                release.wait(5)
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'ok']
+
+        server, addr = run_dev_server(app, pool_size=1, pool_backlog=1,
+                                      pool_overload='reject')
+        self.assert_(isinstance(server, serving.PooledWSGIServer))
+        self.assertEqual(urlopen('http://%s/' % addr).read(), b'ok')
+
+        conns = []
+        for x in range(3):
+            conn = httplib.HTTPConnection(addr)
+            conn.request('GET', '/wait')
+            conns.append(conn)
+            time.sleep(0.1)
+        stats = server.get_stats()
+        self.assertEqual(stats['busy_workers'], 1)
+        self.assertEqual(stats['utilization'], 1.0)
+        self.assertEqual(stats['queue_depth'], 1)
+        self.assertEqual(stats['rejected'], 1)
+        res = conns[2].getresponse()
+        self.assertEqual(res.status, 503)
+        release.set()
+        for conn in conns[:2]:
+            res = conn.getresponse()
+            self.assertEqual(res.read(), b'ok')
+        time.sleep(0.1)
+        stats = server.get_stats()
+        self.assertEqual(stats['handled'], 3)
+        self.assertEqual(stats['busy_workers'], 0)
+        self.assertEqual(stats['max_queue_depth'], 1)
+
+    @silencestderr
+    def test_pooled_keep_alive(self):
+        from threading import Event
+        release = Event()
+        def app(environ, start_response):
+            if environ['PATH_INFO'] == '/wait':
+                release.wait(5)
+            start_response('200 OK', [('Content-Length', '2')])
+            return [b'ok']
+
+        server, addr = run_dev_server(app, pool_size=1, keep_alive=True)
+        request = b'GET %s HTTP/1.1\r\nHost: localhost\r\n\r\n'
+
+        def read_response(sock):
+            rv = b''
+            while not rv.endswith(b'ok'):
+                data = sock.recv(1024)
+                if not data:
+                    break
+                rv += data
+            return rv
+
+        # an idle persistent connection keeps the only worker for one
+        # second at most instead of the handler's keep_alive_timeout.
+        idle = socket.create_connection(server.socket.getsockname()[:2])
+        idle.sendall(request % b'/')
+        self.assert_(read_response(idle).endswith(b'ok'))
+        start = time.time()
+        self.assertEqual(urlopen('http://%s/' % addr).read(), b'ok')
+        self.assert_(time.time() - start < 2)
+        self.assertEqual(idle.recv(1024), b'')
+
+        # if connections are waiting the worker closes the persistent
+        # connection after the response.
+        busy = socket.create_connection(server.socket.getsockname()[:2])
+        busy.sendall(request % b'/wait')
+        time.sleep(0.1)
+        waiting = socket.create_connection(server.socket.getsockname()[:2])
+        waiting.sendall(request % b'/')
+        time.sleep(0.1)
+        release.set()
+        self.assert_(read_response(busy).endswith(b'ok'))
+        start = time.time()
+        self.assert_(read_response(waiting).endswith(b'ok'))
+        self.assert_(time.time() - start < 0.5)
+        self.assertEqual(busy.recv(1024), b'')
+        for sock in idle, busy, waiting:
+            sock.close()
+
+    @silencestderr
+    def test_prefork_server(self):
+        import os
+        import subprocess
+        def app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [force_bytes(str(os.getpid()))]
+
+        for reuse_port in False, True:
+            if reuse_port and not hasattr(socket, 'SO_REUSEPORT'):
+                continue
+            server = serving.make_server('localhost', 0, app, processes=2,
+                                         prefork=True, max_requests=2,
+                                         reuse_port=reuse_port)
+            self.assert_(isinstance(server, serving.PreforkWSGIServer))
+            server.poll_interval = 0.05
+            proc = subprocess.Popen(['sh', '-c', 'sleep 0.1; exit 3'])
+            t = Thread(target=server.serve_forever)
+            t.setDaemon(True)
+            t.start()
+            time.sleep(0.25)
+            try:
+                pids = set()
+                for x in range(10):
+                    conn = httplib.HTTPConnection('localhost',
+                                                  server.server_port)
+                    conn.request('GET', '/')
+                    pids.add(conn.getresponse().read())
+                    conn.close()
+                # at most four requests per pair of workers
+                self.assert_(len(pids) >= 3)
+                self.assert_(force_bytes(str(os.getpid())) not in pids)
+                # other children of the master are not reaped by it
+                self.assertEqual(proc.wait(), 3)
+            finally:
+                server.shutdown()
+                server.server_close()
+            self.assertEqual(server._workers, {})
+
+        self.assert_raises(ValueError, serving.make_server, 'localhost', 0,
+                           app, threaded=True, prefork=True)
+        self.assert_raises(ValueError, serving.make_server, 'localhost', 0,
+                           app, pool_size=2, prefork=True)
+
+    def test_sendmsg_all(self):
+        sent = []
+        def sendmsg(buffers):
+            data = b''.join(memoryview(x).tobytes() for x in buffers)[:3]
+            sent.append(data)
+            return len(data)
+        serving._sendmsg_all(sendmsg, [b'foo', b'ba', b'rbaz', b'x'],
+                             max_buffers=2)
+        self.assertEqual(sent, [b'foo', b'bar', b'baz', b'x'])
+
 
 def suite():
     suite = unittest.TestSuite()
@@ -9,7 +9,9 @@
     :license: BSD, see LICENSE for more details.
 """
 
+import json
 import unittest
+import pickle
 from io import BytesIO
 import six
 from werkzeug._internal import force_str
@@ -31,6 +33,15 @@ class URLsTestCase(WerkzeugTestCase):
         assert urls.url_fix(u'http://de.wikipedia.org/wiki/Elf (Begriffsklärung)') == \
                'http://de.wikipedia.org/wiki/Elf%20%28Begriffskl%C3%A4rung%29'
 
+    def test_quoting_safe_characters(self):
+        for c in map(chr, range(32, 127)):
+            self.assert_equal(urls.url_quote(c, safe=c), c)
+            self.assert_equal(urls.url_quote(c + u'\xfc', safe=c),
+                              c + '%C3%BC')
+        assert len(urls._quoters) <= urls._max_quoters
+        self.assert_equal(urls.url_quote('a b;c'), 'a%20b%3Bc')
+        self.assert_equal(urls.url_quote_plus('a b;c', safe=';'), 'a+b;c')
+
     def test_url_decoding(self):
         x = urls.url_decode('foo=42&bar=23&uni=H%C3%A4nsel')
         assert x['foo'] == '42'
@@ -45,6 +56,55 @@ class URLsTestCase(WerkzeugTestCase):
         x = urls.url_decode('%C3%9Ch=H%C3%A4nsel', decode_keys=True)
         assert x[u'Üh'] == u'Hänsel'
 
+        x = urls.url_decode('a=b&c+d=e&f=g+h&%C3%BC=%C3%A4&i=%25&j',
+                            decode_keys=True)
+        self.assert_equal(sorted(x.items(multi=True)), [
+            (u'a', u'b'), (u'c d', u'e'), (u'f', u'g h'), (u'i', u'%'),
+            (u'j', u''), (u'\xfc', u'\xe4')
+        ])
+
+    def test_lazy_url_decoding(self):
+        x = urls.LazyURLDecodedMultiDict('foo=42&bar=23&uni=H%C3%A4nsel&foo=1'
+                                         '&c+d=e&%66oo=2&j')
+        self.assert_equal(x['bar'], '23')
+        self.assert_equal(x['uni'], u'Hänsel')
+        self.assert_equal(x.getlist('foo'), ['42', '1', '2'])
+        self.assert_equal(x.getlist('foo', type=int), [42, 1, 2])
+        self.assert_equal(x.get('c d'), 'e')
+        self.assert_equal(x.get('missing', 'default'), 'default')
+        self.assert_raises(KeyError, lambda: x['missing'])
+        assert 'j' in x
+        assert 'missing' not in x
+        assert not x.parsed
+
+        self.assert_equal(len(x), 5)
+        assert x.parsed
+        self.assert_equal(x, urls.url_decode(x.query_string))
+        self.assert_equal(x.getlist('foo'), ['42', '1', '2'])
+        self.assert_equal(x['bar'], '23')
+        assert 'missing' not in x
+        self.assert_raises(TypeError, x.add, 'foo', 'bar')
+
+        x = urls.LazyURLDecodedMultiDict('a=1;b=2', separator=';')
+        self.assert_equal(x.to_dict(), {'a': '1', 'b': '2'})
+        self.assert_equal(sorted(x), ['a', 'b'])
+
+        x = urls.LazyURLDecodedMultiDict('a=1&a=2')
+        y = pickle.loads(pickle.dumps(x))
+        assert not y.parsed
+        self.assert_equal(y, x)
+        self.assert_equal(x.copy(), urls.url_decode('a=1&a=2'))
+
+        # consumers that look at the dict storage don't see an empty dict
+        for query_string in 'a=1&b=2&a=3', '&&', '':
+            expected = urls.url_decode(query_string)
+            x = urls.LazyURLDecodedMultiDict(query_string)
+            self.assert_equal(json.dumps(x, sort_keys=True),
+                              json.dumps(expected, sort_keys=True))
+            if six.PY3:
+                x = urls.LazyURLDecodedMultiDict(query_string)
+                self.assert_equal(dict(x), dict(expected))
+
     def test_streamed_url_decoding(self):
         item1 = b'a' * 100000
         item2 = b'b' * 400
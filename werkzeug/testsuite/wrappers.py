@@ -19,7 +19,7 @@ from werkzeug.testsuite import WerkzeugTestCase
 from werkzeug import wrappers
 from werkzeug.datastructures import MultiDict, ImmutableOrderedMultiDict, \
      ImmutableList, ImmutableTypeConversionDict, CharsetAccept, \
-     CombinedMultiDict
+     CombinedMultiDict, Headers, ImmutableMultiDict
 from werkzeug.test import Client, create_environ, run_wsgi_app
 
 
@@ -482,8 +482,70 @@ class WrappersTestCase(WerkzeugTestCase):
                                            content_length=len(data),
                                            content_type='text/plain',
                                            method='WHAT_THE_FUCK')
-        assert req.data == data
         assert isinstance(req.stream, wrappers.LimitedStream)
+        assert req.data == data
+
+    def test_buffered_body(self):
+        data = b'{"foo": "bar"}'
+        req = wrappers.Request.from_values(data=data, method='POST',
+                                           content_type='application/json')
+        self.assert_equal(req.buffer_body().read(), data)
+        self.assert_equal(req.stream.read(), b'')
+        body = req.get_data()
+        self.assert_equal(body, data)
+        assert req.get_data() is body
+        assert req.data is body
+        self.assert_equal(req.buffer_body().read(5), data[:5])
+        self.assert_equal(req.get_data(), data)
+        self.assert_equal(req.stream.read(), data[5:])
+
+        class MyRequest(wrappers.Request):
+            max_body_memory_size = 10
+        req = MyRequest.from_values(data=data, method='PUT',
+                                    content_type='application/octet-stream')
+        self.assert_equal(req.stream.read(3), data[:3])
+        buffer = req.buffer_body()
+        assert hasattr(buffer, 'fileno')
+        self.assert_equal(buffer.read(), data[3:])
+        buffer.seek(0)
+        self.assert_equal(req.get_data(), data[3:])
+        self.assert_equal(req.data, data[3:])
+        self.assert_equal(req.stream.read(), data[3:])
+        buffer.close()
+
+        req = MyRequest.from_values(data=data, method='PUT')
+        self.assert_equal(req.data, data)
+        # data reads the body into memory and does not spool it
+        assert req.get_data() is req.data
+        self.assert_equal(req.stream.read(), data)
+
+        # the body can be buffered before form data is parsed from it
+        form_data = b'foo=bar&baz=42'
+        req = wrappers.Request.from_values(
+            data=form_data, method='POST',
+            content_type='application/x-www-form-urlencoded')
+        self.assert_equal(req.buffer_body().read(), form_data)
+        self.assert_equal(req.form['foo'], 'bar')
+        self.assert_equal(req.form['baz'], '42')
+        self.assert_equal(req.stream.read(), b'')
+        self.assert_equal(req.buffer_body().read(), form_data)
+
+        req = wrappers.Request.from_values(data={
+            'foo': 'bar', 'file': (BytesIO(b'contents'), 'test.txt')
+        }, method='POST')
+        assert b'name="foo"' in req.get_data()
+        self.assert_equal(req.form['foo'], 'bar')
+        self.assert_equal(req.files['file'].read(), b'contents')
+
+        # after parsing only the rest of the body is left
+        req = wrappers.Request.from_values(data={'foo': 'bar'}, method='POST')
+        self.assert_equal(req.form['foo'], 'bar')
+        self.assert_equal(req.get_data(), b'')
+
+        req = wrappers.FastRequest(MyRequest.from_values(
+            data=data, method='PUT').environ)
+        self.assert_equal(req.data, data)
+        self.assert_equal(req.stream.read(), data)
 
     def test_urlfication(self):
         resp = wrappers.Response()
@@ -567,6 +629,18 @@ class WrappersTestCase(WerkzeugTestCase):
         assert req.values['foo'] == '1'
         assert req.values.getlist('foo') == ['1', '3']
 
+    def test_lazy_args(self):
+        class MyRequest(wrappers.Request):
+            lazy_args = True
+        req = MyRequest.from_values('/?foo=bar&foo=baz&x=H%C3%A4nsel')
+        assert isinstance(req.args, ImmutableMultiDict)
+        self.assert_equal(req.args['x'], u'H\xe4nsel')
+        self.assert_equal(req.args.getlist('foo'), ['bar', 'baz'])
+        assert not req.args.parsed
+        self.assert_equal(req.values['foo'], 'bar')
+        self.assert_equal(sorted(req.args.items(multi=True)), [
+            ('foo', 'bar'), ('foo', 'baz'), ('x', u'H\xe4nsel')])
+
     def test_storage_classes(self):
         class MyRequest(wrappers.Request):
             dict_storage_class = dict
@@ -658,6 +732,69 @@ class WrappersTestCase(WerkzeugTestCase):
         resp.headers['Location'] = '/test'
         self.assert_equal(resp.get_wsgi_headers(env)['Location'], 'http://localhost/test')
 
+    def test_fast_request(self):
+        env = create_environ('/foo?a=1&a=2', 'http://example.com/',
+                             method='POST', data={'b': 'x'},
+                             headers={'Cookie': 'c=d'})
+        req = wrappers.FastRequest(env)
+        assert env['werkzeug.request'] is req
+        self.assert_equal(req.args.getlist('a'), ['1', '2'])
+        self.assert_equal(req.form['b'], 'x')
+        self.assert_equal(req.values['a'], '1')
+        self.assert_equal(req.cookies['c'], 'd')
+        self.assert_equal(req.headers['Host'], 'example.com')
+        self.assert_equal(req.path, '/foo')
+        self.assert_equal(req.method, 'POST')
+        self.assert_equal(req.url, 'http://example.com/foo?a=1&a=2')
+        self.assert_equal(req.content_type, 'application/x-www-form-urlencoded')
+        assert req.args is req.args
+        with self.assert_raises(AttributeError):
+            req.foo = 42
+
+        req = wrappers.FastRequest(create_environ(method='PUT', data=b'{}',
+            content_type='application/json'))
+        self.assert_equal(req.data, b'{}')
+        self.assert_equal(len(req.form), 0)
+
+        req = wrappers.FastRequest(env, shallow=True)
+        self.assert_raises(RuntimeError, lambda: req.form)
+
+    def test_fast_response(self):
+        env = create_environ()
+        resp = wrappers.FastResponse(u'Hällo', status=201)
+        resp.set_cookie('foo', 'bar')
+        self.assert_equal(resp.status, '201 CREATED')
+        self.assert_equal(resp.data, u'Hällo'.encode('utf-8'))
+        app_iter, status, headers = run_wsgi_app(resp, env)
+        headers = Headers(headers)
+        self.assert_equal(status, '201 CREATED')
+        self.assert_equal(list(app_iter), [u'Hällo'.encode('utf-8')])
+        self.assert_equal(headers['Content-Length'], '6')
+        self.assert_equal(headers['Content-Type'], 'text/plain; charset=utf-8')
+        assert 'foo=bar' in headers['Set-Cookie']
+        with self.assert_raises(AttributeError):
+            resp.foo = 42
+
+        resp = wrappers.FastResponse(status=304, headers={'Location': '/x'})
+        headers = resp.get_wsgi_headers(env)
+        self.assert_equal(headers['Location'], 'http://localhost/x')
+        assert 'content-type' not in headers
+        self.assert_equal(list(resp.get_app_iter(env)), [])
+
+        closed = []
+        def generate():
+            try:
+                yield u'foo'
+                yield b'bar'
+            finally:
+                closed.append(True)
+        resp = wrappers.FastResponse(generate(), mimetype='text/html')
+        app_iter, status, headers = run_wsgi_app(resp, env)
+        assert 'content-length' not in Headers(headers)
+        self.assert_equal(b''.join(app_iter), b'foobar')
+        app_iter.close()
+        self.assert_equal(closed, [True])
+
 
 def suite():
     suite = unittest.TestSuite()
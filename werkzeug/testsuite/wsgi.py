@@ -249,6 +249,14 @@ class WSGIUtilsTestCase(WerkzeugTestCase):
         self.assert_equal(rv, [b'abcdef', b'ghijkl', b'mnopqrstuvwxyz',
                                b'ABCDEFGHIJK'])
 
+    def test_make_chunk_iter_separator_across_chunks(self):
+        data = b'abcXYZdefXYZXYZghiXYZ'
+        for bufsize in xrange(1, 8):
+            rv = list(wsgi.make_chunk_iter(BytesIO(data), 'XYZ',
+                                           limit=len(data),
+                                           buffer_size=bufsize))
+            self.assert_equal(rv, [b'abc', b'def', b'', b'ghi', b''])
+
     def test_lines_longer_buffer_size(self):
         data = b'1234567890\n1234567890\n'
         for bufsize in xrange(1, 15):
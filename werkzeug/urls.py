@@ -18,7 +18,9 @@ except ImportError:
     import urlparse
 
 from werkzeug._internal import _decode_unicode, force_bytes
-from werkzeug.datastructures import MultiDict, iter_multi_items
+from werkzeug.datastructures import MultiDict, ImmutableMultiDict, \
+     iter_multi_items
+from werkzeug.exceptions import BadRequestKeyError
 from werkzeug.wsgi import make_chunk_iter
 from six.moves import xrange
 
@@ -27,22 +29,55 @@ from six.moves import xrange
 _always_safe = ('ABCDEFGHIJKLMNOPQRSTUVWXYZ'
                 'abcdefghijklmnopqrstuvwxyz'
                 '0123456789_.-')
-_safe_map = dict((c, c) for c in _always_safe)
-for i in xrange(0x80):
-    c = chr(i)
-    if c not in _safe_map:
-        _safe_map[c] = '%%%02X' % i
-_safe_map.update((chr(i), '%%%02X' % i) for i in xrange(0x80, 0x100))
-_safemaps = {}
+_always_safe_bytes = _always_safe.encode('ascii')
+
+_string_types = (bytes,) + six.string_types
+
+#: quoting functions for the recently used sets of safe characters.  Like
+#: the cache of the :mod:`re` module it is cleared once it grows too big.
+_quoters = {}
+_max_quoters = 32
 
 #: lookup table for encoded characters.
 _hexdig = '0123456789ABCDEFabcdef'
 _hextochr = dict((a + b, chr(int(a + b, 16)))
                  for a in _hexdig for b in _hexdig)
 
+
+def _make_quoter(safe):
+    """Creates a function that maps a byte to its quoted form for a given
+    set of safe characters.  On Python 3 the bytes are integers.
+    """
+    always_safe = _always_safe + safe
+    table = [chr(i) if chr(i) in always_safe else '%%%02X' % i
+             for i in xrange(0x80)]
+    table.extend('%%%02X' % i for i in xrange(0x80, 0x100))
+    if six.PY3:
+        quoter = table.__getitem__
+    else:
+        quoter = dict((chr(i), c) for i, c in enumerate(table)).__getitem__
+    if len(_quoters) >= _max_quoters:
+        _quoters.clear()
+    _quoters[safe] = quoter
+    return quoter
+
+
 if six.PY3:
-    _quote = urlparse.quote
-    _quote_plus = urlparse.quote_plus
+    def _quote(s, safe='/'):
+        if isinstance(s, str):
+            if not s or not s.rstrip(_always_safe + safe):
+                return s
+            s = s.encode('utf-8')
+        elif not s.rstrip(_always_safe_bytes + safe.encode('ascii')):
+            return s.decode('ascii')
+        quoter = _quoters.get(safe) or _make_quoter(safe)
+        return ''.join(map(quoter, s))
+
+    def _quote_plus(s, safe=''):
+        if (' ' if isinstance(s, str) else b' ') in s:
+            return _quote(s, safe + ' ').replace(' ', '+')
+        return _quote(s, safe)
+
     def _unquote(s, unsafe=''):
         if unsafe:
             regex = '({})'.format(
@@ -56,12 +91,7 @@ else:
         assert isinstance(s, str), 'quote only works on bytes'
         if not s or not s.rstrip(_always_safe + safe):
             return s
-        try:
-            quoter = _safemaps[safe]
-        except KeyError:
-            safe_map = _safe_map.copy()
-            safe_map.update([(c, c) for c in safe])
-            _safemaps[safe] = quoter = safe_map.__getitem__
+        quoter = _quoters.get(safe) or _make_quoter(safe)
         return _join(map(quoter, s))
 
 
@@ -327,10 +357,183 @@ def _url_decode_impl(pair_iter, charset, decode_keys, include_empty,
                 continue
             key = pair
             value = ''
-        key = _unquote_plus(key)
+        # most pairs are not quoted at all, only unquote if necessary
+        if '%' in pair or '+' in pair:
+            key = _unquote_plus(key)
+            value = _unquote_plus(value)
         if decode_keys:
             key = _decode_unicode(key, charset, errors)
-        yield key, url_unquote_plus(value, charset, errors)
+        yield key, _decode_unicode(value, charset, errors)
+
+
+#: the key that keeps the dict storage of an unparsed
+#: :class:`LazyURLDecodedMultiDict` from looking empty.
+_unparsed_marker = object()
+
+
+def _parse_first(name):
+    """Returns a method that decodes the complete query string before it
+    calls the method of the same name on :class:`ImmutableMultiDict`.
+    """
+    method = getattr(ImmutableMultiDict, name)
+    def oncall(self, *args, **kw):
+        if not self._parsed:
+            self.parse()
+        return method(self, *args, **kw)
+    oncall.__name__ = name
+    oncall.__doc__ = method.__doc__
+    return oncall
+
+
+class LazyURLDecodedMultiDict(ImmutableMultiDict):
+    """An :class:`~werkzeug.datastructures.ImmutableMultiDict` for a query
+    string that is only decoded on demand.  Looking up a key scans the raw
+    query string and decodes only the values for that key, the result is
+    remembered.  Everything that needs all the keys, like iterating,
+    comparing or pickling, decodes the complete query string first and from
+    then on the dict works exactly like the return value of
+    :func:`url_decode`.
+
+    This pays off for long query strings of which the application only
+    reads a few keys.  Until the query string is decoded the dict storage
+    only holds an internal marker.  Functions that look at the storage on
+    the C level, like :func:`json.dumps`, find it not empty and call the
+    methods that decode everything.  The exception is ``dict(d)`` on
+    Python 2, which copies the storage directly, so call :meth:`parse`
+    before you use it there.
+
+    >>> d = LazyURLDecodedMultiDict('a=1&b=2&a=3')
+    >>> d.getlist('a', type=int)
+    [1, 3]
+    >>> d.parsed
+    False
+
+    .. versionadded:: 0.9
+
+    :param s: the query string to decode.
+    :param charset: the charset of the query string.
+    :param errors: the decoding error behavior.
+    :param separator: the pair separator to be used, defaults to ``&``
+    """
+
+    def __init__(self, s='', charset='utf-8', errors='replace',
+                 separator='&'):
+        dict.__init__(self)
+        if s:
+            dict.__setitem__(self, _unparsed_marker, [])
+        self.query_string = s
+        self.charset = charset
+        self.errors = errors
+        self.separator = separator
+        self._parsed = False
+        self._pairs = None
+        self._lookups = {}
+
+    @property
+    def parsed(self):
+        """`True` if the complete query string was decoded."""
+        return self._parsed
+
+    def parse(self):
+        """Decodes the complete query string.  This happens automatically
+        if all keys are required, so it's usually not necessary to call
+        this method.
+        """
+        if self._parsed:
+            return
+        tmp = {}
+        for key, value in _url_decode_impl(self._get_pairs(), self.charset,
+                                           False, True, self.errors):
+            tmp.setdefault(key, []).append(value)
+        dict.clear(self)
+        dict.update(self, tmp)
+        self._parsed = True
+        self._pairs = self._lookups = None
+
+    def _get_pairs(self):
+        if self._pairs is None:
+            self._pairs = str(self.query_string).split(self.separator)
+        return self._pairs
+
+    def _lookup(self, key):
+        try:
+            return self._lookups[key]
+        except KeyError:
+            pass
+        # only pairs with exactly that key or a quoted key can match.  A
+        # dict is used for the comparison so that keys compare like they
+        # would in the decoded dict.
+        wanted = {key: None}
+        candidates = []
+        for pair in self._get_pairs():
+            raw_key = pair.partition('=')[0]
+            if raw_key in wanted or '%' in raw_key or '+' in raw_key:
+                candidates.append(pair)
+        rv = self._lookups[key] = [value for k, value in _url_decode_impl(
+            candidates, self.charset, False, True, self.errors)
+            if k in wanted]
+        return rv
+
+    def __getitem__(self, key):
+        if self._parsed:
+            return ImmutableMultiDict.__getitem__(self, key)
+        rv = self._lookup(key)
+        if rv:
+            return rv[0]
+        raise BadRequestKeyError(key)
+
+    def __contains__(self, key):
+        if self._parsed:
+            return dict.__contains__(self, key)
+        return len(self._lookup(key)) > 0
+
+    def getlist(self, key, type=None):
+        if self._parsed:
+            return ImmutableMultiDict.getlist(self, key, type)
+        rv = self._lookup(key)
+        if type is None:
+            return list(rv)
+        result = []
+        for item in rv:
+            try:
+                result.append(type(item))
+            except ValueError:
+                pass
+        return result
+    getlist.__doc__ = ImmutableMultiDict.getlist.__doc__
+
+    def __eq__(self, other):
+        if not self._parsed:
+            self.parse()
+        if isinstance(other, LazyURLDecodedMultiDict):
+            other.parse()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = ImmutableMultiDict.__hash__
+
+    def __reduce_ex__(self, protocol):
+        return type(self), (self.query_string, self.charset, self.errors,
+                            self.separator)
+
+    __len__ = _parse_first('__len__')
+    keys = _parse_first('keys')
+    values = _parse_first('values')
+    items = _parse_first('items')
+    lists = _parse_first('lists')
+    listvalues = _parse_first('listvalues')
+    itervalues = _parse_first('itervalues')
+    iteritems = _parse_first('iteritems')
+    iterlists = _parse_first('iterlists')
+    iterlistvalues = _parse_first('iterlistvalues')
+    if not six.PY3:
+        has_key = __contains__
+        iterkeys = _parse_first('iterkeys')
+        viewkeys = _parse_first('viewkeys')
+        viewvalues = _parse_first('viewvalues')
+        viewitems = _parse_first('viewitems')
 
 
 def url_encode(obj, charset='utf-8', encode_keys=False, sort=False, key=None,
@@ -404,11 +607,17 @@ def _url_encode_impl(obj, charset, encode_keys, sort, sort_key, as_bytes):
             key = force_str(key, charset)
         else:
             key = str(key)
-        if isinstance(value, (bytes,) + six.string_types):
+        if isinstance(value, _string_types):
             value = force_str(value, charset)
         else:
             value = str(value)
-        encoded_item = '{}={}'.format(_quote(key), _quote_plus(value))
+        # keys and values that only contain safe characters are common
+        # and don't have to be quoted at all
+        if key.rstrip(_always_safe):
+            key = _quote(key)
+        if value.rstrip(_always_safe):
+            value = _quote_plus(value)
+        encoded_item = key + '=' + value
         if as_bytes:
             encoded_item = encoded_item.encode(charset)
         yield encoded_item
@@ -421,7 +630,7 @@ def url_quote(s, charset='utf-8', safe='/:'):
     :param charset: the charset to be used.
     :param safe: an optional sequence of safe characters.
     """
-    if isinstance(s, (bytes,) + six.string_types):
+    if isinstance(s, _string_types):
         s = force_str(s, charset)
     elif not isinstance(s, str):
         s = str(s)
@@ -436,7 +645,7 @@ def url_quote_plus(s, charset='utf-8', safe=''):
     :param charset: the charset to be used.
     :param safe: an optional sequence of safe characters.
     """
-    if isinstance(s, (bytes,) + six.string_types):
+    if isinstance(s, _string_types):
         s = force_str(s)
     elif not isinstance(s, str):
         s = str(s)
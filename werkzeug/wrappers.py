@@ -25,6 +25,8 @@ try:
 except ImportError:
     import urlparse
 from datetime import datetime, timedelta
+from shutil import copyfileobj
+from tempfile import TemporaryFile
 import six
 
 from werkzeug.http import HTTP_STATUS_CODES, \
@@ -35,7 +37,7 @@ from werkzeug.http import HTTP_STATUS_CODES, \
      parse_options_header, dump_options_header, http_date, \
      parse_if_range_header, parse_cookie, dump_cookie, \
      parse_range_header, parse_content_range_header, dump_header
-from werkzeug.urls import url_decode, iri_to_uri
+from werkzeug.urls import url_decode, iri_to_uri, LazyURLDecodedMultiDict
 from werkzeug.formparser import FormDataParser, default_stream_factory
 from werkzeug.utils import cached_property, environ_property, \
      header_property, get_content_type
@@ -49,6 +51,12 @@ from werkzeug.datastructures import MultiDict, CombinedMultiDict, Headers, \
 from werkzeug._internal import _empty_stream, _decode_unicode, \
      _patch_wrapper, _get_environ, force_bytes, force_str
 
+if six.PY3:
+    from io import BytesIO as _BodyIO
+else:
+    # unlike io.BytesIO this does not copy the string it wraps
+    from cStringIO import StringIO as _BodyIO
+
 
 def _run_wsgi_app(*args):
     """This function replaces itself to ensure that the test module is not
@@ -72,6 +80,105 @@ def _warn_if_string(iterable):
                      'strings to the response object.'), stacklevel=2)
 
 
+def _buffer_stream(stream, max_memory_size):
+    """Reads the rest of `stream` into a seekable buffer.  Up to
+    `max_memory_size` bytes are kept in memory, larger bodies are spooled
+    to a temporary file.  Returns the buffer and the body as bytestring if
+    it was kept in memory, `None` otherwise.
+    """
+    if max_memory_size is None:
+        body = stream.read()
+        return _BodyIO(body), body
+    chunks = []
+    size = 0
+    while size <= max_memory_size:
+        chunk = stream.read(max_memory_size + 1 - size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    if size <= max_memory_size:
+        body = b''.join(chunks)
+        return _BodyIO(body), body
+    buffer = TemporaryFile('wb+')
+    for chunk in chunks:
+        buffer.write(chunk)
+    del chunks
+    copyfileobj(stream, buffer)
+    buffer.seek(0)
+    return buffer, None
+
+
+def _get_wsgi_headers(response, environ):
+    """Implements :meth:`BaseResponse.get_wsgi_headers` for the response
+    objects.
+    """
+    headers = Headers(response.headers)
+    location = None
+    content_location = None
+    content_length = None
+    status = response.status_code
+
+    # iterate over the headers to find all values in one go.  Because
+    # get_wsgi_headers is used each response that gives us a tiny
+    # speedup.
+    for key, value in headers:
+        ikey = key.lower()
+        if ikey == 'location':
+            location = value
+        elif ikey == 'content-location':
+            content_location = value
+        elif ikey == 'content-length':
+            content_length = value
+
+    # make sure the location header is an absolute URL
+    if location is not None:
+        old_location = location
+        if isinstance(location, six.text_type):
+            location = iri_to_uri(location)
+        if response.autocorrect_location_header:
+            location = urlparse.urljoin(
+                get_current_url(environ, root_only=True),
+                location
+            )
+        if location != old_location:
+            headers['Location'] = location
+
+    # make sure the content location is a URL
+    if content_location is not None and \
+       isinstance(content_location, six.text_type):
+        headers['Content-Location'] = iri_to_uri(content_location)
+
+    # remove entity headers and set content length to zero if needed.
+    # Also update content_length accordingly so that the automatic
+    # content length detection does not trigger in the following
+    # code.
+    if 100 <= status < 200 or status == 204:
+        headers['Content-Length'] = content_length = '0'
+    elif status == 304:
+        remove_entity_headers(headers)
+
+    # if we can determine the content length automatically, we
+    # should try to do that.  But only if this does not involve
+    # flattening the iterator or encoding of unicode strings in
+    # the response.  We however should not do that if we have a 304
+    # response.
+    if response.automatically_set_content_length and \
+       response.is_sequence and content_length is None and status != 304:
+        try:
+            try_str = lambda s: s.decode('utf-8') if isinstance(s, bytes) else s.encode('ascii')
+            content_length = sum(len(try_str(x))
+                                 for x in response.response)
+        except UnicodeError:
+            # aha, something non-bytestringy in there, too bad, we
+            # can't safely figure out the length of the response.
+            pass
+        else:
+            headers['Content-Length'] = str(content_length)
+
+    return headers
+
+
 class BaseRequest(object):
     """Very basic request object.  This does not implement advanced stuff like
     entity tag parsing or cache controls.  The request object is created with
@@ -145,6 +252,13 @@ class BaseRequest(object):
     #: .. versionadded:: 0.5
     max_form_memory_size = None
 
+    #: the maximum size of a request body that is buffered in memory by
+    #: :meth:`buffer_body`.  Larger bodies are spooled to a temporary
+    #: file.  If set to `None` the body is always kept in memory.
+    #:
+    #: .. versionadded:: 0.9
+    max_body_memory_size = 1024 * 500
+
     #: the class to use for `args` and `form`.  The default is an
     #: :class:`~werkzeug.datastructures.ImmutableMultiDict` which supports
     #: multiple values per key.  alternatively it makes sense to use an
@@ -175,6 +289,16 @@ class BaseRequest(object):
     #: the form date parsing.
     form_data_parser_class = FormDataParser
 
+    #: if set to `True` :attr:`args` is a
+    #: :class:`~werkzeug.urls.LazyURLDecodedMultiDict` that only decodes
+    #: the keys of the query string that are actually accessed.  This is
+    #: useful for long query strings of which only a few keys are used.
+    #: In that case :attr:`parameter_storage_class` is not used for
+    #: :attr:`args`.
+    #:
+    #: .. versionadded:: 0.9
+    lazy_args = False
+
     def __init__(self, environ, populate_request=True, shallow=False):
         self.environ = environ
         if populate_request and not shallow:
@@ -308,13 +432,30 @@ class BaseRequest(object):
 
         .. versionadded:: 0.8
         """
-        # abort early if we have already consumed the stream
-        if 'stream' in self.__dict__:
+        d = self.__dict__
+        # abort early if the form data was loaded already
+        if 'form' in d:
             return
         if self.shallow:
             raise RuntimeError('A shallow request tried to consume '
                                'form data.  If you really want to do '
                                'that, set `shallow` to False.')
+        buffer = d.get('_body_buffer')
+        if buffer is not None:
+            # the body was buffered before it was parsed, parse the buffer
+            # and leave it as stream.
+            form = self.parameter_storage_class()
+            files = self.parameter_storage_class()
+            if self.want_form_data_parsed:
+                environ = dict(self.environ)
+                environ['wsgi.input'] = buffer
+                pos = buffer.tell()
+                buffer.seek(0)
+                parser = self.make_form_data_parser()
+                form, files = parser.parse_from_environ(environ)[1:]
+                buffer.seek(pos)
+            d['form'], d['files'] = form, files
+            return
         data = None
         stream = _empty_stream
         if self.want_form_data_parsed:
@@ -335,7 +476,6 @@ class BaseRequest(object):
 
         # inject the values into the instance dict so that we bypass
         # our cached_property non-data descriptor.
-        d = self.__dict__
         d['stream'], d['form'], d['files'] = data
 
     @cached_property
@@ -360,11 +500,80 @@ class BaseRequest(object):
         is returned from this function.  This can be changed by setting
         :attr:`parameter_storage_class` to a different type.  This might
         be necessary if the order of the form data is important.
+
+        If :attr:`lazy_args` is enabled the query string is decoded lazily.
+
+        .. versionchanged:: 0.9
+           Added support for :attr:`lazy_args`.
         """
-        return url_decode(self.environ.get('QUERY_STRING', ''),
-                          self.url_charset, errors=self.encoding_errors,
+        query_string = self.environ.get('QUERY_STRING', '')
+        if self.lazy_args:
+            return LazyURLDecodedMultiDict(query_string, self.url_charset,
+                                           self.encoding_errors)
+        return url_decode(query_string, self.url_charset,
+                          errors=self.encoding_errors,
                           cls=self.parameter_storage_class)
 
+    def _get_body_buffer(self, max_memory_size):
+        d = self.__dict__
+        if '_body_buffer' not in d:
+            if 'stream' in d:
+                # the form data parser already consumed what it needed
+                stream = d['stream']
+            elif self.shallow:
+                raise RuntimeError('A shallow request tried to consume '
+                                   'the body.  If you really want to do '
+                                   'that, set `shallow` to False.')
+            else:
+                content_length = self.headers.get('content-length', type=int)
+                stream = _empty_stream
+                if content_length is not None:
+                    stream = LimitedStream(self.environ['wsgi.input'],
+                                           content_length)
+            buffer, d['_body'] = _buffer_stream(stream, max_memory_size)
+            d['_body_buffer'] = d['stream'] = buffer
+        return d['_body_buffer']
+
+    def buffer_body(self):
+        """Buffers the rest of the request body so that it can be read
+        more than once, for example to verify a signature before the body
+        is parsed.  Bodies up to :attr:`max_body_memory_size` bytes are kept
+        in memory, larger bodies are spooled to a temporary file.
+
+        Afterwards the buffer is available as :attr:`stream`.  Every call to
+        this method rewinds it to the beginning.  If the form data was not
+        parsed yet :attr:`form` and :attr:`files` are parsed from the buffer
+        later, if it was parsed already the buffer only contains what the
+        parser left over.  A temporary file stays open until the request
+        object is garbage collected unless it is closed explicitly.
+
+        .. versionadded:: 0.9
+
+        :return: the seekable buffer with the request body.
+        """
+        buffer = self._get_body_buffer(self.max_body_memory_size)
+        buffer.seek(0)
+        return buffer
+
+    def get_data(self):
+        """Returns the request body as bytestring.  The :attr:`stream` can
+        still be read afterwards and the current position of the stream is
+        not changed.  If the body was not buffered yet it is read into
+        memory as a whole and the same string is returned every time
+        without copying it.  If :meth:`buffer_body` spooled the body to a
+        temporary file it is read from that file on every call.
+
+        .. versionadded:: 0.9
+        """
+        buffer = self._get_body_buffer(None)
+        body = self.__dict__['_body']
+        if body is None:
+            pos = buffer.tell()
+            buffer.seek(0)
+            body = buffer.read()
+            buffer.seek(pos)
+        return body
+
     @cached_property
     def data(self):
         """This reads the buffered incoming data from the client into the
@@ -373,8 +582,12 @@ class BaseRequest(object):
         server.
 
         To circumvent that make sure to check the content length first.
+
+        .. versionchanged:: 0.9
+           The body is returned by :meth:`get_data` so that the
+           :attr:`stream` can still be read afterwards.
         """
-        return self.stream.read()
+        return self.get_data()
 
     @cached_property
     def form(self):
@@ -966,70 +1179,7 @@ class BaseResponse(object):
         :return: returns a new :class:`~werkzeug.datastructures.Headers`
                  object.
         """
-        headers = Headers(self.headers)
-        location = None
-        content_location = None
-        content_length = None
-        status = self.status_code
-
-        # iterate over the headers to find all values in one go.  Because
-        # get_wsgi_headers is used each response that gives us a tiny
-        # speedup.
-        for key, value in headers:
-            ikey = key.lower()
-            if ikey == 'location':
-                location = value
-            elif ikey == 'content-location':
-                content_location = value
-            elif ikey == 'content-length':
-                content_length = value
-
-        # make sure the location header is an absolute URL
-        if location is not None:
-            old_location = location
-            if isinstance(location, six.text_type):
-                location = iri_to_uri(location)
-            if self.autocorrect_location_header:
-                location = urlparse.urljoin(
-                    get_current_url(environ, root_only=True),
-                    location
-                )
-            if location != old_location:
-                headers['Location'] = location
-
-        # make sure the content location is a URL
-        if content_location is not None and \
-           isinstance(content_location, six.text_type):
-            headers['Content-Location'] = iri_to_uri(content_location)
-
-        # remove entity headers and set content length to zero if needed.
-        # Also update content_length accordingly so that the automatic
-        # content length detection does not trigger in the following
-        # code.
-        if 100 <= status < 200 or status == 204:
-            headers['Content-Length'] = content_length = '0'
-        elif status == 304:
-            remove_entity_headers(headers)
-
-        # if we can determine the content length automatically, we
-        # should try to do that.  But only if this does not involve
-        # flattening the iterator or encoding of unicode strings in
-        # the response.  We however should not do that if we have a 304
-        # response.
-        if self.automatically_set_content_length and \
-           self.is_sequence and content_length is None and status != 304:
-            try:
-                try_str = lambda s: s.decode('utf-8') if isinstance(s, bytes) else s.encode('ascii')
-                content_length = sum(len(try_str(x))
-                                     for x in self.response)
-            except UnicodeError:
-                # aha, something non-bytestringy in there, too bad, we
-                # can't safely figure out the length of the response.
-                pass
-            else:
-                headers['Content-Length'] = str(content_length)
-
-        return headers
+        return _get_wsgi_headers(self, environ)
 
     def get_app_iter(self, environ):
         """Returns the application iterator for the given environ.  Depending
@@ -1655,3 +1805,373 @@ class Response(BaseResponse, ETagResponseMixin, ResponseStreamMixin,
     - :class:`CommonResponseDescriptorsMixin` for various HTTP descriptors
     - :class:`WWWAuthenticateMixin` for HTTP authentication support
     """
+
+
+class FastRequest(object):
+    """A lightweight request object for applications that handle a lot of
+    small requests.  It provides the most important attributes of the
+    :class:`BaseRequest` but has a fixed layout based on slots, so creating
+    it is cheap and the parsed values don't live in an instance dict.  The
+    values are still parsed on first access and then cached.
+
+    Unlike :class:`BaseRequest` it cannot be combined with the request
+    mixins and it's not possible to set additional attributes on it.  The
+    configuration attributes like :attr:`charset` or
+    :attr:`parameter_storage_class` work the same and can be changed in a
+    subclass.  Subclasses that add attributes have to declare their own
+    ``__slots__``.
+
+    .. versionadded:: 0.9
+    """
+
+    __slots__ = ('environ', 'shallow', '_args', '_stream', '_form', '_files',
+                 '_values', '_data', '_headers', '_cookies')
+
+    charset = BaseRequest.charset
+    encoding_errors = BaseRequest.encoding_errors
+    max_content_length = BaseRequest.max_content_length
+    max_form_memory_size = BaseRequest.max_form_memory_size
+    max_body_memory_size = BaseRequest.max_body_memory_size
+    parameter_storage_class = BaseRequest.parameter_storage_class
+    dict_storage_class = BaseRequest.dict_storage_class
+    form_data_parser_class = BaseRequest.form_data_parser_class
+    lazy_args = BaseRequest.lazy_args
+
+    def __init__(self, environ, populate_request=True, shallow=False):
+        self.environ = environ
+        if populate_request and not shallow:
+            environ['werkzeug.request'] = self
+        self.shallow = shallow
+
+    def __repr__(self):
+        try:
+            info = "'%s' [%s]" % (self.url, self.method)
+        except Exception:
+            info = '(invalid WSGI environ)'
+        return '<%s %s>' % (self.__class__.__name__, info)
+
+    @property
+    def url_charset(self):
+        """The charset that is assumed for URLs."""
+        return self.charset
+
+    def make_form_data_parser(self):
+        """Creates the form data parser.  Instanciates the
+        :attr:`form_data_parser_class` with some parameters.
+        """
+        return self.form_data_parser_class(default_stream_factory,
+                                           self.charset,
+                                           self.encoding_errors,
+                                           self.max_form_memory_size,
+                                           self.max_content_length,
+                                           self.parameter_storage_class)
+
+    def _load_form_data(self):
+        if self.shallow:
+            raise RuntimeError('A shallow request tried to consume '
+                               'form data.  If you really want to do '
+                               'that, set `shallow` to False.')
+        environ = self.environ
+        data = None
+        stream = _empty_stream
+        if environ['REQUEST_METHOD'] in ('POST', 'PUT', 'PATCH'):
+            parser = self.make_form_data_parser()
+            data = parser.parse_from_environ(environ)
+        else:
+            content_length = self.headers.get('content-length', type=int)
+            if content_length is not None:
+                stream = LimitedStream(environ['wsgi.input'], content_length)
+        if data is None:
+            data = (stream, self.parameter_storage_class(),
+                    self.parameter_storage_class())
+        self._stream, self._form, self._files = data
+
+    @property
+    def stream(self):
+        """The parsed stream if the submitted data was not multipart or
+        urlencoded form data.  See :attr:`BaseRequest.stream`.
+        """
+        try:
+            return self._stream
+        except AttributeError:
+            self._load_form_data()
+            return self._stream
+
+    @property
+    def form(self):
+        """The form parameters."""
+        try:
+            return self._form
+        except AttributeError:
+            self._load_form_data()
+            return self._form
+
+    @property
+    def files(self):
+        """The uploaded files."""
+        try:
+            return self._files
+        except AttributeError:
+            self._load_form_data()
+            return self._files
+
+    @property
+    def args(self):
+        """The parsed URL parameters."""
+        try:
+            return self._args
+        except AttributeError:
+            query_string = self.environ.get('QUERY_STRING', '')
+            if self.lazy_args:
+                self._args = LazyURLDecodedMultiDict(query_string,
+                                                     self.url_charset,
+                                                     self.encoding_errors)
+            else:
+                self._args = url_decode(query_string, self.url_charset,
+                                        errors=self.encoding_errors,
+                                        cls=self.parameter_storage_class)
+            return self._args
+
+    @property
+    def values(self):
+        """Combined multi dict for :attr:`args` and :attr:`form`."""
+        try:
+            return self._values
+        except AttributeError:
+            args = []
+            for d in self.args, self.form:
+                if not isinstance(d, MultiDict):
+                    d = MultiDict(d)
+                args.append(d)
+            self._values = CombinedMultiDict(args)
+            return self._values
+
+    @property
+    def data(self):
+        """The buffered incoming data from the client.  See
+        :attr:`BaseRequest.data`.
+        """
+        try:
+            return self._data
+        except AttributeError:
+            buffer, data = _buffer_stream(self.stream, None)
+            self._stream = buffer
+            self._data = data
+            return data
+
+    @property
+    def headers(self):
+        """The headers from the WSGI environ as immutable
+        :class:`~werkzeug.datastructures.EnvironHeaders`.
+        """
+        try:
+            return self._headers
+        except AttributeError:
+            self._headers = EnvironHeaders(self.environ)
+            return self._headers
+
+    @property
+    def cookies(self):
+        """Read only access to the retrieved cookie values as dictionary."""
+        try:
+            return self._cookies
+        except AttributeError:
+            self._cookies = parse_cookie(self.environ, self.charset,
+                                         cls=self.dict_storage_class)
+            return self._cookies
+
+    @property
+    def path(self):
+        """Requested path as unicode."""
+        path = '/' + (self.environ.get('PATH_INFO') or '').lstrip('/')
+        return _decode_unicode(path, self.url_charset, self.encoding_errors)
+
+    @property
+    def url(self):
+        """The reconstructed current URL"""
+        return get_current_url(self.environ)
+
+    @property
+    def host(self):
+        """Just the host including the port if available."""
+        return get_host(self.environ)
+
+    @property
+    def remote_addr(self):
+        """The remote address of the client."""
+        return self.environ.get('REMOTE_ADDR')
+
+    query_string = BaseRequest.query_string
+    method = BaseRequest.method
+    content_type = CommonRequestDescriptorsMixin.content_type
+    content_length = CommonRequestDescriptorsMixin.content_length
+
+
+class FastResponse(object):
+    """A lightweight response object for applications that send a lot of
+    small responses.  It works like the :class:`BaseResponse` but has a
+    fixed layout based on slots and avoids some work when the response is
+    sent: if the headers need no changes for the request they are not
+    copied and a response body made of byte strings is passed to the WSGI
+    server as it is.
+
+    Unlike :class:`BaseResponse` it cannot be combined with the response
+    mixins and it's not possible to set additional attributes on it.
+    Subclasses that add attributes have to declare their own ``__slots__``.
+
+    .. versionadded:: 0.9
+    """
+
+    __slots__ = ('headers', 'response', 'direct_passthrough', '_status',
+                 '_status_code')
+
+    charset = BaseResponse.charset
+    default_status = BaseResponse.default_status
+    default_mimetype = BaseResponse.default_mimetype
+    autocorrect_location_header = BaseResponse.autocorrect_location_header
+    automatically_set_content_length = \
+        BaseResponse.automatically_set_content_length
+
+    def __init__(self, response=None, status=None, headers=None,
+                 mimetype=None, content_type=None, direct_passthrough=False):
+        if isinstance(headers, Headers):
+            self.headers = headers
+        elif not headers:
+            self.headers = Headers()
+        else:
+            self.headers = Headers(headers)
+
+        if content_type is None:
+            if mimetype is None and 'content-type' not in self.headers:
+                mimetype = self.default_mimetype
+            if mimetype is not None:
+                mimetype = get_content_type(mimetype, self.charset)
+            content_type = mimetype
+        if content_type is not None:
+            self.headers['Content-Type'] = content_type
+        if status is None:
+            status = self.default_status
+        if isinstance(status, six.integer_types):
+            self.status_code = status
+        else:
+            self.status = status
+
+        self.direct_passthrough = direct_passthrough
+        if response is None:
+            self.response = []
+        elif isinstance(response, (bytes,) + six.string_types):
+            self.data = response
+        else:
+            self.response = response
+
+    def __repr__(self):
+        return '<%s [%s]>' % (self.__class__.__name__, self.status)
+
+    status_code = BaseResponse.status_code
+    status = BaseResponse.status
+
+    def _get_data(self):
+        """The string representation of the response body.  A response
+        iterable that is not a sequence is consumed and closed when this
+        is accessed.
+        """
+        if not self.is_sequence:
+            close = getattr(self.response, 'close', None)
+            self.response = list(self.iter_encoded())
+            if close is not None:
+                close()
+        return b''.join(self.iter_encoded())
+    def _set_data(self, value):
+        if isinstance(value, six.text_type):
+            value = value.encode(self.charset)
+        self.response = [value]
+        if self.automatically_set_content_length:
+            self.headers['Content-Length'] = str(len(value))
+    data = property(_get_data, _set_data, doc=_get_data.__doc__)
+    del _get_data, _set_data
+
+    @property
+    def is_sequence(self):
+        """`True` if the response iterable is a list or tuple."""
+        return isinstance(self.response, (tuple, list))
+
+    content_type = CommonResponseDescriptorsMixin.content_type
+    content_length = CommonResponseDescriptorsMixin.content_length
+    location = CommonResponseDescriptorsMixin.location
+
+    def iter_encoded(self):
+        """Iter the response encoded with the encoding of the response."""
+        charset = self.charset
+        for item in self.response:
+            if isinstance(item, six.text_type):
+                yield item.encode(charset)
+            elif not isinstance(item, bytes):
+                yield str(item)
+            else:
+                yield item
+
+    def set_cookie(self, key, value='', max_age=None, expires=None,
+                   path='/', domain=None, secure=None, httponly=False):
+        """Sets a cookie.  See :meth:`BaseResponse.set_cookie`."""
+        self.headers.add('Set-Cookie', dump_cookie(key, value, max_age,
+                         expires, path, domain, secure, httponly,
+                         self.charset))
+
+    def delete_cookie(self, key, path='/', domain=None):
+        """Delete a cookie.  Fails silently if key doesn't exist."""
+        self.set_cookie(key, expires=0, max_age=0, path=path, domain=domain)
+
+    def close(self):
+        """Close the wrapped response if possible."""
+        if hasattr(self.response, 'close'):
+            self.response.close()
+
+    def get_wsgi_headers(self, environ):
+        """Returns the headers modified for the given environment like
+        :meth:`BaseResponse.get_wsgi_headers` does.  If no modifications
+        are necessary the headers of the response are returned instead
+        of a copy.
+        """
+        headers = self.headers
+        status = self._status_code
+        if 'location' in headers or 100 <= status < 200 or \
+           status in (204, 304) or \
+           isinstance(headers.get('content-location'), six.text_type) or \
+           (self.automatically_set_content_length and self.is_sequence and
+            'content-length' not in headers):
+            return _get_wsgi_headers(self, environ)
+        return headers
+
+    def get_app_iter(self, environ):
+        """Returns the application iterator for the given environ like
+        :meth:`BaseResponse.get_app_iter` does.  If the response is a list
+        or tuple of byte strings it's returned unchanged.
+        """
+        status = self._status_code
+        response = self.response
+        if environ['REQUEST_METHOD'] == 'HEAD' or \
+           100 <= status < 200 or status in (204, 304):
+            iterable = ()
+        elif self.direct_passthrough:
+            return response
+        elif isinstance(response, (tuple, list)) and \
+             all(isinstance(x, bytes) for x in response):
+            return response
+        else:
+            iterable = self.iter_encoded()
+        if hasattr(response, 'close'):
+            return ClosingIterator(iterable, response.close)
+        return iterable
+
+    def get_wsgi_response(self, environ):
+        """Returns the final WSGI response as ``(app_iter, status,
+        headers)`` tuple.
+        """
+        headers = self.get_wsgi_headers(environ)
+        return self.get_app_iter(environ), self._status, headers.to_list()
+
+    def __call__(self, environ, start_response):
+        """Process this response as WSGI application."""
+        app_iter, status, headers = self.get_wsgi_response(environ)
+        start_response(status, headers)
+        return app_iter
@@ -8,7 +8,6 @@
     :copyright: (c) 2011 by the Werkzeug Team, see AUTHORS for more details.
     :license: BSD, see LICENSE for more details.
 """
-import re
 import os
 import urllib
 import six
@@ -633,35 +632,40 @@ def make_line_iter(stream, limit=None, buffer_size=10 * 1024):
                   is a :class:`LimitedStream`.
     :param buffer_size: The optional buffer size.
     """
-    def _iter_basic_lines():
-        _read = make_chunk_iter_func(stream, limit, buffer_size)
-        buffer = []
-        while 1:
-            new_data = _read()
-            if not new_data:
-                break
-            new_buf = []
-            for item in chain(buffer, new_data.splitlines(True)):
-                new_buf.append(item)
-                if item and item[-1:] in b'\r\n':
-                    yield b''.join(new_buf)
-                    new_buf = []
-            buffer = new_buf
-        if buffer:
-            yield b''.join(buffer)
-
-    # This hackery is necessary to merge 'foo\r' and '\n' into one item
-    # of 'foo\r\n' if we were unlucky and we hit a chunk boundary.
-    previous = b''
-    for item in _iter_basic_lines():
-        if item == b'\n' and previous[-1:] == b'\r':
-            previous += b'\n'
-            item = b''
-        if previous:
-            yield previous
-        previous = item
-    if previous:
-        yield previous
+    _read = make_chunk_iter_func(stream, limit, buffer_size)
+
+    # the start of a line that continues in the next chunk.  A line
+    # that ends with a carriage return is kept here as well until we know
+    # if the next chunk starts with a newline.
+    buffer = bytearray()
+    while 1:
+        data = _read()
+        if not data:
+            break
+        if buffer[-1:] == b'\r':
+            if data[:1] == b'\n':
+                buffer += b'\n'
+                data = data[1:]
+            yield bytes(buffer)
+            del buffer[:]
+            if not data:
+                continue
+        lines = data.splitlines(True)
+        tail = lines[-1]
+        if tail[-1:] == b'\n':
+            tail = None
+        else:
+            lines.pop()
+        if buffer and lines:
+            buffer += lines[0]
+            lines[0] = bytes(buffer)
+            del buffer[:]
+        for line in lines:
+            yield line
+        if tail is not None:
+            buffer += tail
+    if buffer:
+        yield bytes(buffer)
 
 
 def make_chunk_iter(stream, separator, limit=None, buffer_size=10 * 1024):
@@ -683,25 +687,31 @@ def make_chunk_iter(stream, separator, limit=None, buffer_size=10 * 1024):
     :param buffer_size: The optional buffer size.
     """
     _read = make_chunk_iter_func(stream, limit, buffer_size)
-    regex = force_bytes('({})'.format(re.escape(separator)))
-    _split = re.compile(regex).split
     separator = force_bytes(separator)
-    buffer = []
+    sep_len = len(separator)
+    buffer = bytearray()
+    found_data = False
     while 1:
-        new_data = _read()
-        if not new_data:
+        data = _read()
+        if not data:
             break
-        chunks = _split(new_data)
-        new_buf = []
-        for item in chain(buffer, chunks):
-            if item == separator:
-                yield b''.join(new_buf)
-                new_buf = []
-            else:
-                new_buf.append(item)
-        buffer = new_buf
-    if buffer:
-        yield b''.join(buffer)
+        found_data = True
+        if buffer:
+            # the separator might start in the buffered data
+            start = max(0, len(buffer) - sep_len + 1)
+            buffer += data
+            idx = buffer.find(separator, start)
+            if idx == -1:
+                continue
+            yield bytes(buffer[:idx])
+            data = bytes(buffer[idx + sep_len:])
+            del buffer[:]
+        chunks = data.split(separator)
+        buffer += chunks.pop()
+        for chunk in chunks:
+            yield chunk
+    if found_data:
+        yield bytes(buffer)
 
 
 class LimitedStream(object):